@@ -3,17 +3,155 @@
 Définit la classe Triangulator pour la triangulation de PointSet.
 """
 
-from flask import Flask, Response
+import threading
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
 
-from TP.models import PointSet, Triangles
+from TP.cache import ResultCache, SharedResults, content_key
+from TP.codec import DEFAULT_CHUNK_SIZE, encode_triangles, iter_encoded_triangles
+from TP.dedup import dedup_points
+from TP.delaunay import delaunay_triangles
+from TP.mesh import IncrementalMesh
+from TP.metrics import (
+    Metrics,
+    admission_collector,
+    cache_collector,
+    shared_results_collector,
+    warmup_collector,
+)
+from TP.models import Point, PointSet, Triangles
+from TP.pointset import parse_pointset
+from TP.warmup import WarmupScheduler
+from TP.wire import DEFAULT_FORMAT, WireFormat, all_formats, encode_as, transcode
+
+
+class FeatureDisabled(Exception):
+    """Fonctionnalité non activée sur ce Triangulator (réponse 404).
+
+    P.ex. le préchauffage sans ``warmup_workers``, ou l'enregistrement de
+    PointSet sans client du PointSetManager.
+    """
+
+
+class _WorkingMesh:
+    """Triangulation de travail d'un PointSet (`Triangulator.apply_delta`).
+
+    ``mesh`` est résolu une fois la triangulation initiale calculée ;
+    ``lock`` sérialise les modifications de ce seul PointSet.
+    """
+
+    __slots__ = ("mesh", "lock")
+
+    def __init__(self):
+        self.mesh: Future[IncrementalMesh] = Future()
+        self.lock = threading.Lock()
 
 
 class Triangulator:
     """Calculer des triangulations et encoder des ensembles de triangles."""
 
-    def __init__(self):
-        """Initialise une nouvelle instance de Triangulator."""
-        pass
+    def __init__(
+        self,
+        *,
+        client=None,
+        cache_max_bytes: int = 0,
+        batch_workers: int = 8,
+        backend=None,
+        dedup_epsilon: float = 0.0,
+        max_meshes: int = 16,
+        store=None,
+        metrics: Metrics | None = None,
+        warmup_workers: int = 0,
+        share_results: bool = False,
+        admission=None,
+    ):
+        """Initialise une nouvelle instance de Triangulator.
+
+        ``client`` est le client du PointSetManager utilisé par
+        `get_pointset` (p.ex. `TP.pointset_manager_client.PointSetManagerClient`) ;
+        il doit fournir une méthode ``get_pointset(point_set_id)``.
+
+        ``cache_max_bytes`` fixe le budget du cache des triangulations
+        encodées (`TP.cache.ResultCache`) ; 0 désactive la conservation des
+        résultats, les calculs concurrents d'un même identifiant restant
+        regroupés.
+
+        ``batch_workers`` borne le nombre de PointSet récupérés et triangulés
+        en parallèle par `triangulate_batch`.
+
+        ``backend`` (p.ex. `TP.executor.ProcessPoolBackend`, ou
+        `TP.parallel.ParallelBackend` pour répartir une triangulation sur
+        plusieurs cœurs) reçoit les triangulations qu'il accepte
+        (``backend.accepts(n)``, selon le nombre de points) ; les autres sont
+        calculées dans le thread appelant.
+
+        ``dedup_epsilon`` est le pas de la grille sur laquelle les points
+        quasi confondus sont fusionnés avant triangulation
+        (`TP.dedup.dedup_points`) ; 0 ne fusionne que les doublons exacts.
+
+        ``max_meshes`` borne le nombre de triangulations modifiables
+        (`apply_delta`) gardées en mémoire ; les moins récemment modifiées
+        sont oubliées au-delà.
+
+        ``store`` (p.ex. `TP.store.DiskStore`) conserve les triangulations
+        encodées d'un redémarrage à l'autre : un résultat absent du cache en
+        mémoire y est cherché avant d'être calculé, puis y est enregistré. Le
+        dépôt doit être propre à un réglage (``dedup_epsilon``) donné.
+
+        ``metrics`` (`TP.metrics.Metrics`, un registre neuf par défaut)
+        reçoit les durées des étapes du calcul, les tailles des entrées et
+        des résultats et les compteurs du cache ; ``Metrics(enabled=False)``
+        désactive l'instrumentation.
+
+        ``warmup_workers`` > 0 active le préchauffage en arrière-plan
+        (`warmup`, un `TP.warmup.WarmupScheduler` à autant de threads) : les
+        PointSet annoncés sont triangulés d'avance dans le cache et le
+        ``store``, qui doivent donc conserver les résultats (`ValueError`
+        sans ``cache_max_bytes`` ni ``store``).
+
+        Avec ``share_results``, les résultats sont rangés (cache et
+        ``store``) sous la clé de contenu du PointSet (`TP.cache.content_key`)
+        plutôt que sous son identifiant : des PointSet identiques enregistrés
+        sous des identifiants différents partagent un seul calcul. Le lien
+        identifiant -> clé (`results`, un `TP.cache.SharedResults`) est
+        établi à la première récupération du PointSet ; un résultat est
+        oublié quand plus aucun identifiant n'y est relié.
+
+        ``admission`` (`TP.admission.AdmissionController`) limite les
+        triangulations simultanées d'après leur nombre de points : au-delà de
+        son budget, les calculs attendent dans sa file ou sont refusés
+        (`TP.admission.Overloaded`, réponse 503).
+        """
+        self.client = client
+        self.cache = ResultCache(cache_max_bytes)
+        self.batch_workers = batch_workers
+        self.backend = backend
+        self.dedup_epsilon = dedup_epsilon
+        self.max_meshes = max_meshes
+        self.store = store
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.metrics.add_collector(cache_collector(self.cache))
+        self._meshes: OrderedDict[str, _WorkingMesh] = OrderedDict()
+        self._meshes_lock = threading.Lock()
+        self.admission = admission
+        if admission is not None:
+            self.metrics.add_collector(admission_collector(admission))
+        self.results = None
+        if share_results:
+            self.results = SharedResults()
+            self.metrics.add_collector(shared_results_collector(self.results))
+        self.warmup = None
+        if warmup_workers:
+            if not cache_max_bytes and store is None:
+                raise ValueError(
+                    "background warm-up needs a result cache (cache_max_bytes) "
+                    "or a store to keep its results"
+                )
+            self.warmup = WarmupScheduler(self, workers=warmup_workers)
+            self.metrics.add_collector(warmup_collector(self.warmup))
 
     def encode_triangles(self, triangles: Triangles) -> bytes:
         """Encode les triangles en format binaire.
@@ -24,25 +162,344 @@ class Triangulator:
         - 4 octets little-endian (entier non signé) : nombre de triangles
         - pour chaque triangle : 3 × 4 octets little-endian indices
         """
-        import struct
+        with self.metrics.stage("encode"):
+            return encode_triangles(triangles.vertices, triangles.triangles)
+
+    def iter_encoded_triangles(
+        self, triangles: Triangles, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """Produire l'encodage de `encode_triangles` par morceaux.
+
+        Utilisé pour les réponses HTTP en flux : le premier octet part avant
+        que tout le résultat ne soit encodé et la mémoire reste bornée.
+        """
+        return iter_encoded_triangles(
+            triangles.vertices, triangles.triangles, chunk_size
+        )
+
+    def triangulate_bytes(
+        self,
+        point_set_id: str,
+        fmt: WireFormat = DEFAULT_FORMAT,
+        *,
+        pointset: PointSet | None = None,
+        background: bool = False,
+    ) -> bytes:
+        """Triangulation encodée du PointSet, servie depuis le cache si possible.
+
+        Avec un ``store``, le dépôt est consulté avant tout calcul. ``fmt``
+        choisit un format compact ou compressé (`TP.wire`) : il est dérivé de
+        l'encodage par défaut (lui-même mis en cache) et mis en cache à part.
+
+        ``pointset``, s'il est fourni, évite de récupérer le PointSet (p.ex.
+        juste après l'avoir reçu, voir `store_pointset`).
+
+        Avec ``share_results``, le PointSet est récupéré (s'il ne l'a jamais
+        été) pour trouver sa clé de contenu, sous laquelle le résultat est
+        cherché puis rangé.
+
+        ``background`` marque un calcul d'arrière-plan (préchauffage), admis
+        après les requêtes (voir `triangulate_pointset`).
+        """
+        key = self.result_key(point_set_id)
+        if key is None:
+            if pointset is None:
+                with self.metrics.stage("get_pointset"):
+                    pointset = self.get_pointset(point_set_id)
+            key = self.link_pointset(point_set_id, pointset)
+        if fmt != DEFAULT_FORMAT:
+            return self.cache.get_or_compute(
+                fmt.cache_key(key),
+                lambda: self._encode_as(point_set_id, fmt, pointset),
+            )
+
+        def compute():
+            if self.store is not None:
+                with self.metrics.stage("store_read"):
+                    stored = self.store.get_triangles_bytes(key)
+                    if stored is not None:
+                        return bytes(stored)
+            start = time.perf_counter()
+            triangles = self._triangulate(point_set_id, pointset, background)
+            data = self.encode_triangles(triangles)
+            if self.results is not None:
+                self.results.computed(key, time.perf_counter() - start)
+            if self.store is not None:
+                with self.metrics.stage("store_write"):
+                    self.store.put_triangles_bytes(key, data)
+            return data
 
-        out = len(triangles.vertices).to_bytes(4, "little")
-        for x, y in triangles.vertices:
-            out += struct.pack("<f", float(x))
-            out += struct.pack("<f", float(y))
+        return self.cache.get_or_compute(key, compute)
 
-        out += len(triangles.triangles).to_bytes(4, "little")
-        for a, b, c in triangles.triangles:
-            out += int(a).to_bytes(4, "little")
-            out += int(b).to_bytes(4, "little")
-            out += int(c).to_bytes(4, "little")
-        return out
+    def result_key(self, point_set_id: str) -> str | None:
+        """Clé du résultat de ``point_set_id`` dans le cache et le ``store``.
+
+        C'est l'identifiant lui-même, sauf avec ``share_results`` : la clé
+        de contenu du PointSet, ou ``None`` tant qu'il n'a pas été récupéré
+        (voir `link_pointset`).
+        """
+        if self.results is None:
+            return point_set_id
+        return self.results.key(point_set_id)
+
+    def link_pointset(self, point_set_id: str, pointset: PointSet) -> str:
+        """Relier l'identifiant à la clé de contenu du PointSet et la retourner.
+
+        Sans ``share_results``, retourne l'identifiant. Les résultats
+        devenus orphelins (`TP.cache.SharedResults.link`) sont oubliés.
+        """
+        if self.results is None:
+            return point_set_id
+        with self.metrics.stage("content_key"):
+            key = content_key(pointset.points)
+        self._forget(self.results.link(point_set_id, key))
+        return key
+
+    def _encode_as(
+        self, point_set_id: str, fmt: WireFormat, pointset: PointSet | None
+    ) -> bytes:
+        """Encoder la triangulation du PointSet dans le format ``fmt``."""
+        if fmt.vertices:
+            data = self.triangulate_bytes(point_set_id, pointset=pointset)
+            with self.metrics.stage("encode"):
+                return transcode(data, fmt)
+        # sans les sommets, il faut les indices des points d'origine
+        triangles = self._triangulate(point_set_id, pointset)
+        with self.metrics.stage("encode"):
+            return encode_as(triangles, fmt)
+
+    def _triangulate(
+        self, point_set_id: str, pointset: PointSet | None, background: bool = False
+    ) -> Triangles:
+        """`triangulate`, ou `triangulate_pointset` si le PointSet est fourni."""
+        if pointset is None:
+            return self.triangulate(point_set_id, background=background)
+        return self.triangulate_pointset(pointset, background=background)
+
+    def iter_triangulate_bytes(
+        self, point_set_id: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """Triangulation encodée du PointSet, produite par morceaux.
+
+        Un résultat en cache, en cours de calcul par une autre requête
+        (attendu), ou présent dans le ``store`` (lu alors depuis sa
+        projection, page par page), est découpé sans copie préalable ; sinon
+        la triangulation est calculée puis encodée au fil de l'eau, sans être
+        mise en cache ni regroupée avec d'autres calculs (l'encodage complet
+        n'existe jamais en mémoire) : ce calcul ne compte pas comme un miss
+        du cache. Le calcul a lieu avant le retour, de sorte que les erreurs
+        sont levées par l'appel lui-même et non pendant l'envoi.
+
+        Avec ``share_results``, un résultat absent est calculé par
+        `triangulate_bytes` (donc partagé et mis en cache) avant d'être
+        découpé.
+        """
+        key = self.result_key(point_set_id)
+        data = self.cache.lookup(key) if key is not None else None
+        if data is None and key is not None and self.store is not None:
+            data = self.store.get_triangles_bytes(key)
+        if data is None and self.results is not None:
+            data = self.triangulate_bytes(point_set_id)
+        if data is not None:
+            view = memoryview(data)
+            return (
+                bytes(view[i : i + chunk_size])
+                for i in range(0, len(view), chunk_size)
+            )
+        return self.iter_encoded_triangles(self.triangulate(point_set_id), chunk_size)
+
+    def triangulate_batch(
+        self, point_set_ids: Sequence[str]
+    ) -> list[bytes | Exception]:
+        """Trianguler plusieurs PointSet en parallèle.
+
+        Les récupérations auprès du PointSetManager (attente réseau) et les
+        triangulations se recouvrent dans un pool d'au plus ``batch_workers``
+        threads. Un identifiant répété n'est récupéré et calculé qu'une fois,
+        même sans cache ; son résultat (ou son exception) est repris à chaque
+        occurrence. Retourne, dans l'ordre des identifiants, la triangulation
+        encodée ou l'exception levée pour chacun.
+        """
+
+        def run(point_set_id):
+            try:
+                return self.triangulate_bytes(point_set_id)
+            except Exception as e:
+                return e
+
+        unique = list(dict.fromkeys(point_set_ids))
+        if len(unique) <= 1 or self.batch_workers <= 1:
+            computed = [run(pid) for pid in unique]
+        else:
+            workers = min(self.batch_workers, len(unique))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                computed = list(pool.map(run, unique))
+        results = dict(zip(unique, computed, strict=True))
+        return [results[pid] for pid in point_set_ids]
+
+    def apply_delta(
+        self,
+        point_set_id: str,
+        insert: Iterable[Point] = (),
+        remove: Iterable[Point] = (),
+        pointset: PointSet | None = None,
+    ) -> Triangles:
+        """Modifier la triangulation de travail d'un PointSet et la retourner.
+
+        À la première modification, la triangulation du PointSet devient une
+        `TP.mesh.IncrementalMesh` gardée en mémoire ; les modifications
+        suivantes s'y cumulent et ne re-triangulent que les zones touchées.
+        Les points de ``remove`` sont retirés (`ValueError` si l'un d'eux
+        n'est pas un sommet ou y figure plusieurs fois, auquel cas rien
+        n'est modifié), puis ceux de ``insert`` ajoutés (les doublons sont
+        ignorés). Le PointSet du
+        PointSetManager et le résultat de `triangulate_bytes` sont inchangés.
+
+        ``pointset``, s'il est fourni, évite de récupérer le PointSet lors de
+        la première modification (voir `has_mesh`).
+        """
+        insert = list(insert)
+        remove = list(remove)
+        working = self._working_mesh(point_set_id, pointset)
+        mesh = working.mesh.result()
+        with working.lock:
+            counts = Counter(remove)
+            missing = [p for p in counts if p not in mesh]
+            if missing:
+                raise ValueError(f"cannot remove {missing}: not a vertex")
+            duplicates = [p for p, count in counts.items() if count > 1]
+            if duplicates:
+                raise ValueError(f"duplicate point in remove: {duplicates}")
+            for x, y in remove:
+                mesh.remove(x, y)
+            for x, y in insert:
+                mesh.insert(x, y)
+            return mesh.to_triangles()
+
+    def _working_mesh(
+        self, point_set_id: str, pointset: PointSet | None
+    ) -> _WorkingMesh:
+        """Triangulation de travail du PointSet, créée au premier appel.
+
+        Le verrou global ne protège que le dictionnaire : la récupération du
+        PointSet et sa triangulation se font hors verrou, par le premier
+        appelant ; les appels concurrents pour le même identifiant attendent
+        son résultat (ou son erreur), ceux des autres identifiants ne sont
+        pas bloqués.
+        """
+        with self._meshes_lock:
+            working = self._meshes.get(point_set_id)
+            owner = working is None
+            if owner:
+                working = self._meshes[point_set_id] = _WorkingMesh()
+                while len(self._meshes) > self.max_meshes:
+                    self._meshes.popitem(last=False)
+            self._meshes.move_to_end(point_set_id)
+        if not owner:
+            return working
+
+        try:
+            if pointset is None:
+                pointset = self.get_pointset(point_set_id)
+            mesh = IncrementalMesh.from_triangles(self.triangulate_pointset(pointset))
+        except BaseException as e:
+            with self._meshes_lock:
+                if self._meshes.get(point_set_id) is working:
+                    del self._meshes[point_set_id]
+            working.mesh.set_exception(e)
+            raise
+        working.mesh.set_result(mesh)
+        return working
+
+    def has_mesh(self, point_set_id: str) -> bool:
+        """Indiquer si le PointSet a une triangulation de travail (`apply_delta`)."""
+        with self._meshes_lock:
+            return point_set_id in self._meshes
+
+    def is_warm(self, point_set_id: str) -> bool:
+        """Indiquer si la triangulation encodée est prête (cache ou ``store``)."""
+        key = self.result_key(point_set_id)
+        if key is None:
+            return False
+        if key in self.cache:
+            return True
+        store = self.store
+        return store is not None and store.get_triangles_bytes(key) is not None
+
+    def schedule_warmup(self, point_set_ids: Sequence[str], priority: int = 0) -> int:
+        """Annoncer des PointSet à préchauffer (`TP.warmup.WarmupScheduler.schedule`).
+
+        Lève `FeatureDisabled` si le préchauffage n'est pas activé
+        (``warmup_workers``).
+        """
+        if self.warmup is None:
+            raise FeatureDisabled("background warm-up is disabled")
+        return self.warmup.schedule(point_set_ids, priority)
+
+    def warmup_stats(self) -> dict[str, int | float]:
+        """État du préchauffage (`TP.warmup.WarmupScheduler.stats`).
+
+        Lève `FeatureDisabled` si le préchauffage n'est pas activé.
+        """
+        if self.warmup is None:
+            raise FeatureDisabled("background warm-up is disabled")
+        return self.warmup.stats()
+
+    def invalidate(self, point_set_id: str | None = None) -> None:
+        """Oublier le résultat en cache d'un PointSet (ou de tous si ``None``).
+
+        Sa triangulation de travail (`apply_delta`) et celle du ``store``
+        sont oubliées aussi, ainsi que ses encodages dans les autres formats.
+        Avec ``share_results``, l'identifiant est délié de sa clé de contenu,
+        et le résultat n'est oublié que si aucun autre identifiant n'y est
+        relié.
+        """
+        if point_set_id is None:
+            self.cache.invalidate()
+            if self.store is not None:
+                self.store.invalidate()
+            if self.results is not None:
+                self.results.clear()
+        elif self.results is None:
+            self._forget([point_set_id])
+        else:
+            self._forget(self.results.unlink(point_set_id))
+        with self._meshes_lock:
+            if point_set_id is None:
+                self._meshes.clear()
+            else:
+                self._meshes.pop(point_set_id, None)
+
+    def _forget(self, keys: Iterable[str]) -> None:
+        """Oublier les résultats rangés sous ``keys`` (tous formats, ``store``)."""
+        for key in keys:
+            self.cache.invalidate(key)
+            for fmt in all_formats():
+                self.cache.invalidate(fmt.cache_key(key))
+            if self.store is not None:
+                self.store.invalidate(key)
+
+    def store_pointset(self, data: bytes) -> str:
+        """Enregistrer un PointSet encodé et retourner son identifiant.
+
+        Le PointSet est confié au client du PointSetManager (méthode
+        ``store_pointset_bytes``, p.ex. `TP.store.DiskStore` ou
+        `TP.pointset_manager_client.PointSetManagerClient`) ; lève
+        `FeatureDisabled` sans client.
+        """
+        if self.client is None:
+            raise FeatureDisabled("no PointSetManager client to store PointSets")
+        with self.metrics.stage("store_pointset"):
+            return self.client.store_pointset_bytes(data)
 
     def get_pointset(self, point_set_id: str) -> PointSet:
         """Récupérer un PointSet par son identifiant (API en snake_case).
 
         Cette méthode supporte le remplacement au niveau de l'instance (monkeypatch)
         en utilisant soit `get_pointset` soit l'ancien nom `get_PointSet`.
+        Sinon, le PointSet est demandé au client du PointSetManager ; les
+        erreurs du client (`KeyError`, `ValueError`, `ConnectionError`) sont
+        propagées telles quelles.
         """
         # allow instance-level overrides (monkeypatching)
         gp = self.__dict__.get("get_pointset")
@@ -59,68 +516,62 @@ class Triangulator:
             except TypeError:
                 return gpc()[point_set_id]
 
+        if self.client is not None:
+            return self.client.get_pointset(point_set_id)
+
         raise NotImplementedError
 
     get_PointSet = get_pointset
 
-    def parse_pointset(self, data: bytes) -> PointSet:
-        """Analyser des données binaires pour produire un PointSet."""
-        from pointset import parse_pointset
-
-        return parse_pointset(data)
-
-    def triangulate(self, point_set_id) -> Triangles:  
-        """Calculer une triangulation simple pour l'identifiant de PointSet fourni.
+    def parse_pointset(self, data: bytes, *, zero_copy: bool = False) -> PointSet:
+        """Analyser des données binaires pour produire un PointSet.
 
-        L'implémentation est volontairement simple : pour n > 2 nous utilisons une
-        triangulation en éventail à partir du sommet 0 (triangles (0, i, i+1)).
-        Les cas particuliers pour 0-2 points et 3 points colinéaires sont gérés.
+        Voir `TP.pointset.parse_pointset` pour le mode ``zero_copy``.
         """
-        ps = self.get_pointset(point_set_id)
-
-        cleaned: list[tuple[float, float]] = []
-        seen = set()
-        for p in ps.points:
-            try:
-                x, y = float(p[0]), float(p[1])
-            except Exception:
-                continue
-            key = (x, y)
-            if key in seen:
-                continue
-            seen.add(key)
-            cleaned.append(key)
+        return parse_pointset(data, zero_copy=zero_copy)
 
-        n = len(cleaned)
-        if n < 3:
-            return Triangles(vertices=cleaned, triangles=[])
+    def triangulate(self, point_set_id, *, background: bool = False) -> Triangles:
+        """Calculer la triangulation de Delaunay du PointSet identifié.
 
-        def _area(a, b, c):
-            return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
-
-        if n == 3:
-            if _area(cleaned[0], cleaned[1], cleaned[2]) == 0:
-                return Triangles(vertices=cleaned, triangles=[])
-            return Triangles(vertices=cleaned, triangles=[(0, 1, 2)])
-
-        tris = [(0, i, i + 1) for i in range(1, n - 1)]
-        return Triangles(vertices=cleaned, triangles=tris)
+        Les points invalides sont écartés et les doublons fusionnés (à
+        ``dedup_epsilon`` près, voir `TP.dedup.dedup_points`), puis la
+        triangulation est calculée en O(n log n) par le moteur de
+        `TP.delaunay`, dans le ``backend`` s'il accepte cette taille. Les cas
+        particuliers (0 à 2 points, points tous alignés) ne produisent aucun
+        triangle. Pour ``background``, voir `triangulate_pointset`.
+        """
+        with self.metrics.stage("get_pointset"):
+            ps = self.get_pointset(point_set_id)
+        return self.triangulate_pointset(ps, background=background)
 
+    def triangulate_pointset(
+        self, ps: PointSet, *, background: bool = False
+    ) -> Triangles:
+        """Trianguler un PointSet déjà récupéré (voir `triangulate`).
 
+        Ne fait aucun appel réseau : c'est la partie calcul de `triangulate`,
+        que la variante asynchrone de l'API (`TP.asgi`) exécute hors de la
+        boucle d'événements. Avec un contrôle d'``admission``, le calcul
+        attend d'y être admis (ou lève `TP.admission.Overloaded`), après les
+        requêtes en attente s'il est d'arrière-plan (``background``).
+        """
+        metrics = self.metrics
+        metrics.observe("triangulator_input_points", len(ps.points))
+        permit = nullcontext()
+        if self.admission is not None:
+            with metrics.stage("admission"):
+                permit = self.admission.acquire(len(ps.points), background=background)
+        with permit:
+            with metrics.stage("dedup"):
+                cleaned, index_map = dedup_points(ps.points, self.dedup_epsilon)
 
-def create_app(triangulator):
-    """Créer une application Flask exposant les endpoints de l'API de triangulation."""
-    app = Flask(__name__)
+            with metrics.stage("triangulate"):
+                if len(cleaned) < 3:
+                    triangles = []
+                elif self.backend is not None and self.backend.accepts(len(cleaned)):
+                    triangles = self.backend.triangulate(cleaned)
+                else:
+                    triangles = delaunay_triangles(cleaned)
+        metrics.observe("triangulator_output_triangles", len(triangles))
+        return Triangles(vertices=cleaned, triangles=triangles, index_map=index_map)
 
-    @app.get("/triangulate/<point_set_id>")
-    def triangulate_api(point_set_id):
-        try:
-            res = triangulator.triangulate(point_set_id)
-            data = triangulator.encode_triangles(res)
-            return Response(data, mimetype="application/octet-stream")
-        except KeyError:
-            return {"error": "notfound"}, 404
-        except Exception:
-            return {"error": "error"}, 500
-
-    return app
@@ -0,0 +1,255 @@
+"""Contrôle d'admission des triangulations : budget, file d'attente, voies.
+
+Sans limite, une rafale de gros PointSet est triangulée d'un coup : la
+mémoire explose et toutes les requêtes ralentissent. `AdmissionController`
+se place devant le calcul (`Triangulator.triangulate_pointset`) :
+
+- le coût d'une triangulation est estimé d'après son nombre de points
+  (`AdmissionController.estimate`), la mémoire et le temps de calcul
+  croissant avec lui ;
+- les calculs en cours ne dépassent pas un budget de coût ; au-delà, les
+  suivants attendent leur tour dans une file bornée, au plus
+  ``queue_timeout`` secondes ;
+- file pleine ou attente trop longue, la requête est refusée tout de suite
+  (`Overloaded`, une `ConnectionError` : réponse 503 ``SERVICE_UNAVAILABLE``
+  avec un en-tête ``Retry-After``) ;
+- les petits calculs (coût d'au plus ``small_cost``) ont leur propre voie,
+  avec son budget et sa file, pour ne pas attendre derrière les gros.
+
+Un calcul plus coûteux que tout le budget de sa voie est admis quand la
+voie est vide.
+
+Les calculs d'arrière-plan (préchauffage, ``background=True``) passent après
+les requêtes : ils n'occupent aucune place dans la file et ne sont admis que
+si aucune requête de leur voie n'attend. Faute de capacité au bout de
+``queue_timeout`` secondes, ils sont refusés (`Overloaded`) et comptés à
+part (``deferred``).
+
+L'attente bloque le thread du calcul : avec `TP.asgi`, l'exécuteur doit
+avoir assez de threads pour les calculs en attente des deux voies.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+# budget de la voie des gros calculs (points en cours de triangulation)
+DEFAULT_BUDGET = 4_000_000
+
+# seuil (en points) des petits calculs et budget de leur voie
+DEFAULT_SMALL_COST = 50_000
+DEFAULT_SMALL_BUDGET = 500_000
+
+# calculs en attente par voie, et durée maximale de l'attente (secondes)
+DEFAULT_MAX_QUEUE = 16
+DEFAULT_QUEUE_TIMEOUT = 10.0
+
+# bornes de l'en-tête Retry-After (secondes)
+_MIN_RETRY_AFTER = 1
+_MAX_RETRY_AFTER = 60
+
+
+class Overloaded(ConnectionError):
+    """Calcul refusé faute de capacité ; réessayer après ``retry_after`` secondes."""
+
+    def __init__(self, message: str, retry_after: int):
+        """Créer l'erreur avec le délai conseillé avant un nouvel essai."""
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Lane:
+    """Voie d'admission : budget, coût en cours et file d'attente."""
+
+    __slots__ = ("name", "budget", "active", "queue")
+
+    def __init__(self, name: str, budget: int):
+        self.name = name
+        self.budget = budget
+        self.active = 0
+        self.queue: deque[object] = deque()
+
+    def fits(self, cost: int) -> bool:
+        """Indiquer si un calcul de coût ``cost`` peut démarrer."""
+        return self.active == 0 or self.active + cost <= self.budget
+
+
+class Permit:
+    """Autorisation de calcul accordée par `AdmissionController.acquire`.
+
+    À libérer une fois le calcul terminé (`release`, ou bloc ``with``).
+    """
+
+    __slots__ = ("controller", "lane", "cost", "start", "released")
+
+    def __init__(self, controller, lane: _Lane, cost: int):
+        """Autoriser un calcul de coût ``cost`` dans ``lane``."""
+        self.controller = controller
+        self.lane = lane
+        self.cost = cost
+        self.start = time.perf_counter()
+        self.released = False
+
+    def release(self) -> None:
+        """Rendre le coût du calcul à sa voie (une seule fois)."""
+        if not self.released:
+            self.released = True
+            self.controller._release(self, time.perf_counter() - self.start)
+
+    def __enter__(self):
+        """Entrer dans le bloc du calcul autorisé."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Libérer l'autorisation à la sortie du bloc."""
+        self.release()
+
+
+class AdmissionController:
+    """Budget de calcul partagé par les triangulations, en deux voies.
+
+    Toutes les méthodes sont thread-safe ; l'attente d'admission bloque le
+    thread appelant.
+    """
+
+    def __init__(
+        self,
+        budget: int = DEFAULT_BUDGET,
+        *,
+        small_cost: int = DEFAULT_SMALL_COST,
+        small_budget: int = DEFAULT_SMALL_BUDGET,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        queue_timeout: float = DEFAULT_QUEUE_TIMEOUT,
+    ):
+        """Créer un contrôleur ; ``max_queue=0`` refuse au lieu de faire attendre."""
+        if budget < 1 or small_budget < 1:
+            raise ValueError("budgets must be >= 1")
+        if max_queue < 0:
+            raise ValueError("max_queue must be >= 0")
+        self.small_cost = small_cost
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.small = _Lane("small", small_budget)
+        self.large = _Lane("large", budget)
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.deferred = 0
+        self._background = 0
+        # durée moyenne (moyenne mobile) d'un calcul par unité de coût
+        self._seconds_per_cost: float | None = None
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def estimate(n_points: int) -> int:
+        """Coût estimé de la triangulation de ``n_points`` points (au moins 1)."""
+        return max(n_points, 1)
+
+    def acquire(self, n_points: int, *, background: bool = False) -> Permit:
+        """Attendre l'admission d'une triangulation de ``n_points`` points.
+
+        Lève `Overloaded` si la file de sa voie est pleine, ou si l'attente
+        dépasse ``queue_timeout`` secondes. Un calcul d'arrière-plan
+        (``background``) attend hors de la file que la voie soit libre de
+        toute requête en attente (voir `_acquire_background`).
+        """
+        cost = self.estimate(n_points)
+        lane = self.small if cost <= self.small_cost else self.large
+        with self._cond:
+            if background:
+                return self._acquire_background(lane, cost)
+            if not lane.queue and lane.fits(cost):
+                return self._admit(lane, cost)
+            if len(lane.queue) >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded(
+                    f"triangulation service overloaded ({lane.name} requests)",
+                    self._retry_after(lane, cost),
+                )
+            ticket = object()
+            lane.queue.append(ticket)
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while lane.queue[0] is not ticket or not lane.fits(cost):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        self.timeouts += 1
+                        raise Overloaded(
+                            f"timed out waiting for capacity ({lane.name} requests)",
+                            self._retry_after(lane, cost),
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                lane.queue.remove(ticket)
+                # le suivant dans la file peut démarrer, ou avancer
+                self._cond.notify_all()
+            return self._admit(lane, cost)
+
+    def stats(self) -> dict[str, int]:
+        """Coût en cours et calculs en attente par voie ; compteurs d'admission.
+
+        ``rejected`` compte tous les refus de requêtes, dont ``timeouts``
+        (attente trop longue) ; ``background_waiting`` et ``deferred`` : calculs
+        d'arrière-plan en attente, et refusés faute de capacité.
+        """
+        with self._cond:
+            stats = {}
+            for lane in (self.small, self.large):
+                stats[f"{lane.name}_active"] = lane.active
+                stats[f"{lane.name}_queued"] = len(lane.queue)
+            stats["admitted"] = self.admitted
+            stats["rejected"] = self.rejected
+            stats["timeouts"] = self.timeouts
+            stats["background_waiting"] = self._background
+            stats["deferred"] = self.deferred
+            return stats
+
+    def _acquire_background(self, lane: _Lane, cost: int) -> Permit:
+        """Admettre un calcul d'arrière-plan dans ``lane`` (verrou pris).
+
+        Il n'est admis que si aucune requête n'attend dans sa voie et que le
+        budget le permet ; les requêtes arrivées entre-temps passent donc
+        devant lui.
+        """
+        deadline = time.monotonic() + self.queue_timeout
+        self._background += 1
+        try:
+            while lane.queue or not lane.fits(cost):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.deferred += 1
+                    raise Overloaded(
+                        f"no spare capacity for background work ({lane.name} "
+                        "requests)",
+                        self._retry_after(lane, cost),
+                    )
+                self._cond.wait(remaining)
+        finally:
+            self._background -= 1
+        return self._admit(lane, cost)
+
+    def _admit(self, lane: _Lane, cost: int) -> Permit:
+        """Réserver ``cost`` dans ``lane`` (verrou pris)."""
+        lane.active += cost
+        self.admitted += 1
+        return Permit(self, lane, cost)
+
+    def _release(self, permit: Permit, seconds: float) -> None:
+        """Rendre le coût d'un calcul terminé et noter sa durée."""
+        with self._cond:
+            permit.lane.active -= permit.cost
+            rate = seconds / permit.cost
+            if self._seconds_per_cost is None:
+                self._seconds_per_cost = rate
+            else:
+                self._seconds_per_cost = 0.8 * self._seconds_per_cost + 0.2 * rate
+            self._cond.notify_all()
+
+    def _retry_after(self, lane: _Lane, cost: int) -> int:
+        """Délai conseillé (secondes) : le temps estimé pour vider la voie."""
+        if self._seconds_per_cost is None:
+            return _MIN_RETRY_AFTER
+        seconds = (lane.active + cost) * self._seconds_per_cost
+        return min(max(math.ceil(seconds), _MIN_RETRY_AFTER), _MAX_RETRY_AFTER)
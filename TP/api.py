@@ -0,0 +1,242 @@
+"""Éléments communs aux deux variantes de l'API de triangulation.
+
+`TP.app` (Flask) et `TP.asgi` (asyncio) exposent les mêmes routes ; ce
+module regroupe ce qui ne dépend pas du framework : la traduction des
+exceptions en erreurs du schéma `Error`, la validation du corps de
+``POST /triangulate``, ``PATCH /triangulate/<id>`` et ``POST /warmup``, la
+réception en flux du PointSet de ``POST /pointset`` (`PointSetUpload`) et
+l'assemblage de la réponse groupée.
+"""
+
+import json
+import math
+import struct
+from collections.abc import Sequence
+
+from TP.admission import Overloaded
+from TP.codec import encode_frames
+from TP.models import Point
+from TP.Triangulator import FeatureDisabled
+
+# nombre maximal d'identifiants acceptés par POST /triangulate
+MAX_BATCH_SIZE = 1000
+
+# nombre maximal de points (ajoutés + retirés) par PATCH /triangulate/<id>
+MAX_DELTA_SIZE = 10_000
+
+# nombre maximal de points d'un PointSet reçu par POST /pointset (400 Mo)
+MAX_UPLOAD_POINTS = 50_000_000
+
+# taille des lectures du corps de POST /pointset
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# en-tête de la réponse de POST /pointset?triangulate=1 donnant l'identifiant
+POINTSET_ID_HEADER = "PointSet-Id"
+
+# type de contenu de l'export texte de Prometheus (GET /metrics)
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_FLOAT32_PAIR = struct.Struct("<2f")
+
+
+def error_info(e: Exception) -> tuple[int, str, str]:
+    """Traduire une exception en (statut HTTP, code d'erreur, message)."""
+    if isinstance(e, FeatureDisabled):
+        return 404, "NOT_FOUND", str(e) or "Feature disabled"
+    if isinstance(e, KeyError):
+        return 404, "NOT_FOUND", str(e) or "PointSet not found"
+    if isinstance(e, ValueError):
+        return 400, "BAD_REQUEST", str(e) or "Bad request"
+    if isinstance(e, ConnectionError):
+        return 503, "SERVICE_UNAVAILABLE", str(e) or "Service unavailable"
+    return 500, "INTERNAL_ERROR", str(e) or "Internal server error"
+
+
+def error_headers(e: Exception) -> dict[str, str]:
+    """En-têtes propres à une erreur : ``Retry-After`` si le service est saturé."""
+    if isinstance(e, Overloaded):
+        return {"Retry-After": str(e.retry_after)}
+    return {}
+
+
+def error_body(code: str, message: str) -> bytes:
+    """Corps JSON d'une erreur au format du schéma `Error`."""
+    return json.dumps({"code": code, "message": message}).encode()
+
+
+def batch_ids(body) -> list[str]:
+    """Valider le corps JSON décodé de ``POST /triangulate``.
+
+    Retourne la liste ``pointSetIds`` ; lève `ValueError` si le corps n'a
+    pas la forme ``{"pointSetIds": [string, ...]}`` ou dépasse
+    `MAX_BATCH_SIZE` identifiants.
+    """
+    ids = body.get("pointSetIds") if isinstance(body, dict) else None
+    if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+        raise ValueError("expected {\"pointSetIds\": [string, ...]}")
+    if len(ids) > MAX_BATCH_SIZE:
+        raise ValueError(f"at most {MAX_BATCH_SIZE} ids per request")
+    return ids
+
+
+def warmup_request(body) -> tuple[list[str], int]:
+    """Valider le corps JSON décodé de ``POST /warmup``.
+
+    Corps attendu : ``{"pointSetIds": [string, ...], "priority": int}``
+    (``priority`` facultative, 0 par défaut ; les plus hautes passent
+    d'abord). Retourne les identifiants et la priorité.
+    """
+    ids = batch_ids(body)
+    priority = body.get("priority", 0)
+    if not isinstance(priority, int) or isinstance(priority, bool):
+        raise ValueError("priority must be an integer")
+    return ids, priority
+
+
+def delta_points(body) -> tuple[list[Point], list[Point]]:
+    """Valider le corps JSON décodé de ``PATCH /triangulate/<id>``.
+
+    Corps attendu : ``{"insert": [[x, y], ...], "remove": [[x, y], ...]}``
+    (chaque liste est facultative). Les coordonnées sont arrondies en
+    float32, comme celles des PointSet, pour que les points à retirer
+    correspondent exactement aux sommets. Retourne ``(insert, remove)`` ;
+    lève `ValueError` si le corps est mal formé ou dépasse `MAX_DELTA_SIZE`
+    points.
+    """
+    if not isinstance(body, dict):
+        raise ValueError('expected {"insert": [[x, y], ...], "remove": [[x, y], ...]}')
+    lists = []
+    for key in ("insert", "remove"):
+        items = body.get(key, [])
+        if not isinstance(items, list):
+            raise ValueError(f"{key!r} must be a list of [x, y] pairs")
+        points = []
+        for item in items:
+            if (
+                not isinstance(item, list)
+                or len(item) != 2
+                or not all(
+                    isinstance(c, int | float) and not isinstance(c, bool)
+                    for c in item
+                )
+            ):
+                raise ValueError(f"{key!r} must be a list of [x, y] pairs")
+            try:
+                x, y = _FLOAT32_PAIR.unpack(_FLOAT32_PAIR.pack(*item))
+            except (OverflowError, struct.error) as e:
+                raise ValueError(f"invalid point {item}") from e
+            if not (math.isfinite(x) and math.isfinite(y)):
+                raise ValueError(f"invalid point {item}")
+            points.append((x, y))
+        lists.append(points)
+    if sum(map(len, lists)) > MAX_DELTA_SIZE:
+        raise ValueError(f"at most {MAX_DELTA_SIZE} points per request")
+    insert, remove = lists
+    return insert, remove
+
+
+class PointSetUpload:
+    """Assemblage incrémental du corps binaire de ``POST /pointset``.
+
+    Les morceaux du corps sont passés à `feed` au fil de leur réception et
+    copiés une seule fois, dans un tampon de la taille annoncée par
+    l'en-tête du PointSet quand ``content_length`` est connu. Les
+    incohérences sont signalées (`ValueError`) dès qu'elles apparaissent :
+    en-tête contredisant ``content_length`` ou annonçant plus de
+    ``max_points`` points, corps plus long que l'en-tête ne l'annonce ;
+    `finish` vérifie enfin que le corps est complet.
+    """
+
+    def __init__(
+        self, content_length: int | None = None, max_points: int = MAX_UPLOAD_POINTS
+    ):
+        """Préparer la réception d'un corps de ``content_length`` octets."""
+        if content_length is not None and content_length < 4:
+            raise ValueError("PointSet payload shorter than its 4-byte header")
+        self.content_length = content_length
+        self.max_points = max_points
+        self.count: int | None = None
+        self._buffer = bytearray()
+        self._size = 0
+
+    def feed(self, chunk: bytes) -> None:
+        """Ajouter un morceau du corps."""
+        if not chunk:
+            return
+        if self.count is None:
+            self._buffer += chunk
+            self._size = len(self._buffer)
+            if self._size >= 4:
+                self._start()
+            return
+        end = self._size + len(chunk)
+        if end > 4 + 8 * self.count:
+            raise ValueError(
+                f"PointSet header announces {self.count} points but payload is longer"
+            )
+        if self.content_length is None:
+            self._buffer += chunk
+        else:
+            self._buffer[self._size : end] = chunk
+        self._size = end
+
+    def finish(self) -> bytearray:
+        """PointSet encodé complet ; lève `ValueError` s'il est tronqué."""
+        if self.count is None:
+            raise ValueError("PointSet payload shorter than its 4-byte header")
+        if self._size != 4 + 8 * self.count:
+            raise ValueError(
+                f"PointSet header announces {self.count} points but payload has "
+                f"{self._size - 4} bytes"
+            )
+        return self._buffer
+
+    def _start(self) -> None:
+        """Lire l'en-tête et préparer le tampon du PointSet."""
+        count = int.from_bytes(self._buffer[:4], "little")
+        if count > self.max_points:
+            raise ValueError(f"at most {self.max_points} points per PointSet")
+        size = 4 + 8 * count
+        if self.content_length is not None and self.content_length != size:
+            raise ValueError(
+                f"PointSet header announces {count} points but Content-Length is "
+                f"{self.content_length} bytes"
+            )
+        if self._size > size:
+            raise ValueError(
+                f"PointSet header announces {count} points but payload is longer"
+            )
+        self.count = count
+        if self.content_length is not None:
+            buffer = bytearray(size)
+            buffer[: self._size] = self._buffer
+            self._buffer = buffer
+
+
+def upload_mode(value: str | None) -> bool:
+    """Valider le paramètre ``triangulate`` de ``POST /pointset``.
+
+    Retourne vrai pour ``1``/``true`` (téléverser puis trianguler), faux
+    s'il est absent ou vaut ``0``/``false`` ; lève `ValueError` sinon.
+    """
+    if value is None or value.lower() in ("", "0", "false"):
+        return False
+    if value.lower() in ("1", "true"):
+        return True
+    raise ValueError(f"invalid triangulate={value!r}, expected 1 or 0")
+
+
+def encode_batch(results: Sequence[bytes | Exception]) -> bytes:
+    """Assembler les résultats de `Triangulator.triangulate_batch`.
+
+    Chaque résultat devient une trame (`TP.codec.encode_frames`) : les
+    triangles encodés avec le statut 200, ou l'erreur JSON avec son statut.
+    """
+    frames = []
+    for result in results:
+        if isinstance(result, Exception):
+            status, code, message = error_info(result)
+            frames.append((status, error_body(code, message)))
+        else:
+            frames.append((200, result))
+    return encode_frames(frames)
@@ -1,32 +1,233 @@
 """Factory Flask pour l'API de triangulation.
 
-Fournit un endpoint HTTP pour demander la triangulation d'un PointSet par identifiant.
+Fournit un endpoint HTTP pour demander la triangulation d'un PointSet par
+identifiant (dans un format compact ou compressé si le client le demande,
+voir `TP.wire`), un endpoint groupé pour en trianguler plusieurs en une
+requête, un endpoint pour ajouter ou retirer des points d'une triangulation,
+un endpoint d'enregistrement de PointSet (éventuellement triangulé dans la
+même requête), le préchauffage en arrière-plan (`TP.warmup`) et l'export
+des métriques (`TP.metrics`) au format Prometheus.
 """
 
-from flask import Flask, Response, jsonify
+import time
+from urllib.parse import quote
 
+from flask import Flask, Response, g, jsonify, request
 
-def create_app(triangulator):
-    """Créer une application Flask exposant les endpoints de l'API de triangulation."""
+from TP.api import (
+    METRICS_CONTENT_TYPE,
+    POINTSET_ID_HEADER,
+    UPLOAD_CHUNK_SIZE,
+    PointSetUpload,
+    batch_ids,
+    delta_points,
+    encode_batch,
+    error_headers,
+    error_info,
+    upload_mode,
+    warmup_request,
+)
+from TP.pointset import parse_pointset
+from TP.wire import DEFAULT_FORMAT, NEGOTIATED_HEADERS, WireFormat, negotiate
+
+
+def _error_response(status: int, code: str, message: str):
+    """Réponse d'erreur JSON au format du schéma `Error` de l'API."""
+    return jsonify({"code": code, "message": message}), status
+
+
+def create_app(triangulator, *, stream_chunk_size: int | None = None):
+    """Créer une application Flask exposant les endpoints de l'API de triangulation.
+
+    Si ``stream_chunk_size`` est fourni, les triangles sont renvoyés en flux
+    (réponse HTTP « chunked ») par morceaux d'environ ``stream_chunk_size``
+    octets au lieu d'être encodés entièrement en mémoire avant l'envoi.
+    """
     app = Flask(__name__)
+    metrics = triangulator.metrics
+
+    def error_response(e: Exception):
+        status, code, message = error_info(e)
+        metrics.inc("triangulator_errors_total", code=code)
+        response, status = _error_response(status, code, message)
+        response.headers.update(error_headers(e))
+        return response, status
+
+    if metrics.enabled:
+        _instrument(app, metrics)
+
+    @app.get("/metrics")
+    def metrics_api():
+        """Métriques du Triangulator au format texte de Prometheus."""
+        return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
 
     @app.get("/triangulate/<point_set_id>")
     def triangulate_api(point_set_id):
+        """Triangulation d'un PointSet, au format négocié (`TP.wire.negotiate`).
+
+        Sans en-tête ``Accept`` ni ``Accept-Encoding`` reconnu, c'est le
+        format binaire par défaut (éventuellement en flux). La réponse
+        dépend de ces en-têtes, qu'elle nomme toujours dans ``Vary``.
+        """
+        try:
+            if triangulator.warmup is not None:
+                triangulator.warmup.record_request(point_set_id)
+            fmt = negotiate(
+                request.headers.get("Accept"), request.headers.get("Accept-Encoding")
+            )
+            if fmt != DEFAULT_FORMAT:
+                data = triangulator.triangulate_bytes(point_set_id, fmt)
+                return _formatted_response(data, fmt)
+            if stream_chunk_size:
+                chunks = triangulator.iter_triangulate_bytes(
+                    point_set_id, stream_chunk_size
+                )
+                response = Response(chunks, mimetype="application/octet-stream")
+            else:
+                data = triangulator.triangulate_bytes(point_set_id)
+                response = Response(data, mimetype="application/octet-stream")
+            response.vary.update(NEGOTIATED_HEADERS)
+            return response
+        except Exception as e:
+            return error_response(e)
+
+    @app.post("/pointset")
+    def pointset_api():
+        """Recevoir un PointSet binaire, l'enregistrer et retourner son identifiant.
+
+        Le corps est lu en flux (`TP.api.PointSetUpload`) puis confié à
+        `Triangulator.store_pointset` ; la réponse (201) est
+        ``{"pointSetId": ...}``. Avec ``?triangulate=1``, c'est directement
+        la triangulation du PointSet, au format négocié comme pour
+        ``GET /triangulate/<id>``, calculée sans le récupérer à nouveau ;
+        l'identifiant est alors dans l'en-tête ``PointSet-Id``. Sinon, si le
+        préchauffage est activé, le PointSet y est annoncé.
+        """
+        try:
+            triangulate = upload_mode(request.args.get("triangulate"))
+            fmt = negotiate(
+                request.headers.get("Accept"), request.headers.get("Accept-Encoding")
+            )
+            upload = PointSetUpload(request.content_length)
+            stream = request.stream
+            for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b""):
+                upload.feed(chunk)
+            data = upload.finish()
+            point_set_id = triangulator.store_pointset(data)
+            if triangulate:
+                body = triangulator.triangulate_bytes(
+                    point_set_id, fmt, pointset=parse_pointset(data, zero_copy=True)
+                )
+                response = _formatted_response(body, fmt)
+                response.headers[POINTSET_ID_HEADER] = point_set_id
+            else:
+                if triangulator.warmup is not None:
+                    triangulator.warmup.schedule([point_set_id])
+                response = jsonify({"pointSetId": point_set_id})
+        except Exception as e:
+            return error_response(e)
+        response.status_code = 201
+        response.headers["Location"] = f"/triangulate/{quote(point_set_id, safe='')}"
+        return response
+
+    @app.patch("/triangulate/<point_set_id>")
+    def triangulate_delta_api(point_set_id):
+        """Ajouter ou retirer des points de la triangulation d'un PointSet.
+
+        Corps attendu : ``{"insert": [[x, y], ...], "remove": [[x, y], ...]}``
+        (`Triangulator.apply_delta`). Les modifications se cumulent d'un appel
+        à l'autre ; la réponse est la triangulation modifiée, encodée comme
+        pour ``GET /triangulate/<id>``.
+        """
+        try:
+            insert, remove = delta_points(request.get_json(silent=True))
+            triangles = triangulator.apply_delta(point_set_id, insert, remove)
+            data = triangulator.encode_triangles(triangles)
+        except Exception as e:
+            return error_response(e)
+        return Response(data, mimetype="application/octet-stream")
+
+    @app.post("/triangulate")
+    def triangulate_batch_api():
+        """Trianguler une liste de PointSet en une seule requête.
+
+        Corps attendu : ``{"pointSetIds": ["id1", "id2", ...]}``. La réponse
+        (`TP.codec.encode_frames`) contient, dans l'ordre, un résultat par
+        identifiant avec son propre statut : les triangles encodés comme pour
+        ``GET /triangulate/<id>`` si 200, l'erreur JSON sinon.
+        """
+        try:
+            ids = batch_ids(request.get_json(silent=True))
+            results = triangulator.triangulate_batch(ids)
+        except Exception as e:
+            return error_response(e)
+        return Response(encode_batch(results), mimetype="application/octet-stream")
+
+    @app.post("/warmup")
+    def warmup_api():
+        """Annoncer des PointSet à trianguler d'avance, en arrière-plan.
+
+        Corps attendu : ``{"pointSetIds": [...], "priority": 0}``
+        (`TP.api.warmup_request`) ; la réponse (202) est ``{"queued": n}``,
+        le nombre d'identifiants mis en file.
+        """
+        try:
+            ids, priority = warmup_request(request.get_json(silent=True))
+            queued = triangulator.schedule_warmup(ids, priority)
+        except Exception as e:
+            return error_response(e)
+        return jsonify({"queued": queued}), 202
+
+    @app.get("/warmup")
+    def warmup_stats_api():
+        """État de la file de préchauffage et taux de requêtes chaudes."""
         try:
-            res = triangulator.triangulate(point_set_id)
-            data = triangulator.encode_triangles(res)
-            return Response(data, mimetype="application/octet-stream")
-        except KeyError as e:
-            msg = str(e) if str(e) else "PointSet not found"
-            return jsonify({"code": "NOT_FOUND", "message": msg}), 404
-        except ValueError as e:
-            msg = str(e) if str(e) else "Bad request"
-            return jsonify({"code": "BAD_REQUEST", "message": msg}), 400
-        except ConnectionError as e:
-            msg = str(e) if str(e) else "Service unavailable"
-            return jsonify({"code": "SERVICE_UNAVAILABLE", "message": msg}), 503
+            return jsonify(triangulator.warmup_stats())
         except Exception as e:
-            msg = str(e) if str(e) else "Internal server error"
-            return jsonify({"code": "INTERNAL_ERROR", "message": msg}), 500
+            return error_response(e)
 
     return app
+
+
+def _formatted_response(data: bytes, fmt: WireFormat) -> Response:
+    """Réponse portant une triangulation encodée dans le format ``fmt``."""
+    response = Response(data, content_type=fmt.media_type)
+    if fmt.compression:
+        response.headers["Content-Encoding"] = fmt.compression
+    response.vary.update(NEGOTIATED_HEADERS)
+    return response
+
+
+def _instrument(app: Flask, metrics) -> None:
+    """Mesurer la latence, le statut et la taille des réponses de ``app``."""
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record(response):
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.observe(
+            "triangulator_request_seconds",
+            time.perf_counter() - g.metrics_start,
+            route=route,
+        )
+        metrics.inc(
+            "triangulator_requests_total",
+            route=route,
+            method=request.method,
+            status=response.status_code,
+        )
+        if response.is_streamed:
+            response.response = _count_bytes(response.response, metrics)
+        else:
+            metrics.inc("triangulator_response_bytes_total", response.content_length)
+        return response
+
+
+def _count_bytes(chunks, metrics):
+    """Compter les octets d'une réponse en flux au fil de l'envoi."""
+    for chunk in chunks:
+        metrics.inc("triangulator_response_bytes_total", len(chunk))
+        yield chunk
@@ -0,0 +1,383 @@
+"""Variante asyncio (ASGI) de l'API de triangulation.
+
+Avec `TP.app`, chaque thread du serveur reste bloqué pendant la
+récupération du PointSet auprès du PointSetManager. Ici, une seule boucle
+d'événements sert toutes les requêtes :
+
+- la récupération est attendue sur un client non bloquant
+  (`TP.pointset_manager_client.AsyncPointSetManagerClient`) ;
+- la triangulation et l'encodage, liés au CPU, sont déportés dans un
+  exécuteur (celui de la boucle par défaut).
+
+Les routes (dont ``GET /metrics``, ``/warmup`` et ``POST /pointset``, dont
+le corps est lu au fil de sa réception), les réponses binaires (et leurs formats
+négociés, `TP.wire`), le schéma d'erreur JSON et les métriques des
+requêtes sont ceux de `TP.app`.
+L'application se sert avec n'importe quel serveur ASGI (uvicorn, hypercorn,
+...).
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures import Executor
+from functools import partial
+from urllib.parse import parse_qs, quote
+
+from TP.api import (
+    METRICS_CONTENT_TYPE,
+    POINTSET_ID_HEADER,
+    PointSetUpload,
+    batch_ids,
+    delta_points,
+    encode_batch,
+    error_body,
+    error_headers,
+    error_info,
+    upload_mode,
+    warmup_request,
+)
+from TP.pointset import parse_pointset
+from TP.wire import DEFAULT_FORMAT, NEGOTIATED_HEADERS, negotiate, transcode
+
+
+def _route(path: str) -> str:
+    """Route de `TP.app` correspondant à ``path`` (étiquette des métriques)."""
+    if path in ("/triangulate", "/pointset", "/warmup", "/metrics"):
+        return path
+    if path.startswith("/triangulate/") and "/" not in path[len("/triangulate/") :]:
+        return "/triangulate/<point_set_id>"
+    return "unmatched"
+
+
+class _Disconnected(Exception):
+    """Le client s'est déconnecté avant la fin du corps de la requête."""
+
+
+async def read_body(receive, feed) -> None:
+    """Passer les morceaux du corps de la requête à ``feed`` dès leur arrivée."""
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise _Disconnected
+        feed(message.get("body", b""))
+        more_body = message.get("more_body", False)
+
+
+async def read_all(receive) -> bytes:
+    """Corps complet de la requête."""
+    parts = []
+    await read_body(receive, parts.append)
+    return b"".join(parts)
+
+
+def create_asgi_app(triangulator, *, client=None, executor: Executor | None = None):
+    """Créer l'application ASGI exposant les endpoints de l'API de triangulation.
+
+    ``client`` est un client asynchrone du PointSetManager (méthode
+    coroutine ``get_pointset(point_set_id)``) ; sans lui, la récupération
+    et le calcul passent ensemble par `Triangulator.triangulate_bytes` dans
+    l'exécuteur. ``executor`` reçoit les calculs (``None`` : exécuteur par
+    défaut de la boucle). Le cache et le ``store`` du ``triangulator`` sont
+    utilisés dans les deux cas, et les requêtes concurrentes d'un même
+    PointSet partagent une seule récupération et un seul calcul.
+    """
+    metrics = triangulator.metrics
+
+    # calculs en cours dans la boucle, par (identifiant, format)
+    inflight: dict[tuple, asyncio.Future] = {}
+
+    async def coalesce(point_set_id: str, fmt, compute) -> bytes:
+        """Regrouper les requêtes concurrentes d'une même triangulation.
+
+        La première lance ``compute()`` (récupération puis calcul), les
+        suivantes attendent son résultat, comme avec
+        `TP.cache.ResultCache.get_or_compute` dans `TP.app`.
+        """
+        flight = (point_set_id, fmt)
+        task = inflight.get(flight)
+        if task is None:
+            task = inflight[flight] = asyncio.ensure_future(compute())
+
+            def done(_):
+                if inflight.get(flight) is task:
+                    del inflight[flight]
+
+            task.add_done_callback(done)
+        return await asyncio.shield(task)
+
+    async def triangulate_bytes(point_set_id: str) -> bytes:
+        loop = asyncio.get_running_loop()
+        if client is None:
+            return await loop.run_in_executor(
+                executor, triangulator.triangulate_bytes, point_set_id
+            )
+        key = triangulator.result_key(point_set_id)
+        if key is not None:
+            # un miss est compté par le calcul (`ResultCache.get_or_compute`)
+            data = triangulator.cache.lookup(key, wait=False)
+            if data is not None:
+                return data
+        return await coalesce(
+            point_set_id, DEFAULT_FORMAT, partial(fetch_and_compute, point_set_id)
+        )
+
+    def from_store(key: str) -> bytes | None:
+        """Résultat du ``store``, rangé dans le cache (exécuteur)."""
+        stored = triangulator.store.get_triangles_bytes(key)
+        if stored is None:
+            return None
+        return triangulator.cache.get_or_compute(key, partial(bytes, stored))
+
+    async def fetch_and_compute(point_set_id: str) -> bytes:
+        loop = asyncio.get_running_loop()
+        key = triangulator.result_key(point_set_id)
+        if key is not None and triangulator.store is not None:
+            data = await loop.run_in_executor(executor, from_store, key)
+            if data is not None:
+                return data
+        # le calcul (et son rangement dans le cache et le store) est celui
+        # de `Triangulator.triangulate_bytes`, avec le PointSet déjà récupéré
+        ps = await client.get_pointset(point_set_id)
+        return await loop.run_in_executor(
+            executor, partial(triangulator.triangulate_bytes, point_set_id, pointset=ps)
+        )
+
+    async def triangulate_as(point_set_id: str, fmt) -> bytes:
+        loop = asyncio.get_running_loop()
+        if client is None:
+            return await loop.run_in_executor(
+                executor, triangulator.triangulate_bytes, point_set_id, fmt
+            )
+        key = triangulator.result_key(point_set_id)
+        if key is not None:
+            data = triangulator.cache.lookup(fmt.cache_key(key), wait=False)
+            if data is not None:
+                return data
+        return await coalesce(
+            point_set_id, fmt, partial(fetch_and_compute_as, point_set_id, fmt)
+        )
+
+    async def fetch_and_compute_as(point_set_id: str, fmt) -> bytes:
+        loop = asyncio.get_running_loop()
+        if fmt.vertices:
+            raw = await triangulate_bytes(point_set_id)
+            encode = partial(transcode, raw, fmt)
+            key = triangulator.result_key(point_set_id)
+            if key is not None:
+                encode = partial(
+                    triangulator.cache.get_or_compute, fmt.cache_key(key), encode
+                )
+            return await loop.run_in_executor(executor, encode)
+        ps = await client.get_pointset(point_set_id)
+        return await loop.run_in_executor(
+            executor,
+            partial(triangulator.triangulate_bytes, point_set_id, fmt, pointset=ps),
+        )
+
+    async def triangulate_batch(ids: list[str]) -> list[bytes | Exception]:
+        semaphore = asyncio.Semaphore(max(triangulator.batch_workers, 1))
+
+        async def run(point_set_id):
+            async with semaphore:
+                try:
+                    return await triangulate_bytes(point_set_id)
+                except Exception as e:
+                    return e
+
+        unique = list(dict.fromkeys(ids))
+        computed = await asyncio.gather(*map(run, unique))
+        results = dict(zip(unique, computed, strict=True))
+        return [results[i] for i in ids]
+
+    def apply_delta(point_set_id: str, insert, remove, pointset) -> bytes:
+        triangles = triangulator.apply_delta(point_set_id, insert, remove, pointset)
+        return triangulator.encode_triangles(triangles)
+
+    def json_body(body: bytes):
+        try:
+            return json.loads(body)
+        except ValueError:
+            return None
+
+    async def store_pointset(data: bytearray) -> str:
+        if client is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                executor, triangulator.store_pointset, data
+            )
+        with metrics.stage("store_pointset"):
+            return await client.store_pointset_bytes(data)
+
+    async def upload(receive, headers: dict[bytes, bytes], query: str):
+        """``POST /pointset`` : corps reçu en flux (`TP.api.PointSetUpload`)."""
+        triangulate = upload_mode(parse_qs(query).get("triangulate", [None])[-1])
+        fmt = negotiate(
+            headers.get(b"accept", b"").decode("latin-1"),
+            headers.get(b"accept-encoding", b"").decode("latin-1"),
+        )
+        length = headers.get(b"content-length")
+        pointset_upload = PointSetUpload(int(length) if length is not None else None)
+        await read_body(receive, pointset_upload.feed)
+        data = pointset_upload.finish()
+        point_set_id = await store_pointset(data)
+        location = f"/triangulate/{quote(point_set_id, safe='')}"
+        location = (b"location", location.encode())
+        if not triangulate:
+            if triangulator.warmup is not None:
+                triangulator.warmup.schedule([point_set_id])
+            body = json.dumps({"pointSetId": point_set_id}).encode()
+            return 201, body, [(b"content-type", b"application/json"), location]
+
+        loop = asyncio.get_running_loop()
+        body = await loop.run_in_executor(
+            executor,
+            partial(
+                triangulator.triangulate_bytes,
+                point_set_id,
+                fmt,
+                pointset=parse_pointset(data, zero_copy=True),
+            ),
+        )
+        response_headers = format_headers(fmt)
+        response_headers.append(location)
+        response_headers.append(
+            (POINTSET_ID_HEADER.lower().encode(), point_set_id.encode())
+        )
+        return 201, body, response_headers
+
+    def format_headers(fmt) -> list[tuple[bytes, bytes]]:
+        """En-têtes d'une triangulation encodée dans le format ``fmt``."""
+        headers = [
+            (b"content-type", fmt.media_type.encode()),
+            (b"vary", ", ".join(NEGOTIATED_HEADERS).encode()),
+        ]
+        if fmt.compression:
+            headers.append((b"content-encoding", fmt.compression.encode()))
+        return headers
+
+    async def handle(
+        method: str, path: str, receive, headers: dict[bytes, bytes], query: str
+    ) -> tuple[int, bytes, list[tuple[bytes, bytes]]]:
+        """Traiter une requête : (statut, corps, en-têtes de la réponse).
+
+        Le corps de la requête n'est lu (``receive``) que par les routes qui
+        en ont un.
+        """
+        if path == "/pointset":
+            if method != "POST":
+                return 405, error_body("METHOD_NOT_ALLOWED", "use POST"), []
+            return await upload(receive, headers, query)
+        if path == "/metrics":
+            if method != "GET":
+                return 405, error_body("METHOD_NOT_ALLOWED", "use GET"), []
+            content_type = (b"content-type", METRICS_CONTENT_TYPE.encode())
+            return 200, metrics.render().encode(), [content_type]
+        if path == "/triangulate":
+            if method != "POST":
+                return 405, error_body("METHOD_NOT_ALLOWED", "use POST"), []
+            ids = batch_ids(json_body(await read_all(receive)))
+            return 200, encode_batch(await triangulate_batch(ids)), []
+        if path == "/warmup":
+            json_type = (b"content-type", b"application/json")
+            if method == "GET":
+                body = json.dumps(triangulator.warmup_stats()).encode()
+                return 200, body, [json_type]
+            if method != "POST":
+                return 405, error_body("METHOD_NOT_ALLOWED", "use GET or POST"), []
+            ids, priority = warmup_request(json_body(await read_all(receive)))
+            queued = triangulator.schedule_warmup(ids, priority)
+            return 202, json.dumps({"queued": queued}).encode(), [json_type]
+
+        point_set_id = path.removeprefix("/triangulate/")
+        if point_set_id == path or not point_set_id or "/" in point_set_id:
+            return 404, error_body("NOT_FOUND", f"no route for {path}"), []
+        if method == "PATCH":
+            insert, remove = delta_points(json_body(await read_all(receive)))
+            pointset = None
+            if client is not None and not triangulator.has_mesh(point_set_id):
+                pointset = await client.get_pointset(point_set_id)
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(
+                executor, apply_delta, point_set_id, insert, remove, pointset
+            )
+            return 200, data, []
+        if method != "GET":
+            return 405, error_body("METHOD_NOT_ALLOWED", "use GET or PATCH"), []
+        if triangulator.warmup is not None:
+            triangulator.warmup.record_request(point_set_id)
+        fmt = negotiate(
+            headers.get(b"accept", b"").decode("latin-1"),
+            headers.get(b"accept-encoding", b"").decode("latin-1"),
+        )
+        if fmt == DEFAULT_FORMAT:
+            data = await triangulate_bytes(point_set_id)
+        else:
+            data = await triangulate_as(point_set_id, fmt)
+        return 200, data, format_headers(fmt)
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        start = time.perf_counter()
+        method, path = scope["method"], scope["path"]
+        request_headers = {}
+        for name, value in scope.get("headers", ()):
+            name = name.lower()
+            if name in request_headers:
+                value = request_headers[name] + b", " + value
+            request_headers[name] = value
+        query = scope.get("query_string", b"").decode("latin-1")
+        try:
+            status, payload, headers = await handle(
+                method, path, receive, request_headers, query
+            )
+        except _Disconnected:
+            return
+        except Exception as e:
+            status, code, message = error_info(e)
+            metrics.inc("triangulator_errors_total", code=code)
+            payload = error_body(code, message)
+            headers = [
+                (name.lower().encode(), value.encode())
+                for name, value in error_headers(e).items()
+            ]
+        if status >= 400:
+            headers.insert(0, (b"content-type", b"application/json"))
+        elif not headers or headers[0][0] != b"content-type":
+            headers.insert(0, (b"content-type", b"application/octet-stream"))
+        headers.append((b"content-length", str(len(payload)).encode()))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
+        if metrics.enabled:
+            route = _route(path)
+            metrics.observe(
+                "triangulator_request_seconds",
+                time.perf_counter() - start,
+                route=route,
+            )
+            metrics.inc(
+                "triangulator_requests_total",
+                route=route,
+                method=method,
+                status=status,
+            )
+            metrics.inc("triangulator_response_bytes_total", len(payload))
+
+    return app
@@ -0,0 +1 @@
+"""Scripts de mesure de performance, lancés avec ``python -m``."""
@@ -0,0 +1,63 @@
+"""Courbes d'accélération de la triangulation parallèle par bandes.
+
+Usage : ``PYTHONPATH=. python -m TP.benchmarks.parallel [--points N]
+[--workers 1 2 4 8] [--repeat R]``
+
+Pour chaque nombre de processus, mesure le meilleur temps de
+`TP.parallel.ParallelBackend` (une bande par processus, pool démarré avant
+la mesure) et l'accélération par rapport à `TP.delaunay.delaunay_triangles`
+et à un seul processus. L'accélération est bornée par le nombre de cœurs
+disponibles, affiché en tête.
+"""
+
+import argparse
+import os
+import random
+import time
+
+from TP.delaunay import delaunay_triangles
+from TP.parallel import ParallelBackend
+
+
+def _best_time(run, repeat: int) -> float:
+    """Meilleur temps d'exécution de ``run`` sur ``repeat`` essais."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None) -> None:
+    """Mesurer et afficher les temps et accélérations."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    points = [(rng.random(), rng.random()) for _ in range(args.points)]
+    print(f"{args.points} points uniformes, {os.cpu_count()} cœur(s)")
+
+    sequential = _best_time(lambda: delaunay_triangles(points), args.repeat)
+    print(f"{'séquentiel':>12} {sequential:9.3f} s")
+
+    print(f"{'processus':>12} {'temps':>11} {'vs séq.':>8} {'vs 1':>8}")
+    single = None
+    for workers in args.workers:
+        with ParallelBackend(threshold=0, max_workers=workers) as backend:
+            # démarrage des processus hors mesure
+            backend.triangulate(points[: 3 * workers])
+            elapsed = _best_time(lambda b=backend: b.triangulate(points), args.repeat)
+        single = single or elapsed
+        print(
+            f"{workers:>12} {elapsed:9.3f} s "
+            f"{sequential / elapsed:7.2f}x {single / elapsed:7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
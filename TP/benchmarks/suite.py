@@ -0,0 +1,438 @@
+"""Suite de benchmarks du Triangulator, avec lignes de base et comparaison.
+
+Usage : ``PYTHONPATH=. python -m TP.benchmarks.suite [--sizes N ...]
+[--distributions D ...] [--cases C ...] [--no-startup] [--repeat R]
+[--save FICHIER] [--compare FICHIER] [--tolerance T]``
+
+Chaque cas (`CASES`) est mesuré pour chaque distribution de points
+(`DISTRIBUTIONS`) et chaque taille : la préparation (génération des points,
+encodage de l'entrée, démarrage du serveur HTTP) est faite hors mesure,
+suivie d'exécutions d'échauffement puis de ``repeat`` échantillons mesurés
+(moins pour les cas lents, au-delà de ``max_time`` secondes ; les cas
+rapides enchaînent plusieurs appels par échantillon). On retient la médiane,
+plus robuste au bruit qu'une mesure isolée, ainsi que le minimum et le
+maximum.
+
+Le démarrage d'un worker est mesuré à part (`STARTUP_CASES`, clés
+``startup/<cas>``) : chaque échantillon lance un interpréteur neuf et
+chronomètre l'import des modules, ou l'import suivi de la première requête
+servie.
+
+``--save`` enregistre les résultats (JSON) comme ligne de base ;
+``--compare`` les confronte à une ligne de base enregistrée et signale les
+régressions, les cas dont la médiane dépasse celle de référence de plus de
+``tolerance`` (10 % par défaut) : le code de sortie est alors 1. Les lignes
+de base ne valent que pour la machine qui les a produites.
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+from pathlib import Path
+
+from TP.models import Point, PointSet
+from TP.pointset import encode_pointset, parse_pointset
+from TP.Triangulator import Triangulator
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+QUICK_SIZES = [1_000, 10_000]
+DEFAULT_TOLERANCE = 0.10
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _uniform(n: int, rng: random.Random) -> list[Point]:
+    """Points uniformes dans le carré unité."""
+    return [(rng.random(), rng.random()) for _ in range(n)]
+
+
+def _clustered(n: int, rng: random.Random) -> list[Point]:
+    """Amas gaussiens de tailles variées (relevés autour de quelques sites)."""
+    centers = [
+        (rng.random(), rng.random(), rng.uniform(0.005, 0.05)) for _ in range(20)
+    ]
+    points = []
+    for _ in range(n):
+        cx, cy, sigma = rng.choice(centers)
+        points.append((rng.gauss(cx, sigma), rng.gauss(cy, sigma)))
+    return points
+
+
+def _grid(n: int, rng: random.Random) -> list[Point]:
+    """Grille régulière (points cocirculaires), parcourue dans le désordre."""
+    side = math.isqrt(n - 1) + 1 if n else 0
+    points = [(float(k % side), float(k // side)) for k in range(n)]
+    rng.shuffle(points)
+    return points
+
+
+def _collinear(n: int, rng: random.Random) -> list[Point]:
+    """Points en majorité alignés sur quelques droites, plus un peu de bruit."""
+    lines = [(rng.uniform(-2, 2), rng.random()) for _ in range(5)]
+    points = []
+    for k in range(n):
+        x = rng.random()
+        if k % 10:
+            a, b = rng.choice(lines)
+            points.append((x, a * x + b))
+        else:
+            points.append((x, rng.uniform(-2, 3)))
+    return points
+
+
+DISTRIBUTIONS: dict[str, Callable[[int, random.Random], list[Point]]] = {
+    "uniform": _uniform,
+    "clustered": _clustered,
+    "grid": _grid,
+    "collinear": _collinear,
+}
+
+
+class _MemoryClient:
+    """Client du PointSetManager servant des PointSet encodés en mémoire."""
+
+    def __init__(self, pointsets: dict[str, bytes]):
+        self.pointsets = pointsets
+
+    def get_pointset(self, point_set_id: str) -> PointSet:
+        return parse_pointset(self.pointsets[point_set_id], zero_copy=True)
+
+
+@contextmanager
+def _parse_case(points):
+    data = encode_pointset(points)
+    yield lambda: parse_pointset(data)
+
+
+@contextmanager
+def _encode_case(points):
+    yield lambda: encode_pointset(points)
+
+
+@contextmanager
+def _to_bytes_case(points):
+    ps = PointSet(points=points)
+    yield ps.to_bytes
+
+
+@contextmanager
+def _triangulate_case(points):
+    tri = Triangulator(client=_MemoryClient({"bench": encode_pointset(points)}))
+    yield lambda: tri.triangulate("bench")
+
+
+@contextmanager
+def _encode_triangles_case(points):
+    tri = Triangulator(client=_MemoryClient({"bench": encode_pointset(points)}))
+    result = tri.triangulate("bench")
+    yield lambda: tri.encode_triangles(result)
+
+
+@contextmanager
+def _http_case(points):
+    """Aller-retour ``GET /triangulate/<id>`` sur un vrai serveur local."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    from TP.app import create_app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args):
+            pass
+
+    tri = Triangulator(client=_MemoryClient({"bench": encode_pointset(points)}))
+    server = make_server(
+        "127.0.0.1", 0, create_app(tri), threaded=True, request_handler=QuietHandler
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_port)
+
+    def run():
+        conn.request("GET", "/triangulate/bench")
+        response = conn.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}: {body[:200]!r}")
+
+    try:
+        yield run
+    finally:
+        conn.close()
+        server.shutdown()
+        thread.join()
+
+
+CASES: dict[str, Callable] = {
+    "parse_pointset": _parse_case,
+    "encode_pointset": _encode_case,
+    "PointSet.to_bytes": _to_bytes_case,
+    "triangulate": _triangulate_case,
+    "encode_triangles": _encode_triangles_case,
+    "http_round_trip": _http_case,
+}
+
+
+# cas de démarrage : code exécuté dans un interpréteur neuf
+STARTUP_CASES: dict[str, str] = {
+    "import_core": "import TP.Triangulator",
+    "import_flask_app": "import TP.app",
+    "import_asgi_app": "import TP.asgi",
+    "first_request": """
+from TP.app import create_app
+from TP.models import PointSet
+from TP.Triangulator import Triangulator
+
+triangulator = Triangulator()
+triangulator.get_pointset = lambda pid: PointSet(points=[(0, 0), (1, 0), (0, 1)])
+response = create_app(triangulator).test_client().get("/triangulate/startup")
+assert response.status_code == 200, response.status_code
+""",
+}
+
+# chronométrage d'un cas de démarrage, depuis la fin de l'initialisation
+# de l'interpréteur
+_STARTUP_SCRIPT = """
+import time
+_start = time.perf_counter()
+exec(compile({code!r}, "<startup>", "exec"))
+print(time.perf_counter() - _start)
+"""
+
+
+def measure(
+    run: Callable[[], object],
+    *,
+    repeat: int = 5,
+    warmup: int = 1,
+    max_time: float = 10.0,
+    min_sample: float = 0.01,
+) -> dict[str, float]:
+    """Mesurer ``run`` : médiane, minimum et maximum des temps (secondes).
+
+    Après ``warmup`` exécutions non mesurées, on prend ``repeat``
+    échantillons, ou moins (au moins 3) s'ils dépassent ``max_time``
+    secondes au total. Un échantillon enchaîne assez d'appels pour durer au
+    moins ``min_sample`` secondes (comme `timeit`) ; les temps retournés
+    sont ceux d'un appel.
+    """
+    for _ in range(warmup):
+        run()
+    number = 1
+    while True:
+        sample = _sample(run, number)
+        if sample >= min_sample:
+            break
+        number *= 10
+    times = [sample / number]
+    while len(times) < repeat and (len(times) < 3 or number * sum(times) < max_time):
+        times.append(_sample(run, number) / number)
+    return {
+        "median": statistics.median(times),
+        "min": min(times),
+        "max": max(times),
+        "runs": len(times),
+        "number": number,
+    }
+
+
+def _sample(run: Callable[[], object], number: int) -> float:
+    """Durée de ``number`` appels successifs de ``run``."""
+    start = time.perf_counter()
+    for _ in range(number):
+        run()
+    return time.perf_counter() - start
+
+
+def run_suite(
+    sizes=DEFAULT_SIZES,
+    distributions=tuple(DISTRIBUTIONS),
+    cases=tuple(CASES),
+    *,
+    repeat: int = 5,
+    warmup: int = 1,
+    max_time: float = 10.0,
+    seed: int = 0,
+    log=None,
+) -> dict[str, dict[str, float]]:
+    """Mesurer chaque cas, distribution et taille ; clés ``cas/distribution/n``.
+
+    ``log`` reçoit chaque clé et sa mesure au fil de l'eau.
+    """
+    results = {}
+    for distribution in distributions:
+        for n in sizes:
+            points = DISTRIBUTIONS[distribution](n, random.Random(seed))
+            for case in cases:
+                with CASES[case](points) as run:
+                    stats = measure(
+                        run, repeat=repeat, warmup=warmup, max_time=max_time
+                    )
+                key = f"{case}/{distribution}/{n}"
+                results[key] = stats
+                if log is not None:
+                    log(key, stats)
+    return results
+
+
+def startup_time(code: str) -> float:
+    """Durée d'exécution de ``code`` dans un interpréteur neuf (secondes)."""
+    output = subprocess.run(
+        [sys.executable, "-c", _STARTUP_SCRIPT.format(code=code)],
+        capture_output=True,
+        check=True,
+        cwd=_PROJECT_ROOT,
+        env={**os.environ, "PYTHONPATH": str(_PROJECT_ROOT)},
+        text=True,
+    ).stdout
+    return float(output)
+
+
+def run_startup(
+    cases=tuple(STARTUP_CASES), *, repeat: int = 5, log=None
+) -> dict[str, dict[str, float]]:
+    """Mesurer chaque cas de démarrage ; clés ``startup/cas``.
+
+    Un interpréteur neuf par échantillon : c'est le démarrage à froid d'un
+    worker qui est mesuré, une fois les fichiers ``.pyc`` écrits par une
+    première exécution non mesurée.
+    """
+    results = {}
+    for case in cases:
+        startup_time(STARTUP_CASES[case])  # écrit les .pyc manquants
+        times = [startup_time(STARTUP_CASES[case]) for _ in range(max(repeat, 1))]
+        stats = {
+            "median": statistics.median(times),
+            "min": min(times),
+            "max": max(times),
+            "runs": len(times),
+            "number": 1,
+        }
+        key = f"startup/{case}"
+        results[key] = stats
+        if log is not None:
+            log(key, stats)
+    return results
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> list[tuple[str, float | None, float, str]]:
+    """Confronter des résultats à une ligne de base.
+
+    Retourne, pour chaque clé mesurée : la médiane de référence (``None`` si
+    absente), la médiane mesurée et un statut, ``"regression"`` (plus lent de
+    plus de ``tolerance``), ``"improvement"`` (plus rapide de plus de
+    ``tolerance``), ``"ok"`` ou ``"new"``.
+    """
+    rows = []
+    for key, stats in results.items():
+        current = stats["median"]
+        reference = baseline.get(key, {}).get("median")
+        if reference is None:
+            status = "new"
+        elif current > reference * (1 + tolerance):
+            status = "regression"
+        elif current < reference * (1 - tolerance):
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append((key, reference, current, status))
+    return rows
+
+
+def _format_time(seconds: float | None) -> str:
+    """Durée lisible (µs, ms ou s)."""
+    if seconds is None:
+        return "-"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.3f} s"
+
+
+def main(argv=None) -> int:
+    """Lancer la suite ; retourne 1 si une régression est détectée."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--quick", action="store_true", help="tailles réduites")
+    parser.add_argument(
+        "--distributions", nargs="+", choices=DISTRIBUTIONS, default=list(DISTRIBUTIONS)
+    )
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument(
+        "--startup",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="mesurer le démarrage (imports, première requête)",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--max-time", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="enregistrer les résultats (ligne de base)")
+    parser.add_argument("--compare", help="ligne de base à comparer")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    def log(key, stats):
+        runs = f"{stats['runs']} x {stats['number']}"
+        print(f"{key:<45} {_format_time(stats['median']):>12}  ({runs} runs)")
+
+    results = run_suite(
+        QUICK_SIZES if args.quick else args.sizes,
+        args.distributions,
+        args.cases,
+        repeat=args.repeat,
+        warmup=args.warmup,
+        max_time=args.max_time,
+        seed=args.seed,
+        log=log,
+    )
+    if args.startup:
+        results.update(run_startup(repeat=args.repeat, log=log))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.platform(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    rows = compare(results, baseline, args.tolerance)
+    print(f"\n{'cas':<45} {'référence':>12} {'mesure':>12} {'écart':>8}  statut")
+    for key, reference, current, status in rows:
+        change = f"{current / reference - 1:+.0%}" if reference else "-"
+        print(
+            f"{key:<45} {_format_time(reference):>12} "
+            f"{_format_time(current):>12} {change:>8}  {status}"
+        )
+    regressions = sum(status == "regression" for *_, status in rows)
+    print(f"\n{regressions} régression(s) au-delà de {args.tolerance:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
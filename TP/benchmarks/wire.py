@@ -0,0 +1,93 @@
+"""Taille et débit des formats de réponse (`TP.wire`).
+
+Usage : ``PYTHONPATH=. python -m TP.benchmarks.wire [--points N]
+[--distributions D ...] [--repeat R]``
+
+Pour chaque distribution de points de `TP.benchmarks.suite` : triangule
+les points, puis, pour chaque format (défaut, compact selon le codage des
+indices, avec ou sans sommets, compressés ou non), affiche la taille de la
+réponse (octets par triangle et rapport au format par défaut) et les temps
+médians d'encodage (depuis le résultat `Triangles`) et de décodage.
+"""
+
+import argparse
+import random
+
+from TP.benchmarks.suite import DISTRIBUTIONS, _format_time, measure
+from TP.models import PointSet
+from TP.Triangulator import Triangulator
+from TP.wire import (
+    COMPRESSIONS,
+    INDEX_CODINGS,
+    WireFormat,
+    decode_compact,
+    decompress,
+    encode_as,
+)
+
+
+def _formats() -> list[WireFormat]:
+    """Formats comparés, du format par défaut au plus compact."""
+    formats = [WireFormat(), *(WireFormat(compression=c) for c in COMPRESSIONS)]
+    for vertices in (True, False):
+        for indices in INDEX_CODINGS:
+            formats.append(WireFormat(True, indices, vertices))
+        formats.append(WireFormat(True, "varint", vertices, "gzip"))
+    return formats
+
+
+def _name(fmt: WireFormat) -> str:
+    """Nom court d'un format pour le tableau."""
+    if not fmt.compact:
+        name = "défaut"
+    else:
+        name = f"compact {fmt.indices}" + ("" if fmt.vertices else " sans sommets")
+    return name + (f" + {fmt.compression}" if fmt.compression else "")
+
+
+def _decode(data: bytes, fmt: WireFormat):
+    """Décoder une réponse comme le ferait un client."""
+    data = decompress(data, fmt.compression)
+    return decode_compact(data) if fmt.compact else data
+
+
+def main(argv=None) -> None:
+    """Mesurer et afficher tailles et débits par format."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument(
+        "--distributions", nargs="+", choices=DISTRIBUTIONS, default=list(DISTRIBUTIONS)
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for distribution in args.distributions:
+        points = DISTRIBUTIONS[distribution](args.points, random.Random(args.seed))
+        triangulator = Triangulator()
+        triangulator.get_pointset = lambda pid, p=points: PointSet(points=p)
+        result = triangulator.triangulate(distribution)
+        n_triangles = max(len(result.triangles), 1)
+        print(f"\n{distribution} : {args.points} points, {n_triangles} triangles")
+        print(
+            f"{'format':<34} {'octets':>10} {'o/tri':>7} {'ratio':>6} "
+            f"{'encodage':>12} {'décodage':>12}"
+        )
+        reference = None
+        for fmt in _formats():
+            data = encode_as(result, fmt)
+            reference = reference or len(data)
+            encode = measure(
+                lambda r=result, f=fmt: encode_as(r, f), repeat=args.repeat
+            )
+            decode = measure(lambda d=data, f=fmt: _decode(d, f), repeat=args.repeat)
+            print(
+                f"{_name(fmt):<34} {len(data):>10} {len(data) / n_triangles:7.2f} "
+                f"{len(data) / reference:6.2f} "
+                f"{_format_time(encode['median']):>12} "
+                f"{_format_time(decode['median']):>12}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""Cache en mémoire des triangulations encodées.
+
+Les PointSet étant immuables, le résultat encodé d'une triangulation peut
+être réutilisé tel quel pour toutes les requêtes suivantes sur le même
+identifiant. Le cache est borné en octets (éviction LRU) et regroupe les
+calculs concurrents d'une même clé : une seule requête calcule, les autres
+attendent son résultat.
+
+Des PointSet identiques enregistrés sous des identifiants différents peuvent
+aussi partager un même résultat : `content_key` en tire une clé de leur
+contenu, et `SharedResults` relie chaque identifiant à cette clé, en
+comptant les références pour savoir quand un résultat n'est plus utilisé.
+"""
+
+import hashlib
+import struct
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future
+
+from TP.codec import point_block
+
+# nombre maximal d'identifiants suivis par `SharedResults`
+DEFAULT_MAX_IDS = 1_000_000
+
+
+class ResultCache:
+    """Cache LRU de résultats binaires, borné par leur taille totale en octets.
+
+    Avec ``max_bytes=0`` rien n'est conservé, mais les calculs concurrents
+    d'une même clé restent regroupés. Toutes les méthodes sont thread-safe.
+    """
+
+    def __init__(self, max_bytes: int = 0):
+        """Créer un cache vide pouvant contenir ``max_bytes`` octets."""
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be >= 0")
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._pending: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Nombre de résultats en cache."""
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        """Indiquer si ``key`` est en cache (sans compter de hit ni de miss)."""
+        return key in self._entries
+
+    def get(self, key: str) -> bytes | None:
+        """Retourner le résultat associé à ``key``, ou ``None`` s'il est absent."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def lookup(self, key: str, *, wait: bool = True) -> bytes | None:
+        """Résultat de ``key`` s'il est en cache ou en cours de calcul, sinon ``None``.
+
+        Un calcul en cours (`get_or_compute`) est attendu, et compté comme
+        un miss, comme il le serait par `get_or_compute`. Une absence n'est
+        pas comptée : l'appelant calcule alors le résultat sans le mettre en
+        cache (p.ex. `TP.Triangulator.Triangulator.iter_triangulate_bytes`),
+        ou le demande à `get_or_compute`, qui compte le miss. Avec
+        ``wait=False`` (code asynchrone, qui ne doit pas bloquer), un calcul
+        en cours compte comme une absence.
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            future = self._pending.get(key)
+            if future is None or not wait:
+                return None
+            self.misses += 1
+        return future.result()
+
+    def put(self, key: str, data: bytes) -> None:
+        """Enregistrer ``data`` pour ``key``, en évinçant les entrées les plus vieilles.
+
+        Un résultat plus gros que tout le budget n'est pas conservé.
+        """
+        with self._lock:
+            self._store(key, data)
+
+    def get_or_compute(self, key: str, compute: Callable[[], bytes]) -> bytes:
+        """Retourner le résultat de ``key``, en le calculant au besoin.
+
+        Si un autre thread calcule déjà ``key``, on attend son résultat (ou
+        son exception) au lieu de relancer le calcul. Les erreurs ne sont
+        pas mises en cache.
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = self._pending[key] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            data = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._pending[key]
+            self._store(key, data)
+        future.set_result(data)
+        return data
+
+    def invalidate(self, key: str | None = None) -> None:
+        """Retirer ``key`` du cache, ou tout le cache si ``key`` vaut ``None``."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self.size = 0
+                return
+            data = self._entries.pop(key, None)
+            if data is not None:
+                self.size -= len(data)
+
+    def stats(self) -> dict[str, int]:
+        """Compteurs du cache (entrées, octets, hits, misses, évictions)."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _store(self, key: str, data: bytes) -> None:
+        """Insérer ``data`` (verrou déjà pris) en respectant le budget."""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        if len(data) > self.max_bytes:
+            return
+        self._entries[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+
+def content_key(points: Iterable) -> str:
+    """Clé du contenu d'un PointSet : empreinte BLAKE2b de son encodage binaire.
+
+    Deux PointSet ont la même clé si et seulement si leur encodage (en
+    float32) est identique, à une collision de 128 bits près.
+    """
+    count, coords = point_block(points)
+    digest = hashlib.blake2b(struct.pack("<I", count), digest_size=16)
+    digest.update(coords)
+    return "blake2b:" + digest.hexdigest()
+
+
+class SharedResults:
+    """Identifiants de PointSet reliés aux clés de contenu de leurs résultats.
+
+    Chaque clé compte les identifiants qui y sont reliés ; quand le dernier
+    est délié (`unlink`, ou éviction du moins récemment relié au-delà de
+    ``max_ids``), la clé est retournée à l'appelant, qui peut oublier le
+    résultat. Les compteurs mesurent le partage : liens vers une clé déjà
+    utilisée (``shared``) et temps de calcul ainsi évité (``saved_seconds``,
+    d'après la durée du calcul enregistrée par `computed`). Toutes les
+    méthodes sont thread-safe.
+    """
+
+    def __init__(self, max_ids: int = DEFAULT_MAX_IDS):
+        """Créer une table vide suivant au plus ``max_ids`` identifiants."""
+        self.max_ids = max_ids
+        self.links = 0
+        self.shared = 0
+        self.saved_seconds = 0.0
+        self._keys: OrderedDict[str, str] = OrderedDict()
+        self._refs: dict[str, int] = {}
+        self._costs: dict[str, float] = {}
+        # liens partagés dont le coût n'est pas encore connu, par clé
+        self._waiting: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def key(self, point_set_id: str) -> str | None:
+        """Clé de contenu reliée à ``point_set_id``, ou ``None``."""
+        with self._lock:
+            return self._keys.get(point_set_id)
+
+    def link(self, point_set_id: str, key: str) -> list[str]:
+        """Relier ``point_set_id`` à ``key`` ; retourne les clés devenues orphelines."""
+        with self._lock:
+            orphans = []
+            old = self._keys.get(point_set_id)
+            if old == key:
+                self._keys.move_to_end(point_set_id)
+                return orphans
+            if old is not None:
+                orphans += self._release(point_set_id)
+            self._keys[point_set_id] = key
+            self.links += 1
+            refs = self._refs.get(key, 0)
+            self._refs[key] = refs + 1
+            if refs:
+                self.shared += 1
+                if key in self._costs:
+                    self.saved_seconds += self._costs[key]
+                else:
+                    self._waiting[key] = self._waiting.get(key, 0) + 1
+            while len(self._keys) > self.max_ids:
+                orphans += self._release(next(iter(self._keys)))
+            return orphans
+
+    def unlink(self, point_set_id: str) -> list[str]:
+        """Délier ``point_set_id`` ; retourne les clés devenues orphelines."""
+        with self._lock:
+            if point_set_id not in self._keys:
+                return []
+            return self._release(point_set_id)
+
+    def computed(self, key: str, seconds: float) -> None:
+        """Enregistrer la durée du calcul du résultat de ``key``."""
+        with self._lock:
+            if key not in self._refs:
+                return
+            self._costs[key] = seconds
+            self.saved_seconds += seconds * self._waiting.pop(key, 0)
+
+    def clear(self) -> None:
+        """Tout délier (les compteurs sont conservés)."""
+        with self._lock:
+            self._keys.clear()
+            self._refs.clear()
+            self._costs.clear()
+            self._waiting.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """Compteurs du partage des résultats.
+
+        ``ids`` et ``contents`` : identifiants reliés et clés distinctes ;
+        ``links`` et ``shared`` : liens établis et liens vers une clé déjà
+        utilisée (``dedup_ratio`` : leur rapport) ; ``saved_seconds`` :
+        temps de calcul évité.
+        """
+        with self._lock:
+            return {
+                "ids": len(self._keys),
+                "contents": len(self._refs),
+                "links": self.links,
+                "shared": self.shared,
+                "dedup_ratio": self.shared / self.links if self.links else 0.0,
+                "saved_seconds": self.saved_seconds,
+            }
+
+    def _release(self, point_set_id: str) -> list[str]:
+        """Délier ``point_set_id`` (verrou pris) ; sa clé si elle devient orpheline."""
+        key = self._keys.pop(point_set_id)
+        refs = self._refs[key] - 1
+        if refs:
+            self._refs[key] = refs
+            return []
+        del self._refs[key]
+        self._costs.pop(key, None)
+        self._waiting.pop(key, None)
+        return [key]
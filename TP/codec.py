@@ -0,0 +1,308 @@
+"""Représentation binaire à plat des points et des triangles.
+
+Ce module regroupe la couche d'encodage commune à `TP.models`, `TP.pointset`
+et `TP.Triangulator` :
+
+- les vues compactes `PointArray` et `TriangleArray`, séquences de tuples
+  lues dans un tampon à plat (float32 pour les coordonnées, entiers non
+  signés 32 bits pour les indices) ;
+- les encodeurs `encode_points` et `encode_triangles`, qui remplissent ces
+  tampons en une seule passe puis assemblent la sortie en une seule copie,
+  au lieu de concaténer des ``bytes`` coordonnée par coordonnée ;
+- `iter_encoded_triangles`, qui produit le même format par morceaux de
+  taille fixe pour les réponses HTTP en flux ;
+- `encode_frames` / `decode_frames`, l'enveloppe des réponses groupées
+  (plusieurs résultats, chacun avec son statut, dans un seul corps).
+
+Les entrées peuvent être des listes de tuples, des vues compactes ou de
+simples itérables (générateurs), qui ne sont parcourus qu'une fois.
+"""
+
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import chain, islice
+
+# code de type `array` des indices de sommets : entiers non signés 32 bits
+INDEX_TYPECODE = "I" if array("I").itemsize == 4 else "L"
+
+# taille par défaut (en octets) des morceaux produits par iter_encoded_triangles
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_HEADER = struct.Struct("<I")
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+class _FlatArray(Sequence):
+    """Séquence de tuples de largeur fixe lue dans un tampon à plat.
+
+    Les tuples ne sont créés qu'à l'accès ; la comparaison avec une liste de
+    tuples se fait élément par élément, comme pour une liste.
+    """
+
+    __slots__ = ("_buf",)
+    _width = 1
+
+    def __len__(self) -> int:
+        """Nombre d'éléments."""
+        return len(self._buf) // self._width
+
+    def __getitem__(self, index):
+        """Élément d'indice ``index`` (ou liste d'éléments pour une tranche)."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError(f"{type(self).__name__} index out of range")
+        w = self._width
+        return tuple(self._buf[w * index : w * index + w])
+
+    def __iter__(self) -> Iterator[tuple]:
+        """Itérer sans matérialiser la liste."""
+        it = iter(self._buf)
+        return zip(*([it] * self._width), strict=True)
+
+    def __eq__(self, other) -> bool:
+        """Comparer élément par élément avec une autre séquence de tuples."""
+        if isinstance(other, type(self)):
+            return self._buf == other._buf
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            a == tuple(b) for a, b in zip(self, other, strict=False)
+        )
+
+    __hash__ = None
+
+    def tobytes(self) -> bytes:
+        """Octets du tampon, dans l'ordre natif de la machine."""
+        return self._buf.tobytes()
+
+    def __repr__(self) -> str:
+        """Représentation abrégée (nombre d'éléments)."""
+        return f"{type(self).__name__}(<{len(self)} items>)"
+
+
+class PointArray(_FlatArray):
+    """Vue paresseuse, en liste de points (x, y), d'un tampon float32 à plat.
+
+    Le tampon ``coords`` (``memoryview`` au format ``"f"`` ou ``array("f")``)
+    contient les coordonnées entrelacées ``x0, y0, x1, y1, ...`` : aucune
+    copie n'est faite à la construction, les tuples ne sont créés qu'à
+    l'accès. Se compare à une liste de tuples comme le ferait une liste.
+    """
+
+    __slots__ = ()
+    _width = 2
+
+    def __init__(self, coords):
+        """Envelopper le tampon de coordonnées ``coords``."""
+        self._buf = coords
+
+    @classmethod
+    def from_points(cls, points) -> "PointArray":
+        """Copier des points (x, y) dans un nouveau tampon ``array("f")``."""
+        return cls(float32_array(points))
+
+    @property
+    def coords(self):
+        """Tampon des coordonnées entrelacées."""
+        return self._buf
+
+
+class TriangleArray(_FlatArray):
+    """Vue paresseuse, en liste de triplets d'indices, d'un tampon d'entiers.
+
+    Le tampon ``indices`` (``array`` de code `INDEX_TYPECODE` ou
+    ``memoryview`` équivalente) contient ``a0, b0, c0, a1, b1, c1, ...``.
+    """
+
+    __slots__ = ()
+    _width = 3
+
+    def __init__(self, indices):
+        """Envelopper le tampon d'indices ``indices``."""
+        self._buf = indices
+
+    @classmethod
+    def from_triangles(cls, triangles) -> "TriangleArray":
+        """Copier des triangles dans un nouveau tampon d'entiers 32 bits."""
+        return cls(index_array(triangles))
+
+    @property
+    def indices(self):
+        """Tampon des indices de sommets à plat."""
+        return self._buf
+
+
+def float32_array(points: Iterable) -> array:
+    """Copier des points (x, y) dans un tampon ``array("f")`` à plat, en une passe.
+
+    ``points`` peut être une vue `PointArray` (copie directe du tampon) ou
+    n'importe quel itérable de couples, y compris un générateur.
+    """
+    if isinstance(points, PointArray):
+        return array("f", points.coords)
+    buf = array("f")
+    buf.extend(chain.from_iterable(points))
+    if isinstance(points, Sequence) and len(buf) != 2 * len(points):
+        raise ValueError("each point must have exactly 2 coordinates")
+    return buf
+
+
+def index_array(triangles: Iterable) -> array:
+    """Copier des triangles dans un tampon d'entiers 32 bits à plat, en une passe."""
+    if isinstance(triangles, TriangleArray):
+        return array(INDEX_TYPECODE, triangles.indices)
+    buf = array(INDEX_TYPECODE)
+    buf.extend(chain.from_iterable(triangles))
+    if isinstance(triangles, Sequence) and len(buf) != 3 * len(triangles):
+        raise ValueError("each triangle must have exactly 3 vertex indices")
+    return buf
+
+
+def float32_view(payload) -> memoryview | array:
+    """Voir un tampon de float32 little-endian comme une séquence de flottants.
+
+    Sur une machine little-endian, c'est une simple vue sans copie ; sinon le
+    tampon est copié puis remis dans l'ordre natif.
+    """
+    if _LITTLE_ENDIAN:
+        return memoryview(payload).cast("B").cast("f")
+    coords = array("f", bytes(payload))
+    coords.byteswap()
+    return coords
+
+
+def _little_endian(items, flat: type, make) -> memoryview | array:
+    """Tampon little-endian des éléments, sans copie quand c'est possible."""
+    if _LITTLE_ENDIAN and isinstance(items, flat):
+        return items._buf
+    buf = make(items)
+    if not _LITTLE_ENDIAN:
+        buf.byteswap()
+    return buf
+
+
+def point_block(points: Iterable) -> tuple[int, memoryview | array]:
+    """Nombre de points et tampon little-endian de leurs coordonnées."""
+    buf = _little_endian(points, PointArray, float32_array)
+    return len(buf) // 2, buf
+
+
+def triangle_block(triangles: Iterable) -> tuple[int, memoryview | array]:
+    """Nombre de triangles et tampon little-endian de leurs indices."""
+    buf = _little_endian(triangles, TriangleArray, index_array)
+    return len(buf) // 3, buf
+
+
+def encode_points(points: Iterable) -> bytes:
+    """Encoder des points au format binaire PointSet.
+
+    Format :
+    - 4 octets little-endian (entier non signé) : nombre de points
+    - pour chaque point : 4 octets float x, 4 octets float y (little-endian)
+    """
+    count, coords = point_block(points)
+    return b"".join((_HEADER.pack(count), coords))
+
+
+def encode_triangles(vertices: Iterable, triangles: Iterable) -> bytes:
+    """Encoder des sommets et des triangles au format binaire Triangles.
+
+    Format : les sommets au format PointSet (voir `encode_points`), puis
+    4 octets little-endian (entier non signé) pour le nombre de triangles et,
+    pour chaque triangle, 3 × 4 octets little-endian d'indices de sommets.
+    """
+    n_vertices, coords = point_block(vertices)
+    n_triangles, indices = triangle_block(triangles)
+    return b"".join(
+        (_HEADER.pack(n_vertices), coords, _HEADER.pack(n_triangles), indices)
+    )
+
+
+def _iter_block(items, flat: type, typecode: str, width: int, chunk_size: int):
+    """Produire le tampon little-endian de ``items`` par morceaux.
+
+    Chaque morceau fait environ ``chunk_size`` octets ; le bloc complet n'est
+    jamais construit en mémoire.
+    """
+    per_chunk = max(chunk_size // (4 * width), 1)
+
+    if _LITTLE_ENDIAN and isinstance(items, flat):
+        raw = memoryview(items._buf).cast("B")
+        step = per_chunk * 4 * width
+        for offset in range(0, len(raw), step):
+            yield bytes(raw[offset : offset + step])
+        return
+
+    it = iter(items)
+    while True:
+        group = list(islice(it, per_chunk))
+        if not group:
+            return
+        buf = array(typecode)
+        buf.extend(chain.from_iterable(group))
+        if len(buf) != width * len(group):
+            raise ValueError(f"each item must have exactly {width} values")
+        if not _LITTLE_ENDIAN:
+            buf.byteswap()
+        yield buf.tobytes()
+
+
+def iter_encoded_triangles(
+    vertices: Sequence, triangles: Sequence, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Produire l'encodage de `encode_triangles` par morceaux de taille fixe.
+
+    Les nombres de sommets et de triangles (en-têtes) sont connus d'avance ;
+    les blocs de sommets puis de triangles sont ensuite emballés au fil de
+    l'eau, par groupes d'environ ``chunk_size`` octets, de sorte que la
+    mémoire utilisée reste bornée quelle que soit la taille du résultat.
+    """
+    yield _HEADER.pack(len(vertices))
+    yield from _iter_block(vertices, PointArray, "f", 2, chunk_size)
+    yield _HEADER.pack(len(triangles))
+    yield from _iter_block(triangles, TriangleArray, INDEX_TYPECODE, 3, chunk_size)
+
+
+def encode_frames(frames: Iterable[tuple[int, bytes]]) -> bytes:
+    """Assembler plusieurs résultats (statut, contenu) dans un seul corps binaire.
+
+    Format :
+    - 4 octets little-endian (entier non signé) : nombre de résultats
+    - pour chaque résultat, dans l'ordre : 4 octets de statut (code HTTP),
+      4 octets de longueur L, puis les L octets du contenu (triangles au
+      format de `encode_triangles` si le statut vaut 200, erreur JSON sinon)
+    """
+    parts = [b""]
+    count = 0
+    for status, payload in frames:
+        parts.append(struct.pack("<II", status, len(payload)))
+        parts.append(payload)
+        count += 1
+    parts[0] = _HEADER.pack(count)
+    return b"".join(parts)
+
+
+def decode_frames(data: bytes) -> list[tuple[int, bytes]]:
+    """Décoder un corps produit par `encode_frames` en liste (statut, contenu)."""
+    view = memoryview(data)
+    if len(view) < 4:
+        raise ValueError("frames payload shorter than its 4-byte header")
+    (count,) = _HEADER.unpack_from(view, 0)
+    frames = []
+    offset = 4
+    for _ in range(count):
+        if len(view) < offset + 8:
+            raise ValueError("truncated frame header")
+        status, length = struct.unpack_from("<II", view, offset)
+        offset += 8
+        if len(view) < offset + length:
+            raise ValueError("truncated frame payload")
+        frames.append((status, bytes(view[offset : offset + length])))
+        offset += length
+    return frames
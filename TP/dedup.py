@@ -0,0 +1,252 @@
+"""Nettoyage et dédoublonnage des points avant triangulation.
+
+Les points quasi confondus (p.ex. après un aller-retour en float32) créent
+des triangles écrasés ; `dedup_points` les fusionne en les arrondissant sur
+une grille de pas ``epsilon`` (table de hachage des cellules), et retourne
+la correspondance indice d'origine -> indice nettoyé.
+
+Le travail se fait par passes sur des colonnes entières, à la vitesse du C
+(``map``, ``zip``, ``dict.fromkeys``), sans boucle Python par point :
+
+- pour un PointSet compact (`PointArray`, tel que décodé par le client du
+  PointSetManager), chaque point est haché comme un seul entier de 64 bits
+  (ses 8 octets), après remplacement des -0.0 par 0.0 ; en l'absence de
+  doublon, le tampon est réutilisé tel quel ;
+- une liste de couples de flottants est hachée telle quelle, les autres
+  séquences sont d'abord converties ; seules celles qui contiennent des
+  valeurs invalides passent par une vérification point par point ;
+- la correspondance des indices n'est calculée qu'au premier accès
+  (`IndexMap`) : seules les réponses qui la transmettent en ont besoin.
+"""
+
+import math
+import struct
+from array import array
+from collections.abc import Hashable, Sequence
+from itertools import chain, count
+from operator import itemgetter
+
+from TP.codec import PointArray
+from TP.models import Point
+
+# indice donné dans la correspondance aux points invalides (écartés)
+DROPPED = -1
+
+# motif binaire float32 de -0.0, égal à 0.0 mais de motif différent
+_NEGATIVE_ZERO = struct.pack("f", -0.0)
+
+_first = itemgetter(0)
+_second = itemgetter(1)
+
+
+class IndexMap(Sequence):
+    """Correspondance indice d'origine -> indice nettoyé, calculée à la demande.
+
+    ``keys`` donne la clé de chaque point d'origine ; un point reçoit le
+    rang de première apparition de sa clé. La liste n'est construite qu'au
+    premier accès.
+    """
+
+    __slots__ = ("_keys", "_map")
+
+    def __init__(self, keys: list[Hashable]):
+        """Préparer la correspondance des points de clés ``keys``."""
+        self._keys = keys
+        self._map: list[int] | None = None
+
+    def _mapping(self) -> list[int]:
+        """Construire la liste au premier appel."""
+        if self._map is None:
+            keys = self._keys
+            rank = dict(zip(dict.fromkeys(keys), count()))
+            self._map = list(map(rank.__getitem__, keys))
+            self._keys = None
+        return self._map
+
+    def __len__(self) -> int:
+        """Nombre de points d'origine."""
+        return len(self._mapping())
+
+    def __getitem__(self, i):
+        """Indice nettoyé du i-ème point d'origine."""
+        return self._mapping()[i]
+
+    def __iter__(self):
+        """Parcourir les indices nettoyés, dans l'ordre des points d'origine."""
+        return iter(self._mapping())
+
+    def __reversed__(self):
+        """Parcourir les indices nettoyés du dernier point au premier."""
+        return reversed(self._mapping())
+
+    def __eq__(self, other) -> bool:
+        """Se comparer à une séquence d'entiers, élément par élément."""
+        if isinstance(other, Sequence):
+            return self._mapping() == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+
+def dedup_points(
+    points: Sequence, epsilon: float = 0.0
+) -> tuple[Sequence[Point], Sequence[int]]:
+    """Écarter les points invalides et fusionner les doublons.
+
+    Avec ``epsilon=0``, seuls les doublons exacts sont fusionnés. Sinon,
+    deux points sont fusionnés s'ils s'arrondissent au même nœud de la
+    grille de pas ``epsilon`` (ils sont alors à moins de ``epsilon`` l'un de
+    l'autre sur chaque axe) ; le premier point rencontré représente le
+    groupe. Les points dont une coordonnée n'est pas un nombre fini sont
+    écartés.
+
+    Retourne les points nettoyés (dans l'ordre de première apparition) et,
+    pour chaque point d'origine, son indice parmi les points nettoyés
+    (`DROPPED` s'il a été écarté).
+    """
+    if epsilon < 0:
+        raise ValueError("epsilon must be >= 0")
+
+    if isinstance(points, PointArray):
+        result = _dedup_float32(points, epsilon)
+    else:
+        result = _dedup_sequence(points, epsilon)
+    if result is not None:
+        return result
+
+    inv = 1.0 / epsilon if epsilon else 0.0
+    isfinite = math.isfinite
+    index: dict[tuple, int] = {}
+    cleaned: list[Point] = []
+    index_map: list[int] = []
+    append = index_map.append
+    for p in points:
+        try:
+            x, y = float(p[0]), float(p[1])
+        except Exception:
+            append(DROPPED)
+            continue
+        if not (isfinite(x) and isfinite(y)):
+            append(DROPPED)
+            continue
+        key = (round(x * inv), round(y * inv)) if epsilon else (x, y)
+        j = index.setdefault(key, len(cleaned))
+        if j == len(cleaned):
+            cleaned.append((x, y))
+        append(j)
+    return cleaned, index_map
+
+
+def _find_negative_zeros(coords: memoryview) -> list[int]:
+    """Indices des coordonnées valant -0.0 dans un tampon float32.
+
+    Recherche d'octets (``bytes.find``), en écartant les occurrences du
+    motif à cheval sur deux coordonnées.
+    """
+    data = coords.tobytes()
+    found = []
+    i = data.find(_NEGATIVE_ZERO)
+    while i != -1:
+        if i % 4:
+            i = data.find(_NEGATIVE_ZERO, i + 1)
+        else:
+            found.append(i // 4)
+            i = data.find(_NEGATIVE_ZERO, i + 4)
+    return found
+
+
+def _grid_keys(xs, ys, epsilon: float) -> list[tuple[int, int]]:
+    """Nœud de la grille de pas ``epsilon`` le plus proche de chaque point."""
+    inv = 1.0 / epsilon
+    return list(
+        zip(
+            map(round, map(inv.__mul__, xs)),
+            map(round, map(inv.__mul__, ys)),
+            strict=True,
+        )
+    )
+
+
+def _first_of_each(keys: list) -> list[int]:
+    """Indice du premier point de chaque clé, par ordre de première apparition."""
+    last_to_first = zip(reversed(keys), range(len(keys) - 1, -1, -1), strict=True)
+    first = dict(last_to_first)
+    return list(map(first.__getitem__, dict.fromkeys(keys)))
+
+
+def _dedup_sequence(
+    points: Sequence, epsilon: float
+) -> tuple[list[Point], Sequence[int]] | None:
+    """Dédoublonner une séquence de points, ou ``None`` s'il faut le chemin général.
+
+    Une liste de couples de flottants (le cas courant) est hachée telle
+    quelle ; les autres points sont d'abord convertis en couples de
+    flottants. Le chemin général (point par point) ne sert qu'aux entrées
+    dont une valeur n'est pas convertible en nombre fini.
+    """
+    flat = chain.from_iterable
+    try:
+        if (
+            set(map(type, points)) == {tuple}
+            and set(map(len, points)) == {2}
+            and set(map(type, flat(points))) == {float}
+        ):
+            cleaned = list(points)
+        else:
+            xs = map(float, map(_first, points))
+            ys = map(float, map(_second, points))
+            cleaned = list(zip(xs, ys, strict=True))
+    except Exception:
+        return None
+    # une valeur non finie (ou une somme qui déborde) : chemin général
+    if not math.isfinite(sum(flat(cleaned))):
+        return None
+
+    if epsilon:
+        keys = _grid_keys(map(_first, cleaned), map(_second, cleaned), epsilon)
+        if len(set(keys)) == len(keys):
+            return cleaned, range(len(keys))
+        return list(map(cleaned.__getitem__, _first_of_each(keys))), IndexMap(keys)
+
+    # 0.0 et -0.0 sont la même clé : le premier rencontré est conservé
+    unique = dict.fromkeys(cleaned)
+    if len(unique) == len(cleaned):
+        return cleaned, range(len(cleaned))
+    return list(unique), IndexMap(cleaned)
+
+
+def _dedup_float32(
+    points: PointArray, epsilon: float
+) -> tuple[PointArray, Sequence[int]] | None:
+    """Dédoublonner un tampon float32, ou ``None`` s'il faut le chemin général.
+
+    Les doublons exacts sont détectés sur les motifs binaires des points,
+    une fois les -0.0 remplacés par 0.0 ; les valeurs non finies sont
+    laissées au chemin général.
+    """
+    coords = memoryview(points.coords)
+    # des float32 ne peuvent déborder en s'additionnant en double : la somme
+    # n'est infinie ou NaN que si une coordonnée l'est
+    if not math.isfinite(sum(coords)):
+        return None
+    negative_zeros = _find_negative_zeros(coords)
+    if negative_zeros:
+        fixed = array("f")
+        fixed.frombytes(coords.cast("B"))
+        for i in negative_zeros:
+            fixed[i] = 0.0
+        coords = memoryview(fixed)
+        points = PointArray(fixed)
+
+    words = coords.cast("B").cast("Q").tolist()
+    if epsilon:
+        keys = _grid_keys(coords[0::2], coords[1::2], epsilon)
+        if len(set(keys)) == len(keys):
+            return points, range(len(keys))
+        unique = array("Q", map(words.__getitem__, _first_of_each(keys)))
+    else:
+        keys = words
+        unique = array("Q", dict.fromkeys(words))
+        if len(unique) == len(words):
+            return points, range(len(words))
+    return PointArray(memoryview(unique).cast("B").cast("f")), IndexMap(keys)
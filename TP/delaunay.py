@@ -0,0 +1,587 @@
+"""Moteur de triangulation de Delaunay en O(n log n).
+
+Implémente l'algorithme « sweep-hull » (balayage radial autour d'un triangle
+germe, cf. Sinclair 2010 / delaunator) :
+
+1. on choisit un triangle germe proche du centre de la boîte englobante ;
+2. on trie les autres points par distance au centre du cercle circonscrit
+   du germe (tri en O(n log n)) ;
+3. on insère les points un à un à l'extérieur de l'enveloppe convexe courante,
+   l'arête visible étant retrouvée via une table de hachage angulaire, puis on
+   restaure la propriété de Delaunay par basculement d'arêtes (légalisation) ;
+   sur des points presque alignés, un point peut tomber dans l'enveloppe
+   courante : il est alors inséré dans le triangle (ou sur l'arête) qui le
+   contient.
+
+La structure produite est un maillage à demi-arêtes : le triangle ``t`` est
+formé des sommets ``triangles[3t]``, ``triangles[3t + 1]``, ``triangles[3t + 2]``
+(sens trigonométrique) et ``halfedges[e]`` donne la demi-arête opposée à ``e``
+(ou ``-1`` sur l'enveloppe convexe).
+"""
+
+import math
+from collections.abc import Sequence
+
+from TP.codec import PointArray
+from TP.models import Point, Triangle
+from TP.predicates import INCIRCLE_ERROR_BOUND, _incircle_exact, orient2d
+
+EPSILON = 2.0**-52
+
+# Profondeur maximale de la pile de légalisation ; ne peut être atteinte que
+# sur des entrées extrêmement dégénérées.
+_EDGE_STACK_SIZE = 512
+
+
+def _circumradius2(ax, ay, bx, by, cx, cy) -> float:
+    """Carré du rayon du cercle circonscrit (``inf`` si les points sont alignés)."""
+    dx = bx - ax
+    dy = by - ay
+    ex = cx - ax
+    ey = cy - ay
+    den = dx * ey - dy * ex
+    if den == 0:
+        return math.inf
+    bl = dx * dx + dy * dy
+    cl = ex * ex + ey * ey
+    d = 0.5 / den
+    x = (ey * bl - dy * cl) * d
+    y = (dx * cl - ex * bl) * d
+    return x * x + y * y
+
+
+def _circumcenter(ax, ay, bx, by, cx, cy) -> Point:
+    """Centre du cercle circonscrit au triangle abc (supposé non dégénéré)."""
+    dx = bx - ax
+    dy = by - ay
+    ex = cx - ax
+    ey = cy - ay
+    bl = dx * dx + dy * dy
+    cl = ex * ex + ey * ey
+    d = 0.5 / (dx * ey - dy * ex)
+    return ax + (ey * bl - dy * cl) * d, ay + (dx * cl - ex * bl) * d
+
+
+def _pseudo_angle(dx, dy) -> float:
+    """Angle monotone dans [0, 1] (croissant dans le sens trigonométrique)."""
+    p = dx / (abs(dx) + abs(dy))
+    return (3 - p if dy > 0 else 1 + p) / 4
+
+
+class Delaunay:
+    """Triangulation de Delaunay d'un ensemble de points 2D.
+
+    Les points doivent être deux à deux distincts (le Triangulator les
+    dédoublonne en amont) ; les quasi-doublons restants sont ignorés. Si tous
+    les points sont alignés, aucun triangle n'est produit et ``hull`` contient
+    les points triés le long de la droite.
+    """
+
+    def __init__(self, points: Sequence[Point]):
+        """Calculer la triangulation de ``points``."""
+        n = len(points)
+        if isinstance(points, PointArray):
+            coords = memoryview(points.coords)
+            self.xs = coords[0::2].tolist()
+            self.ys = coords[1::2].tolist()
+        else:
+            self.xs = [float(p[0]) for p in points]
+            self.ys = [float(p[1]) for p in points]
+
+        max_triangles = max(2 * n - 5, 0)
+        self.triangles = [0] * (max_triangles * 3)
+        self.halfedges = [-1] * (max_triangles * 3)
+        self.hull: list[int] = []
+        self._triangles_len = 0
+
+        self._hash_size = max(math.ceil(math.sqrt(n)), 1)
+        self._hull_prev = [0] * n
+        self._hull_next = [0] * n
+        self._hull_tri = [0] * n
+        self._hull_hash = [-1] * self._hash_size
+        self._hull_start = 0
+        self._cx = 0.0
+        self._cy = 0.0
+
+        if n:
+            self._build(n)
+
+        del self.triangles[self._triangles_len:]
+        del self.halfedges[self._triangles_len:]
+
+    def triangle_list(self) -> list[Triangle]:
+        """Retourner les triangles sous forme de liste de triplets d'indices."""
+        t = self.triangles
+        return list(zip(t[0::3], t[1::3], t[2::3], strict=True))
+
+    def _build(self, n: int) -> None:
+        """Exécuter le balayage radial et remplir les structures du maillage."""
+        xs = self.xs
+        ys = self.ys
+        hull_prev = self._hull_prev
+        hull_next = self._hull_next
+        hull_tri = self._hull_tri
+        hull_hash = self._hull_hash
+
+        cx = (min(xs) + max(xs)) / 2
+        cy = (min(ys) + max(ys)) / 2
+
+        # germe : le point le plus proche du centre de la boîte englobante
+        i0 = min(range(n), key=lambda i: (xs[i] - cx) ** 2 + (ys[i] - cy) ** 2)
+        i0x = xs[i0]
+        i0y = ys[i0]
+
+        # puis le point le plus proche de i0
+        i1 = -1
+        min_dist = math.inf
+        for i in range(n):
+            if i == i0:
+                continue
+            d = (xs[i] - i0x) ** 2 + (ys[i] - i0y) ** 2
+            if 0 < d < min_dist:
+                i1 = i
+                min_dist = d
+
+        # puis le point formant avec eux le plus petit cercle circonscrit,
+        # parmi ceux qui ne sont pas alignés avec eux (test exact : sur des
+        # points presque alignés, le rayon calculé en flottants peut être
+        # fini pour un triplet aligné, ou infini pour un triplet qui ne l'est
+        # pas)
+        i2 = -1
+        min_radius = math.inf
+        if i1 != -1:
+            i1x = xs[i1]
+            i1y = ys[i1]
+            for i in range(n):
+                if i in (i0, i1):
+                    continue
+                r = _circumradius2(i0x, i0y, i1x, i1y, xs[i], ys[i])
+                if (r < min_radius or i2 == -1) and orient2d(
+                    i0x, i0y, i1x, i1y, xs[i], ys[i]
+                ):
+                    i2 = i
+                    min_radius = r
+
+        if i2 == -1:
+            # tous les points sont alignés : aucun triangle, l'enveloppe est
+            # la liste des points triés le long de la droite
+            dists = [(xs[i] - xs[0]) or (ys[i] - ys[0]) for i in range(n)]
+            order = sorted(range(n), key=dists.__getitem__)
+            hull = []
+            d0 = -math.inf
+            for i in order:
+                if dists[i] > d0:
+                    hull.append(i)
+                    d0 = dists[i]
+            self.hull = hull
+            return
+
+        i1x = xs[i1]
+        i1y = ys[i1]
+        i2x = xs[i2]
+        i2y = ys[i2]
+
+        # on oriente le germe dans le sens trigonométrique
+        if orient2d(i0x, i0y, i1x, i1y, i2x, i2y) < 0:
+            i1, i2 = i2, i1
+            i1x, i1y, i2x, i2y = i2x, i2y, i1x, i1y
+
+        if min_radius < math.inf:
+            cx, cy = _circumcenter(i0x, i0y, i1x, i1y, i2x, i2y)
+        else:
+            # germe trop plat pour calculer son cercle en flottants : on
+            # balaie autour de son centre de gravité
+            cx = (i0x + i1x + i2x) / 3
+            cy = (i0y + i1y + i2y) / 3
+        self._cx = cx
+        self._cy = cy
+
+        # tri par puissance des points par rapport au cercle de centre (cx, cy)
+        # passant par i0 : même ordre que la distance au centre, mais sans
+        # soustraire les carrés de coordonnées énormes quand le germe est
+        # presque plat (centre très éloigné), ce qui mélangerait l'ordre
+        ux = 2 * (i0x - cx)
+        uy = 2 * (i0y - cy)
+        dists = [
+            (x - i0x) * (x - i0x + ux) + (y - i0y) * (y - i0y + uy)
+            for x, y in zip(xs, ys, strict=True)
+        ]
+        ids = sorted(range(n), key=dists.__getitem__)
+
+        self._hull_start = i0
+        hull_size = 3
+
+        hull_next[i0] = hull_prev[i2] = i1
+        hull_next[i1] = hull_prev[i0] = i2
+        hull_next[i2] = hull_prev[i1] = i0
+
+        hull_tri[i0] = 0
+        hull_tri[i1] = 1
+        hull_tri[i2] = 2
+
+        hull_hash[self._hash_key(i0x, i0y)] = i0
+        hull_hash[self._hash_key(i1x, i1y)] = i1
+        hull_hash[self._hash_key(i2x, i2y)] = i2
+
+        self._add_triangle(i0, i1, i2, -1, -1, -1)
+
+        hash_size = self._hash_size
+        add_triangle = self._add_triangle
+        legalize = self._legalize
+        hash_key = self._hash_key
+
+        xp = yp = 0.0
+        for k, i in enumerate(ids):
+            x = xs[i]
+            y = ys[i]
+
+            # on ignore les quasi-doublons
+            if k > 0 and abs(x - xp) <= EPSILON and abs(y - yp) <= EPSILON:
+                continue
+            xp = x
+            yp = y
+
+            if i in (i0, i1, i2):
+                continue
+
+            # recherche d'une arête visible de l'enveloppe via la table de hachage
+            start = 0
+            key = hash_key(x, y)
+            for j in range(hash_size):
+                start = hull_hash[(key + j) % hash_size]
+                if start != -1 and start != hull_next[start]:
+                    break
+
+            start = hull_prev[start]
+            e = start
+            while True:
+                q = hull_next[e]
+                if orient2d(xs[e], ys[e], xs[q], ys[q], x, y) < 0:
+                    break
+                e = q
+                if e == start:
+                    e = -1
+                    break
+
+            if e == -1:
+                # aucune arête visible : le point est dans l'enveloppe
+                if self._insert_inside(i, start):
+                    hull_size += 1
+                    hull_hash[key] = i
+                continue
+
+            # premier triangle à partir du point
+            t = add_triangle(e, i, hull_next[e], -1, -1, hull_tri[e])
+
+            # légalisation récursive des arêtes opposées au nouveau point
+            hull_tri[i] = legalize(t + 2)
+            hull_tri[e] = t
+            hull_size += 1
+
+            # on avance en ajoutant des triangles tant que l'arête est visible
+            nxt = hull_next[e]
+            while True:
+                q = hull_next[nxt]
+                if not orient2d(xs[nxt], ys[nxt], xs[q], ys[q], x, y) < 0:
+                    break
+                t = add_triangle(nxt, i, q, hull_tri[i], -1, hull_tri[nxt])
+                hull_tri[i] = legalize(t + 2)
+                hull_next[nxt] = nxt  # marque le sommet comme retiré de l'enveloppe
+                hull_size -= 1
+                nxt = q
+
+            # puis on recule de l'autre côté
+            if e == start:
+                while True:
+                    q = hull_prev[e]
+                    if not orient2d(xs[q], ys[q], xs[e], ys[e], x, y) < 0:
+                        break
+                    t = add_triangle(q, i, e, -1, hull_tri[e], hull_tri[q])
+                    legalize(t + 2)
+                    hull_tri[q] = t
+                    hull_next[e] = e
+                    hull_size -= 1
+                    e = q
+
+            # mise à jour des indices de l'enveloppe
+            self._hull_start = hull_prev[i] = e
+            hull_next[e] = hull_prev[nxt] = i
+            hull_next[i] = nxt
+
+            hull_hash[key] = i
+            hull_hash[hash_key(xs[e], ys[e])] = e
+
+        hull = [0] * hull_size
+        e = self._hull_start
+        for k in range(hull_size):
+            hull[k] = e
+            e = hull_next[e]
+        self.hull = hull
+
+    def _insert_inside(self, i: int, start: int) -> bool:
+        """Insérer le point ``i``, qu'aucune arête de l'enveloppe ne voit.
+
+        L'ordre du balayage garantit qu'un nouveau point est hors de
+        l'enveloppe courante si le cercle du germe est vide et les calculs
+        exacts ; sur des points presque alignés, il peut tomber dans un
+        triangle ou sur une arête. On le localise alors par une marche à
+        partir de l'enveloppe, puis on coupe le triangle en trois, ou les
+        deux triangles de l'arête en deux, avant de légaliser les arêtes
+        opposées au point. Un quasi-doublon d'un sommet est ignoré.
+
+        Retourne vrai si le point a été ajouté à l'enveloppe (coupure d'une
+        arête de l'enveloppe).
+        """
+        t = self._locate(i, self._hull_tri[start])
+        if t == -1:
+            return False
+        xs = self.xs
+        ys = self.ys
+        triangles = self.triangles
+        halfedges = self.halfedges
+        hull_tri = self._hull_tri
+        x = xs[i]
+        y = ys[i]
+
+        on_edge = []
+        for k in (t, t + 1, t + 2):
+            p = triangles[k]
+            q = triangles[t + (k + 1) % 3]
+            if orient2d(xs[p], ys[p], xs[q], ys[q], x, y) == 0:
+                on_edge.append(k)
+        if len(on_edge) > 1:
+            return False  # quasi-doublon d'un sommet
+
+        if not on_edge:
+            # (a, b, c) devient (a, b, i), (b, c, i) et (c, a, i)
+            a = triangles[t]
+            b = triangles[t + 1]
+            c = triangles[t + 2]
+            o1 = halfedges[t + 1]
+            o2 = halfedges[t + 2]
+            triangles[t + 2] = i
+            u = self._add_triangle(b, c, i, o1, -1, t + 1)
+            w = self._add_triangle(c, a, i, o2, t + 2, u + 1)
+            if o1 == -1:
+                hull_tri[b] = u
+            if o2 == -1:
+                hull_tri[c] = w
+            self._legalize(t)
+            self._legalize(u)
+            self._legalize(w)
+            return False
+
+        # le point est sur l'arête h = (e, q) du triangle (e, q, r), qui
+        # devient (e, i, r) et (i, q, r)
+        h = on_edge[0]
+        h1 = t + (h + 1) % 3
+        h2 = t + (h + 2) % 3
+        e = triangles[h]
+        q = triangles[h1]
+        r = triangles[h2]
+        o1 = halfedges[h1]
+        opposite = halfedges[h]
+        triangles[h1] = i
+        u = self._add_triangle(i, q, r, -1, o1, h1)
+        if o1 == -1:
+            hull_tri[q] = u + 1
+
+        if opposite == -1:
+            # arête de l'enveloppe : i s'insère entre e et q
+            hull_prev = self._hull_prev
+            hull_next = self._hull_next
+            hull_prev[i] = e
+            hull_next[i] = q
+            hull_prev[q] = i
+            hull_next[e] = i
+            hull_tri[e] = h
+            hull_tri[i] = u
+            self._legalize(h2)
+            hull_tri[i] = self._legalize(u + 1)
+            return True
+
+        # arête intérieure : le triangle voisin (q, e, s) devient (q, i, s)
+        # et (i, e, s)
+        t2 = opposite - opposite % 3
+        b1 = t2 + (opposite + 1) % 3
+        b2 = t2 + (opposite + 2) % 3
+        s = triangles[b2]
+        o3 = halfedges[b1]
+        triangles[b1] = i
+        v = self._add_triangle(i, e, s, h, o3, b1)
+        self._link(opposite, u)
+        if o3 == -1:
+            hull_tri[e] = v + 1
+        self._legalize(h2)
+        self._legalize(u + 1)
+        self._legalize(b2)
+        self._legalize(v + 1)
+        return False
+
+    def _locate(self, i: int, h: int) -> int:
+        """Triangle contenant le point ``i`` (bord compris), ou -1.
+
+        Marche orientée à partir du triangle de la demi-arête ``h`` : on
+        traverse une arête qui sépare le triangle courant du point ; si la
+        marche n'aboutit pas, on parcourt tous les triangles.
+        """
+        xs = self.xs
+        ys = self.ys
+        triangles = self.triangles
+        halfedges = self.halfedges
+        x = xs[i]
+        y = ys[i]
+
+        def outside(k: int) -> bool:
+            p = triangles[k]
+            q = triangles[k - k % 3 + (k + 1) % 3]
+            return orient2d(xs[p], ys[p], xs[q], ys[q], x, y) < 0
+
+        t = h - h % 3
+        for _ in range(self._triangles_len // 3):
+            k = next((k for k in (t, t + 1, t + 2) if outside(k)), -1)
+            if k == -1:
+                return t
+            if halfedges[k] == -1:
+                break
+            t = halfedges[k] - halfedges[k] % 3
+
+        for t in range(0, self._triangles_len, 3):
+            if not (outside(t) or outside(t + 1) or outside(t + 2)):
+                return t
+        return -1
+
+    def _hash_key(self, x, y) -> int:
+        """Case de la table de hachage angulaire correspondant au point (x, y)."""
+        dx = x - self._cx
+        dy = y - self._cy
+        if dx == 0 and dy == 0:
+            return 0
+        return int(_pseudo_angle(dx, dy) * self._hash_size) % self._hash_size
+
+    def _link(self, a: int, b: int) -> None:
+        """Relier deux demi-arêtes opposées."""
+        halfedges = self.halfedges
+        halfedges[a] = b
+        if b != -1:
+            halfedges[b] = a
+
+    def _add_triangle(self, i0, i1, i2, a, b, c) -> int:
+        """Ajouter le triangle (i0, i1, i2) et relier ses demi-arêtes à a, b, c."""
+        t = self._triangles_len
+        triangles = self.triangles
+        triangles[t] = i0
+        triangles[t + 1] = i1
+        triangles[t + 2] = i2
+        self._link(t, a)
+        self._link(t + 1, b)
+        self._link(t + 2, c)
+        self._triangles_len = t + 3
+        return t
+
+    def _legalize(self, a: int) -> int:
+        """Basculer les arêtes ne respectant pas la condition de Delaunay.
+
+        Le triangle (pr, pl, p0) portant la demi-arête ``a`` et son voisin
+        (pl, pr, p1) sont remplacés par (p1, pl, p0) et (p0, pr, p1) lorsque
+        p1 est dans le cercle circonscrit du premier ; les arêtes extérieures
+        du voisin sont ensuite vérifiées à leur tour (pile explicite).
+
+        Retourne la demi-arête partant du dernier point inséré le long de
+        l'enveloppe convexe.
+        """
+        triangles = self.triangles
+        halfedges = self.halfedges
+        xs = self.xs
+        ys = self.ys
+        stack: list[int] = []
+        ar = 0
+
+        while True:
+            b = halfedges[a]
+            a0 = a - a % 3
+            ar = a0 + (a + 2) % 3
+
+            if b == -1:  # arête de l'enveloppe convexe
+                if not stack:
+                    break
+                a = stack.pop()
+                continue
+
+            b0 = b - b % 3
+            al = a0 + (a + 1) % 3
+            bl = b0 + (b + 2) % 3
+
+            p0 = triangles[ar]
+            pr = triangles[a]
+            pl = triangles[al]
+            p1 = triangles[bl]
+
+            # test du cercle circonscrit (cf. TP.predicates.incircle), déroulé
+            # pour la vitesse ; calcul exact si le signe est incertain
+            px = xs[p1]
+            py = ys[p1]
+            dx = xs[pr] - px
+            dy = ys[pr] - py
+            ex = xs[pl] - px
+            ey = ys[pl] - py
+            fx = xs[p0] - px
+            fy = ys[p0] - py
+            ap = dx * dx + dy * dy
+            bp = ex * ex + ey * ey
+            cp = fx * fx + fy * fy
+
+            det = (
+                ap * (ex * fy - fx * ey)
+                + bp * (fx * dy - dx * fy)
+                + cp * (dx * ey - ex * dy)
+            )
+            bound = INCIRCLE_ERROR_BOUND * (ap * bp + bp * cp + cp * ap)
+            if -bound <= det <= bound:
+                det = _incircle_exact(
+                    xs[pr], ys[pr], xs[pl], ys[pl], xs[p0], ys[p0], px, py
+                )
+            if det > 0:
+                triangles[a] = p1
+                triangles[b] = p0
+
+                hbl = halfedges[bl]
+
+                # arête basculée de l'autre côté de l'enveloppe (rare) :
+                # on corrige la référence de demi-arête de l'enveloppe
+                if hbl == -1:
+                    e = self._hull_start
+                    while True:
+                        if self._hull_tri[e] == bl:
+                            self._hull_tri[e] = a
+                            break
+                        e = self._hull_prev[e]
+                        if e == self._hull_start:
+                            break
+
+                # liaisons (a, hbl), (b, opposée de ar), (ar, bl)
+                halfedges[a] = hbl
+                if hbl != -1:
+                    halfedges[hbl] = a
+                har = halfedges[ar]
+                halfedges[b] = har
+                if har != -1:
+                    halfedges[har] = b
+                halfedges[ar] = bl
+                halfedges[bl] = ar
+
+                if len(stack) < _EDGE_STACK_SIZE:
+                    stack.append(b0 + (b + 1) % 3)
+            else:
+                if not stack:
+                    break
+                a = stack.pop()
+
+        return ar
+
+
+def delaunay_triangles(points: Sequence[Point]) -> list[Triangle]:
+    """Retourner les triangles de Delaunay de ``points`` (indices dans ``points``)."""
+    if len(points) < 3:
+        return []
+    return Delaunay(points).triangle_list()
@@ -0,0 +1,149 @@
+"""Exécution des grosses triangulations dans un pool de processus.
+
+Une triangulation volumineuse exécutée dans le thread de la requête Flask
+monopolise un cœur sous le GIL et affame les autres requêtes du worker.
+`ProcessPoolBackend` délègue les triangulations au-delà d'un seuil de taille
+à un pool de processus :
+
+- les coordonnées sont copiées une fois dans un segment de mémoire partagée
+  (``multiprocessing.shared_memory``) que le processus de calcul lit sans
+  copie, au lieu de sérialiser une liste de tuples ;
+- le résultat revient sous forme de tampon d'indices compact, enveloppé dans
+  une `TP.codec.TriangleArray`.
+"""
+
+import multiprocessing
+import os
+import threading
+from array import array
+from collections.abc import Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+from TP.codec import INDEX_TYPECODE, PointArray, TriangleArray
+from TP.delaunay import Delaunay
+from TP.models import Point
+
+# seuil par défaut (en nombre de points) au-delà duquel on passe par le pool
+DEFAULT_THRESHOLD = 50_000
+
+
+def _triangulate_shared(name: str, n: int) -> bytes:
+    """Trianguler n points lus dans le segment partagé ``name`` (côté worker).
+
+    Les coordonnées sont des float64 entrelacés ; le résultat est le tampon
+    d'indices des triangles, dans l'ordre natif de la machine.
+    """
+    shm = SharedMemory(name=name)
+    try:
+        coords = shm.buf[: 16 * n].cast("d")
+        try:
+            triangles = Delaunay(PointArray(coords)).triangles
+        finally:
+            coords.release()
+    finally:
+        shm.close()
+    return array(INDEX_TYPECODE, triangles).tobytes()
+
+
+class ProcessPoolBackend:
+    """Pool de processus pour les triangulations d'au moins ``threshold`` points.
+
+    Le pool compte ``max_workers`` processus (par défaut, le nombre de cœurs)
+    démarrés avec la méthode ``spawn``, sûre dans un serveur multithreadé.
+    `stats` expose la profondeur de file ; `shutdown` arrête le pool
+    proprement (les segments partagés des tâches annulées sont libérés).
+    """
+
+    def __init__(
+        self,
+        threshold: int = DEFAULT_THRESHOLD,
+        max_workers: int | None = None,
+        mp_context=None,
+    ):
+        """Créer le pool (les processus sont démarrés à la première tâche)."""
+        self.threshold = threshold
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=mp_context or multiprocessing.get_context("spawn"),
+        )
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+
+    def __enter__(self) -> "ProcessPoolBackend":
+        """Utiliser le pool comme gestionnaire de contexte."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Arrêter le pool en attendant les tâches en cours."""
+        self.shutdown()
+
+    def accepts(self, n: int) -> bool:
+        """Indiquer si une triangulation de ``n`` points doit passer par le pool."""
+        return n >= self.threshold
+
+    def submit(self, points: Sequence[Point]) -> Future:
+        """Soumettre une triangulation ; le futur donne une `TriangleArray`."""
+        n = len(points)
+        coords = array("d")
+        coords.extend(c for p in points for c in p)
+        shm = SharedMemory(create=True, size=max(coords.itemsize * len(coords), 1))
+        try:
+            shm.buf[: coords.itemsize * len(coords)] = memoryview(coords).cast("B")
+            future = self._pool.submit(_triangulate_shared, shm.name, n)
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+
+        with self._lock:
+            self._in_flight += 1
+
+        result: Future = Future()
+
+        def done(f: Future) -> None:
+            shm.close()
+            shm.unlink()
+            with self._lock:
+                self._in_flight -= 1
+                if f.cancelled() or f.exception() is not None:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+            if f.cancelled():
+                result.cancel()
+            elif f.exception() is not None:
+                result.set_exception(f.exception())
+            else:
+                indices = array(INDEX_TYPECODE)
+                indices.frombytes(f.result())
+                result.set_result(TriangleArray(indices))
+
+        future.add_done_callback(done)
+        return result
+
+    def triangulate(self, points: Sequence[Point]) -> TriangleArray:
+        """Trianguler ``points`` dans le pool et attendre le résultat."""
+        return self.submit(points).result()
+
+    def stats(self) -> dict[str, int]:
+        """Profondeur de file et compteurs du pool.
+
+        ``in_flight`` compte les tâches soumises non terminées, dont
+        ``queued`` attendent un processus libre.
+        """
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "in_flight": self._in_flight,
+                "queued": max(self._in_flight - self.max_workers, 0),
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """Arrêter le pool, en annulant éventuellement les tâches non démarrées."""
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
@@ -0,0 +1,282 @@
+"""Requêtes spatiales sur une triangulation calculée.
+
+`PointLocator` indexe un résultat `Triangles` pour répondre par lots à deux
+questions : quel triangle contient le point (x, y) (`PointLocator.locate`),
+et quel est le sommet le plus proche (`PointLocator.nearest`).
+
+Les deux s'appuient sur une grille régulière posée sur la boîte englobante
+des sommets, d'environ un sommet par case :
+
+- localisation (« jump-and-walk ») : chaque case retient un triangle
+  proche ; depuis celui de la case de la requête, on marche de triangle en
+  triangle vers le point en franchissant l'arête qui le sépare de lui. La
+  marche ne fait que quelques pas en moyenne ;
+- plus proche sommet : les sommets sont rangés par case (tableaux compacts
+  à la manière d'une matrice creuse) et l'on parcourt les anneaux de cases
+  autour de la requête jusqu'à ce qu'aucune case restante ne puisse contenir
+  de sommet plus proche.
+
+La localisation suppose une triangulation qui couvre l'enveloppe convexe
+de ses sommets, comme celles produites par `TP.Triangulator`.
+"""
+
+import math
+from collections.abc import Iterable, Sequence
+from itertools import chain
+
+from TP.codec import PointArray, TriangleArray
+from TP.models import Point, Triangles
+from TP.predicates import orientations
+
+# résultat de `PointLocator.locate` pour un point hors de la triangulation
+OUTSIDE = -1
+
+
+def _coordinates(points: Iterable[Point]) -> tuple[list[float], list[float]]:
+    """Séparer des points en listes d'abscisses et d'ordonnées."""
+    if isinstance(points, PointArray):
+        coords = memoryview(points.coords)
+        return coords[0::2].tolist(), coords[1::2].tolist()
+    xs: list[float] = []
+    ys: list[float] = []
+    for x, y in points:
+        xs.append(float(x))
+        ys.append(float(y))
+    return xs, ys
+
+
+class PointLocator:
+    """Index de localisation et de plus proche sommet sur un résultat `Triangles`.
+
+    L'index est immuable : il reflète la triangulation au moment de sa
+    construction (O(n)). Les requêtes prennent une séquence de points ou une
+    `PointArray` et retournent une liste d'indices, dans l'ordre des
+    requêtes.
+    """
+
+    def __init__(self, triangles: Triangles):
+        """Construire l'index de ``triangles``."""
+        self.xs, self.ys = xs, ys = _coordinates(triangles.vertices)
+        n = len(xs)
+
+        if isinstance(triangles.triangles, TriangleArray):
+            flat = list(triangles.triangles.indices)
+        else:
+            flat = list(chain.from_iterable(triangles.triangles))
+        # triangles orientés dans le sens direct
+        for t, sign in enumerate(orientations(xs, ys, flat)):
+            if sign < 0:
+                flat[3 * t + 1], flat[3 * t + 2] = flat[3 * t + 2], flat[3 * t + 1]
+        self._flat = flat
+
+        # adj[3t + k] : triangle voisin de t par l'arête (v[k], v[k+1]), ou -1
+        adj = [-1] * len(flat)
+        edges: dict[tuple[int, int], int] = {}
+        for e, a in enumerate(flat):
+            b = flat[e + 1 if e % 3 != 2 else e - 2]
+            opposite = edges.pop((b, a), None)
+            if opposite is None:
+                edges[(a, b)] = e
+            else:
+                adj[e] = opposite // 3
+                adj[opposite] = e // 3
+        self._adj = adj
+
+        # grille d'environ un sommet par case
+        if n:
+            self._x0, self._y0 = min(xs), min(ys)
+            width = max(max(xs) - self._x0, max(ys) - self._y0)
+            side = max(int(math.sqrt(n)), 1)
+            self._cell = width / side if width > 0 else 1.0
+            self._nx = min(int((max(xs) - self._x0) / self._cell), side - 1) + 1
+            self._ny = min(int((max(ys) - self._y0) / self._cell), side - 1) + 1
+        else:
+            self._x0 = self._y0 = 0.0
+            self._cell = 1.0
+            self._nx = self._ny = 1
+        cells = [self._cell_of(x, y) for x, y in zip(xs, ys, strict=True)]
+
+        # sommets rangés par case : ceux de la case k sont
+        # order[start[k]:start[k + 1]]
+        start = [0] * (self._nx * self._ny + 1)
+        for k in cells:
+            start[k + 1] += 1
+        for k in range(len(start) - 1):
+            start[k + 1] += start[k]
+        fill = start[:-1]
+        order = [0] * n
+        for v, k in enumerate(cells):
+            order[fill[k]] = v
+            fill[k] += 1
+        self._start = start
+        self._order = order
+
+        self._seeds = self._seed_grid(cells)
+        # blocs de `nearest`, construits à la première requête
+        self._blocks: list[list[int]] | None = None
+
+    def __len__(self) -> int:
+        """Nombre de sommets indexés."""
+        return len(self.xs)
+
+    def _cell_of(self, x: float, y: float) -> int:
+        """Case de la grille contenant (x, y), ramené dans la grille."""
+        i = min(max(int((x - self._x0) / self._cell), 0), self._nx - 1)
+        j = min(max(int((y - self._y0) / self._cell), 0), self._ny - 1)
+        return j * self._nx + i
+
+    def _seed_grid(self, cells: list[int]) -> list[int]:
+        """Triangle de départ de la marche pour chaque case de la grille.
+
+        Une case prend un triangle incident à l'un de ses sommets ; les cases
+        sans sommet héritent de celui d'une case voisine (parcours en
+        largeur).
+        """
+        seeds = [-1] * (self._nx * self._ny)
+        if not self._flat:
+            return seeds
+        for e, v in enumerate(self._flat):
+            seeds[cells[v]] = e // 3
+        frontier = [k for k, t in enumerate(seeds) if t >= 0]
+        nx, ny = self._nx, self._ny
+        while frontier:
+            following = []
+            for k in frontier:
+                i, j = k % nx, k // nx
+                for ni, nj in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)):
+                    if 0 <= ni < nx and 0 <= nj < ny and seeds[nj * nx + ni] < 0:
+                        seeds[nj * nx + ni] = seeds[k]
+                        following.append(nj * nx + ni)
+            frontier = following
+        return seeds
+
+    def locate(self, queries: Sequence[Point]) -> list[int]:
+        """Indice du triangle contenant chaque requête, ou `OUTSIDE`.
+
+        Un point situé sur une arête ou un sommet est attribué à l'un des
+        triangles qui les partagent. Les indices sont ceux de
+        ``triangles.triangles``.
+        """
+        qxs, qys = _coordinates(queries)
+        if not self._flat:
+            return [OUTSIDE] * len(qxs)
+        xs, ys, flat, adj, seeds = self.xs, self.ys, self._flat, self._adj, self._seeds
+        x0, y0, h, nx, ny = self._x0, self._y0, self._cell, self._nx, self._ny
+        max_steps = len(flat)
+        result = []
+        append = result.append
+        for qx, qy in zip(qxs, qys, strict=True):
+            i = min(max(int((qx - x0) / h), 0), nx - 1)
+            j = min(max(int((qy - y0) / h), 0), ny - 1)
+            t = seeds[j * nx + i]
+            # la marche s'arrête au pire après max_steps pas : les erreurs
+            # d'arrondi peuvent faire osciller entre deux triangles quand la
+            # requête est sur leur arête commune
+            for _ in range(max_steps):
+                e = 3 * t
+                a, b, c = flat[e], flat[e + 1], flat[e + 2]
+                ax, ay, bx, by, cx, cy = xs[a], ys[a], xs[b], ys[b], xs[c], ys[c]
+                if (bx - ax) * (qy - ay) - (by - ay) * (qx - ax) < 0:
+                    t = adj[e]
+                elif (cx - bx) * (qy - by) - (cy - by) * (qx - bx) < 0:
+                    t = adj[e + 1]
+                elif (ax - cx) * (qy - cy) - (ay - cy) * (qx - cx) < 0:
+                    t = adj[e + 2]
+                else:
+                    break
+                if t < 0:
+                    t = OUTSIDE
+                    break
+            append(t)
+        return result
+
+    def nearest(self, queries: Sequence[Point]) -> list[int]:
+        """Indice du sommet le plus proche de chaque requête.
+
+        En cas d'égalité, l'un des sommets les plus proches est retourné ;
+        sans sommet, le résultat est -1.
+        """
+        qxs, qys = _coordinates(queries)
+        if not self.xs:
+            return [-1] * len(qxs)
+        if self._blocks is None:
+            self._blocks = self._block_lists()
+        xs, ys, blocks = self.xs, self.ys, self._blocks
+        x0, y0, h, nx, ny = self._x0, self._y0, self._cell, self._nx, self._ny
+        h2 = h * h
+        ring_search = self._ring_search
+        result = []
+        append = result.append
+        for qx, qy in zip(qxs, qys, strict=True):
+            ci = int((qx - x0) / h)
+            cj = int((qy - y0) / h)
+            if qx >= x0 and qy >= y0 and ci < nx and cj < ny:
+                # les sommets hors du bloc 3 x 3 sont à une distance >= h
+                best = -1
+                best_d = h2
+                for v in blocks[cj * nx + ci]:
+                    dx = xs[v] - qx
+                    dy = ys[v] - qy
+                    d = dx * dx + dy * dy
+                    if d <= best_d:
+                        best_d = d
+                        best = v
+                if best >= 0:
+                    append(best)
+                    continue
+            append(ring_search(qx, qy))
+        return result
+
+    def _block_lists(self) -> list[list[int]]:
+        """Sommets des 3 x 3 cases centrées sur chaque case de la grille."""
+        start, order, nx, ny = self._start, self._order, self._nx, self._ny
+        rows = []
+        for j in range(ny):
+            for i in range(nx):
+                # cases i - 1, i et i + 1 de la ligne, contiguës dans order
+                first = j * nx + max(i - 1, 0)
+                last = j * nx + min(i + 1, nx - 1)
+                rows.append(order[start[first] : start[last + 1]])
+        blocks = []
+        for j in range(ny):
+            for i in range(nx):
+                blocks.append(
+                    [
+                        v
+                        for nj in range(max(j - 1, 0), min(j + 1, ny - 1) + 1)
+                        for v in rows[nj * nx + i]
+                    ]
+                )
+        return blocks
+
+    def _ring_search(self, qx: float, qy: float) -> int:
+        """Plus proche sommet de (x, y) par anneaux de cases croissants."""
+        xs, ys, start, order = self.xs, self.ys, self._start, self._order
+        x0, y0, h, nx, ny = self._x0, self._y0, self._cell, self._nx, self._ny
+        ci = math.floor((qx - x0) / h)
+        cj = math.floor((qy - y0) / h)
+        # premier anneau qui touche la grille
+        r = max(0, -ci, ci - nx + 1, -cj, cj - ny + 1)
+        best = -1
+        best_d = math.inf
+        # après l'anneau r, les cases restantes sont à une distance >= r * h
+        bound = 0.0
+        while best < 0 or best_d > bound * bound:
+            i0, i1 = max(ci - r, 0), min(ci + r, nx - 1)
+            for j in range(max(cj - r, 0), min(cj + r, ny - 1) + 1):
+                row = j * nx
+                if j == cj - r or j == cj + r:
+                    ks = range(row + i0, row + i1 + 1)
+                else:
+                    ks = [row + i for i in (ci - r, ci + r) if 0 <= i < nx]
+                for k in ks:
+                    for v in order[start[k] : start[k + 1]]:
+                        dx = xs[v] - qx
+                        dy = ys[v] - qy
+                        d = dx * dx + dy * dy
+                        if d < best_d:
+                            best_d = d
+                            best = v
+            bound = r * h
+            r += 1
+        return best
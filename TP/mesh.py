@@ -0,0 +1,455 @@
+"""Triangulation de Delaunay modifiable point par point.
+
+`IncrementalMesh` part d'une triangulation (`Triangles`, ou des points à
+trianguler) et permet d'insérer ou de supprimer des points sans tout
+recalculer : seule la zone touchée est re-triangulée.
+
+Le maillage est à demi-arêtes, comme celui de `TP.delaunay`, et complété
+par un sommet fantôme `GHOST` « à l'infini » : chaque arête de l'enveloppe
+convexe porte un triangle fantôme, de sorte que toute arête a une opposée
+et que les points extérieurs se traitent comme les autres.
+
+- Insertion (Bowyer-Watson) : on localise un triangle dont le cercle
+  circonscrit contient le nouveau point (marche orientée depuis le plus
+  proche d'un échantillon de sommets), on retire la cavité des triangles en
+  conflit et on relie son bord au nouveau point.
+- Suppression : on retire l'étoile du sommet et on re-triangule le polygone
+  de ses voisins par « oreilles de Delaunay » (triangle convexe dont le
+  cercle ne contient aucun autre voisin).
+
+Le coût d'une opération est dominé par la localisation (marche en
+O(n^1/3) en moyenne pour des points répartis uniformément) ; la
+modification elle-même ne touche qu'un nombre constant de triangles en
+moyenne. Les sommets supprimés sont oubliés (renumérotation des sommets
+vivants) dès qu'ils sont plus nombreux que les vivants : l'échantillon de la
+localisation tombe ainsi au moins une fois sur deux sur un sommet vivant, et
+la mémoire reste proportionnelle au nombre de points.
+"""
+
+import random
+from collections.abc import Iterable
+
+from TP.delaunay import Delaunay
+from TP.models import Point, Triangles
+from TP.predicates import incircle, orient2d, orientations
+
+# sommet fantôme « à l'infini » fermant le maillage autour de l'enveloppe
+GHOST = -1
+
+# marque des triangles libérés (réutilisables)
+_DEAD = -2
+
+# nombre de sommets supprimés en deçà duquel on ne compacte pas
+_MIN_COMPACT = 64
+
+
+class IncrementalMesh:
+    """Triangulation de Delaunay supportant l'insertion et la suppression de points.
+
+    Les sommets sont identifiés par leurs coordonnées (``insert`` et
+    ``remove`` prennent des points) ; les doublons exacts sont ignorés. Si
+    les points sont moins de 3 ou tous alignés, le maillage reste vide et
+    chaque modification le reconstruit entièrement, jusqu'à ce qu'une
+    triangulation existe.
+    """
+
+    def __init__(self, points: Iterable[Point] = ()):
+        """Trianguler ``points`` (calcul complet par `TP.delaunay`)."""
+        self.xs: list[float] = []
+        self.ys: list[float] = []
+        self._alive: list[bool] = []
+        self._ids: dict[Point, int] = {}
+        self._v: list[int] = []
+        self._h: list[int] = []
+        self._vt: list[int] = []
+        self._free: list[int] = []
+        self._real = 0
+        self._rng = random.Random(0)
+        for x, y in points:
+            self._add_vertex(float(x), float(y))
+        self._rebuild()
+
+    @classmethod
+    def from_triangles(cls, triangles: Triangles) -> "IncrementalMesh":
+        """Reprendre une triangulation existante sans la recalculer.
+
+        Les sommets gardent l'ordre de ``triangles.vertices`` ; ils doivent
+        être deux à deux distincts. Une triangulation qui ne couvre pas
+        exactement l'enveloppe convexe est recalculée.
+        """
+        mesh = cls()
+        for x, y in triangles.vertices:
+            if mesh._add_vertex(float(x), float(y)) is None:
+                raise ValueError(f"duplicate vertex ({x}, {y})")
+        flat = [i for t in triangles.triangles for i in t]
+        if not mesh._load(flat):
+            mesh._rebuild()
+        return mesh
+
+    def __len__(self) -> int:
+        """Nombre de points du maillage."""
+        return len(self._ids)
+
+    def __contains__(self, point: Point) -> bool:
+        """Indiquer si ``point`` est un sommet du maillage."""
+        return (float(point[0]), float(point[1])) in self._ids
+
+    def insert(self, x: float, y: float) -> bool:
+        """Insérer le point (x, y) ; retourne ``False`` s'il existait déjà."""
+        i = self._add_vertex(float(x), float(y))
+        if i is None:
+            return False
+        if self._real:
+            self._insert(i)
+        else:
+            self._rebuild()
+        return True
+
+    def remove(self, x: float, y: float) -> None:
+        """Supprimer le point (x, y) ; lève `KeyError` s'il est absent."""
+        i = self._ids.pop((float(x), float(y)))
+        self._alive[i] = False
+        if self._real and len(self._ids) >= 3:
+            self._remove(i)
+        if not self._real or len(self._ids) < 3:
+            self._rebuild()
+        if len(self.xs) - len(self._ids) > max(len(self._ids), _MIN_COMPACT):
+            self._compact()
+
+    def to_triangles(self) -> Triangles:
+        """Triangulation courante (sommets dans l'ordre d'insertion)."""
+        remap = [-1] * len(self.xs)
+        vertices = []
+        for i, alive in enumerate(self._alive):
+            if alive:
+                remap[i] = len(vertices)
+                vertices.append((self.xs[i], self.ys[i]))
+        v = self._v
+        triangles = [
+            (remap[v[t]], remap[v[t + 1]], remap[v[t + 2]])
+            for t in range(0, len(v), 3)
+            if v[t] >= 0 and v[t + 1] >= 0 and v[t + 2] >= 0
+        ]
+        return Triangles(vertices=vertices, triangles=triangles)
+
+    # construction
+
+    def _add_vertex(self, x: float, y: float) -> int | None:
+        """Enregistrer un nouveau sommet (``None`` s'il existe déjà)."""
+        if (x, y) in self._ids:
+            return None
+        i = self._ids[(x, y)] = len(self.xs)
+        self.xs.append(x)
+        self.ys.append(y)
+        self._alive.append(True)
+        self._vt.append(-1)
+        return i
+
+    def _compact(self) -> None:
+        """Oublier les sommets supprimés en renumérotant les vivants.
+
+        L'ordre des sommets est conservé ; les triangles sont renumérotés en
+        place, sans recalcul.
+        """
+        remap = [-1] * len(self.xs)
+        xs: list[float] = []
+        ys: list[float] = []
+        vt: list[int] = []
+        for i, alive in enumerate(self._alive):
+            if alive:
+                remap[i] = len(xs)
+                xs.append(self.xs[i])
+                ys.append(self.ys[i])
+                vt.append(self._vt[i])
+        self.xs = xs
+        self.ys = ys
+        self._vt = vt
+        self._alive = [True] * len(xs)
+        self._ids = {p: k for k, p in enumerate(zip(xs, ys, strict=True))}
+        self._v = [remap[a] if a >= 0 else a for a in self._v]
+
+    def _rebuild(self) -> None:
+        """Recalculer entièrement la triangulation des sommets vivants."""
+        ids = [i for i, alive in enumerate(self._alive) if alive]
+        d = Delaunay([(self.xs[i], self.ys[i]) for i in ids])
+        self._load([ids[k] for k in d.triangles])
+
+    def _load(self, flat: list[int]) -> bool:
+        """Charger des triangles à plat, puis ajouter les triangles fantômes.
+
+        Retourne ``False`` si les triangles ne forment pas un disque (bord
+        non réduit à un seul cycle de sommets distincts).
+        """
+        xs = self.xs
+        ys = self.ys
+        v = self._v = list(flat)
+        n = len(v)
+        h = self._h = [-1] * n
+        self._free = []
+        self._vt = [-1] * len(xs)
+        self._real = n // 3
+
+        edges: dict[tuple[int, int], int] = {}
+        for t, sign in enumerate(orientations(xs, ys, v)):
+            if sign < 0:
+                v[3 * t + 1], v[3 * t + 2] = v[3 * t + 2], v[3 * t + 1]
+        for e in range(n):
+            a = v[e]
+            b = v[e + 1 if e % 3 < 2 else e - 2]
+            o = edges.pop((b, a), None)
+            if o is None:
+                edges[(a, b)] = e
+            else:
+                h[e] = o
+                h[o] = e
+            self._vt[a] = e
+
+        # un triangle fantôme (b, a, GHOST) par arête a -> b de l'enveloppe
+        ghost_in: dict[int, int] = {}
+        ghost_out: dict[int, int] = {}
+        for (a, b), e in edges.items():
+            if a in ghost_out or b in ghost_in:
+                return False
+            g = self._new_triangle(b, a, GHOST)
+            self._link(g, e)
+            ghost_out[a] = g + 1
+            ghost_in[b] = g + 2
+        if ghost_out.keys() != ghost_in.keys():
+            return False
+        for a, g in ghost_out.items():
+            self._link(g, ghost_in[a])
+
+        # sommets absents des triangles (p.ex. alignés sur l'enveloppe)
+        if self._real:
+            for i, alive in enumerate(self._alive):
+                if alive and self._vt[i] == -1:
+                    self._insert(i)
+        return True
+
+    # primitives du maillage
+
+    def _link(self, a: int, b: int) -> None:
+        """Relier deux demi-arêtes opposées."""
+        self._h[a] = b
+        self._h[b] = a
+
+    def _new_triangle(self, a: int, b: int, c: int) -> int:
+        """Créer le triangle (a, b, c) ; retourne sa première demi-arête."""
+        if self._free:
+            t = self._free.pop()
+            self._v[t : t + 3] = (a, b, c)
+        else:
+            t = len(self._v)
+            self._v.extend((a, b, c))
+            self._h.extend((-1, -1, -1))
+        vt = self._vt
+        if a >= 0:
+            vt[a] = t
+        if b >= 0:
+            vt[b] = t + 1
+        if c >= 0:
+            vt[c] = t + 2
+        if a >= 0 and b >= 0 and c >= 0:
+            self._real += 1
+        return t
+
+    def _delete_triangle(self, t: int) -> None:
+        """Libérer le triangle ``t``."""
+        v = self._v
+        if v[t] >= 0 and v[t + 1] >= 0 and v[t + 2] >= 0:
+            self._real -= 1
+        v[t : t + 3] = (_DEAD, _DEAD, _DEAD)
+        self._free.append(t)
+
+    def _ghost_edge(self, t: int) -> tuple[int, int]:
+        """Sommets réels (p, q) du triangle fantôme ``t`` tourné en (p, q, GHOST).
+
+        L'arête q -> p est sur l'enveloppe, l'intérieur étant à sa gauche.
+        """
+        a, b, c = self._v[t : t + 3]
+        if a == GHOST:
+            return b, c
+        if b == GHOST:
+            return c, a
+        return a, b
+
+    def _outside_edge(self, p: int, q: int, x: float, y: float) -> bool:
+        """Indiquer si (x, y) est hors de l'enveloppe vis-à-vis de l'arête q -> p.
+
+        C'est le cas s'il est strictement à droite de q -> p, ou aligné et
+        strictement entre q et p.
+        """
+        xs = self.xs
+        ys = self.ys
+        o = orient2d(xs[q], ys[q], xs[p], ys[p], x, y)
+        if o != 0:
+            return o < 0
+        return (x - xs[p]) * (x - xs[q]) + (y - ys[p]) * (y - ys[q]) < 0
+
+    def _conflict(self, t: int, x: float, y: float) -> bool:
+        """Indiquer si (x, y) est dans le cercle circonscrit du triangle ``t``.
+
+        Le « cercle » d'un triangle fantôme est le demi-plan extérieur à son
+        arête d'enveloppe (voir `_outside_edge`).
+        """
+        v = self._v
+        a, b, c = v[t], v[t + 1], v[t + 2]
+        if a < 0 or b < 0 or c < 0:
+            return self._outside_edge(*self._ghost_edge(t), x, y)
+        xs = self.xs
+        ys = self.ys
+        return incircle(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c], x, y) > 0
+
+    # insertion
+
+    def _locate(self, x: float, y: float) -> int:
+        """Trouver un triangle dont le cercle circonscrit contient (x, y).
+
+        Marche orientée à partir du sommet le plus proche parmi un
+        échantillon d'environ n^1/3 sommets. Le parcours de tous les sommets,
+        si l'échantillon n'en contient aucun de vivant, reste rare : les
+        sommets supprimés ne sont jamais plus nombreux que les vivants (voir
+        `_compact`).
+        """
+        xs = self.xs
+        ys = self.ys
+        v = self._v
+        h = self._h
+        vt = self._vt
+        rng = self._rng
+
+        best = -1
+        best_d = float("inf")
+        size = len(xs)
+        for _ in range(int(len(self._ids) ** (1 / 3)) + 1):
+            i = rng.randrange(size)
+            if vt[i] >= 0 and self._alive[i]:
+                d = (xs[i] - x) ** 2 + (ys[i] - y) ** 2
+                if d < best_d:
+                    best = i
+                    best_d = d
+        if best == -1:
+            best = next(i for i in range(size) if self._alive[i] and vt[i] >= 0)
+        t = vt[best] - vt[best] % 3
+
+        while True:
+            a, b, c = v[t], v[t + 1], v[t + 2]
+            if a < 0 or b < 0 or c < 0:
+                p, q = self._ghost_edge(t)
+                if self._outside_edge(p, q, x, y):
+                    return t
+                # on repasse à l'intérieur par l'arête d'enveloppe q -> p
+                e = t + v[t : t + 3].index(p)
+                o = h[e]
+                t = o - o % 3
+                continue
+            r = rng.randrange(3)
+            for k in (r, (r + 1) % 3, (r + 2) % 3):
+                e = t + k
+                p = v[e]
+                q = v[t + (k + 1) % 3]
+                if orient2d(xs[p], ys[p], xs[q], ys[q], x, y) < 0:
+                    o = h[e]
+                    t = o - o % 3
+                    break
+            else:
+                return t
+
+    def _insert(self, i: int) -> None:
+        """Insérer le sommet ``i`` (Bowyer-Watson)."""
+        x = self.xs[i]
+        y = self.ys[i]
+        v = self._v
+        h = self._h
+
+        start = self._locate(x, y)
+        cavity = {start}
+        stack = [start]
+        boundary = []
+        while stack:
+            t = stack.pop()
+            for e in (t, t + 1, t + 2):
+                o = h[e]
+                to = o - o % 3
+                if to in cavity:
+                    continue
+                if self._conflict(to, x, y):
+                    cavity.add(to)
+                    stack.append(to)
+                else:
+                    boundary.append((v[e], v[e + 1 if e % 3 < 2 else e - 2], o))
+
+        for t in cavity:
+            self._delete_triangle(t)
+
+        # chaque arête a -> b du bord donne le triangle (a, b, i)
+        into: dict[int, int] = {}
+        out_of: dict[int, int] = {}
+        for a, b, o in boundary:
+            t = self._new_triangle(a, b, i)
+            self._link(t, o)
+            into[b] = t + 1
+            out_of[a] = t + 2
+        for a, e in out_of.items():
+            self._link(e, into[a])
+
+    # suppression
+
+    def _remove(self, i: int) -> None:
+        """Supprimer le sommet ``i`` et re-triangulier le trou par oreilles."""
+        v = self._v
+        h = self._h
+
+        # étoile de i dans le sens trigonométrique : demi-arêtes i -> voisin
+        e0 = self._vt[i]
+        link: list[int] = []
+        outer: list[int] = []
+        star: list[int] = []
+        e = e0
+        while True:
+            t = e - e % 3
+            nxt = t + (e + 1) % 3
+            star.append(t)
+            link.append(v[nxt])
+            outer.append(h[nxt])
+            e = h[t + (e + 2) % 3]
+            if e == e0:
+                break
+        for t in star:
+            self._delete_triangle(t)
+        self._vt[i] = -1
+
+        while len(link) > 3:
+            m = len(link)
+            for k in range(m):
+                p, q, r = link[k - 1], link[k], link[(k + 1) % m]
+                if self._is_ear(p, q, r, link):
+                    break
+            else:
+                raise RuntimeError("no Delaunay ear found")
+            t = self._new_triangle(p, q, r)
+            self._link(t, outer[k - 1])
+            self._link(t + 1, outer[k])
+            outer[k - 1] = t + 2
+            del link[k]
+            del outer[k]
+
+        t = self._new_triangle(*link)
+        for k in range(3):
+            self._link(t + k, outer[k])
+
+    def _is_ear(self, p: int, q: int, r: int, link: list[int]) -> bool:
+        """Indiquer si (p, q, r) est une oreille de Delaunay du polygone ``link``."""
+        xs = self.xs
+        ys = self.ys
+        others = [s for s in link if s >= 0 and s not in (p, q, r)]
+        if GHOST in (p, q, r):
+            # triangle fantôme : aucun autre voisin hors de son arête d'enveloppe
+            a, b = (q, r) if p == GHOST else (r, p) if q == GHOST else (p, q)
+            return not any(self._outside_edge(a, b, xs[s], ys[s]) for s in others)
+        if orient2d(xs[p], ys[p], xs[q], ys[q], xs[r], ys[r]) <= 0:
+            return False
+        return not any(
+            incircle(xs[p], ys[p], xs[q], ys[q], xs[r], ys[r], xs[s], ys[s]) > 0
+            for s in others
+        )
@@ -0,0 +1,323 @@
+"""Instrumentation du Triangulator : compteurs, histogrammes, export Prometheus.
+
+Quand ``/triangulate/<id>`` est lent, `Metrics` permet de savoir où le
+temps est passé : chaque étape du calcul (récupération du PointSet,
+dédoublonnage, triangulation, encodage, lecture/écriture du ``store``) est
+chronométrée dans l'histogramme ``triangulator_stage_seconds``, à côté des
+tailles des entrées et des résultats, des requêtes HTTP (latence, statut,
+octets envoyés, codes d'erreur) et des compteurs du cache, du
+partage des résultats, du préchauffage (`TP.warmup`) et du contrôle
+d'admission (`TP.admission`).
+
+Les familles de métriques sont déclarées une fois pour toutes dans
+`FAMILIES` ; `Metrics.render` les exporte au format texte de Prometheus
+(route ``GET /metrics`` de `TP.app` et `TP.asgi`).
+
+L'instrumentation coûte quelques microsecondes par requête. Avec
+``Metrics(enabled=False)``, les méthodes retournent immédiatement et les
+applications n'installent pas leurs points de mesure.
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+# bornes des histogrammes de durée (secondes)
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+    2.5, 5.0, 10.0, 30.0, 60.0,
+)  # fmt: skip
+
+# bornes des histogrammes de tailles (points, triangles)
+SIZE_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# nom -> (type, aide, bornes des histogrammes)
+FAMILIES: dict[str, tuple[str, str, tuple | None]] = {
+    "triangulator_stage_seconds": (
+        "histogram",
+        "Duration of each triangulation stage.",
+        LATENCY_BUCKETS,
+    ),
+    "triangulator_input_points": (
+        "histogram",
+        "Number of points in triangulated PointSets.",
+        SIZE_BUCKETS,
+    ),
+    "triangulator_output_triangles": (
+        "histogram",
+        "Number of triangles in computed triangulations.",
+        SIZE_BUCKETS,
+    ),
+    "triangulator_request_seconds": (
+        "histogram",
+        "HTTP request latency.",
+        LATENCY_BUCKETS,
+    ),
+    "triangulator_requests_total": ("counter", "HTTP responses by status.", None),
+    "triangulator_errors_total": ("counter", "Error responses by error code.", None),
+    "triangulator_response_bytes_total": (
+        "counter",
+        "Bytes sent in HTTP response bodies.",
+        None,
+    ),
+}
+
+# compteurs de `TP.cache.ResultCache.stats` exportés : clé -> (type, aide)
+_CACHE_STATS = {
+    "hits": ("counter", "Result cache hits."),
+    "misses": ("counter", "Result cache misses."),
+    "evictions": ("counter", "Results evicted from the cache."),
+    "entries": ("gauge", "Results held in the cache."),
+    "bytes": ("gauge", "Total size of cached results."),
+}
+
+# compteurs de `TP.warmup.WarmupScheduler.stats` exportés : clé -> (type, aide)
+_WARMUP_STATS = {
+    "queued": ("gauge", "PointSets waiting to be warmed up."),
+    "running": ("gauge", "PointSets being warmed up."),
+    "warmed": ("counter", "Triangulations computed ahead of requests."),
+    "skipped": ("counter", "Warm-up requests for results already available."),
+    "failed": ("counter", "Warm-ups that failed."),
+    "dropped": ("counter", "Warm-up requests refused (queue full)."),
+    "deferred": ("counter", "Warm-ups put back in the queue (no capacity)."),
+    "requests": ("counter", "First requests for announced PointSets."),
+    "hits": ("counter", "First requests for announced PointSets served warm."),
+    "hit_ratio": ("gauge", "Share of first requests served warm."),
+}
+
+# compteurs de `TP.cache.SharedResults.stats` exportés : clé -> (type, aide)
+_SHARED_RESULTS_STATS = {
+    "ids": ("gauge", "PointSet ids linked to a content key."),
+    "contents": ("gauge", "Distinct PointSet contents with a result."),
+    "links": ("counter", "PointSet ids linked to a content key."),
+    "shared": ("counter", "Ids linked to an already known content."),
+    "dedup_ratio": ("gauge", "Share of linked ids reusing a known content."),
+    "saved_seconds": ("counter", "Triangulation time saved by shared results."),
+}
+
+# compteurs de `TP.admission.AdmissionController.stats` : clé -> (type, aide)
+_ADMISSION_STATS = {
+    "small_active": ("gauge", "Cost of small triangulations in progress."),
+    "small_queued": ("gauge", "Small triangulations waiting for admission."),
+    "large_active": ("gauge", "Cost of large triangulations in progress."),
+    "large_queued": ("gauge", "Large triangulations waiting for admission."),
+    "admitted": ("counter", "Triangulations admitted."),
+    "rejected": ("counter", "Triangulations rejected (overloaded)."),
+    "timeouts": ("counter", "Triangulations rejected after waiting too long."),
+    "background_waiting": ("gauge", "Background triangulations waiting for capacity."),
+    "deferred": ("counter", "Background triangulations deferred (no capacity)."),
+}
+
+
+class _Histogram:
+    """Effectifs cumulables d'un histogramme à bornes fixes."""
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+
+class _Timer:
+    """Chronomètre d'une étape (gestionnaire de contexte de `Metrics.time`)."""
+
+    __slots__ = ("metrics", "name", "labels", "start")
+
+    def __init__(self, metrics, name: str, labels: dict):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.metrics.observe(
+            self.name, time.perf_counter() - self.start, **self.labels
+        )
+
+
+class _NoTimer:
+    """Chronomètre inactif (instrumentation désactivée)."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NO_TIMER = _NoTimer()
+
+
+class Metrics:
+    """Registre thread-safe des métriques déclarées dans `FAMILIES`.
+
+    Les étiquettes (labels) sont passées en arguments nommés ; chaque
+    combinaison d'étiquettes est une série distincte.
+    """
+
+    def __init__(self, enabled: bool = True):
+        """Créer un registre vide (inactif si ``enabled`` est faux)."""
+        self.enabled = enabled
+        self._series: dict[tuple, float | _Histogram] = {}
+        self._collectors: list[Callable[[], Iterable[tuple]]] = []
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Ajouter ``value`` au compteur ``name``."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Enregistrer une observation dans l'histogramme ``name``."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._series.get(key)
+            if histogram is None:
+                histogram = self._series[key] = _Histogram(FAMILIES[name][2])
+            histogram.counts[bisect_left(histogram.buckets, value)] += 1
+            histogram.sum += value
+
+    def time(self, name: str, **labels):
+        """Chronométrer un bloc ``with`` dans l'histogramme ``name``."""
+        if not self.enabled:
+            return _NO_TIMER
+        return _Timer(self, name, labels)
+
+    def stage(self, stage: str):
+        """Chronométrer une étape du calcul (``triangulator_stage_seconds``)."""
+        return self.time("triangulator_stage_seconds", stage=stage)
+
+    def add_collector(self, collector: Callable[[], Iterable[tuple]]) -> None:
+        """Ajouter des valeurs lues au moment de l'export.
+
+        ``collector()`` retourne des tuples ``(nom, type, aide, valeur)`` ;
+        utile pour les compteurs tenus ailleurs (cache, pool de processus).
+        """
+        self._collectors.append(collector)
+
+    def value(self, name: str, **labels) -> float:
+        """Valeur d'un compteur, ou nombre d'observations d'un histogramme."""
+        with self._lock:
+            series = self._series.get((name, tuple(sorted(labels.items()))), 0)
+        return sum(series.counts) if isinstance(series, _Histogram) else series
+
+    def render(self) -> str:
+        """Exporter les métriques au format texte de Prometheus (v0.0.4)."""
+        with self._lock:
+            series = sorted(
+                (key, _copy(value)) for key, value in self._series.items()
+            )
+        lines = []
+        declared = set()
+        for (name, labels), value in series:
+            if name not in declared:
+                declared.add(name)
+                kind, help_text, _ = FAMILIES[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+            if not isinstance(value, _Histogram):
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(
+                (*value.buckets, math.inf), value.counts, strict=True
+            ):
+                cumulative += count
+                le = (*labels, ("le", _number(bound)))
+                lines.append(f"{name}_bucket{_labels(le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(value.sum)}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        for collector in self._collectors:
+            for name, kind, help_text, value in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def cache_collector(cache) -> Callable[[], list[tuple]]:
+    """Collecteur (`Metrics.add_collector`) des compteurs d'un `ResultCache`."""
+    return _stats_collector("triangulator_cache_", cache.stats, _CACHE_STATS)
+
+
+def warmup_collector(scheduler) -> Callable[[], list[tuple]]:
+    """Collecteur des compteurs d'un `TP.warmup.WarmupScheduler`."""
+    return _stats_collector("triangulator_warmup_", scheduler.stats, _WARMUP_STATS)
+
+
+def shared_results_collector(results) -> Callable[[], list[tuple]]:
+    """Collecteur des compteurs d'un `TP.cache.SharedResults`."""
+    return _stats_collector(
+        "triangulator_results_", results.stats, _SHARED_RESULTS_STATS
+    )
+
+
+def admission_collector(admission) -> Callable[[], list[tuple]]:
+    """Collecteur des compteurs d'un `TP.admission.AdmissionController`."""
+    return _stats_collector(
+        "triangulator_admission_", admission.stats, _ADMISSION_STATS
+    )
+
+
+def _stats_collector(
+    prefix: str, stats: Callable[[], dict], exported: dict[str, tuple[str, str]]
+) -> Callable[[], list[tuple]]:
+    """Collecteur des clés ``exported`` du dictionnaire retourné par ``stats``."""
+
+    def collect():
+        values = stats()
+        return [
+            (
+                prefix + key + ("_total" if kind == "counter" else ""),
+                kind,
+                help_text,
+                values[key],
+            )
+            for key, (kind, help_text) in exported.items()
+        ]
+
+    return collect
+
+
+def _copy(value):
+    """Copie instantanée d'une série (sous le verrou du registre)."""
+    if isinstance(value, _Histogram):
+        copy = _Histogram(value.buckets)
+        copy.counts = list(value.counts)
+        copy.sum = value.sum
+        return copy
+    return value
+
+
+def _labels(labels: Iterable[tuple[str, object]]) -> str:
+    """Étiquettes au format ``{a="x",b="y"}`` (vide s'il n'y en a pas)."""
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    """Valeur d'étiquette échappée (barre oblique inverse, guillemet, saut de ligne)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    """Nombre au format de Prometheus (``+Inf`` pour l'infini)."""
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
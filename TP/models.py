@@ -1,12 +1,21 @@
-"""Data models for point sets and triangle sets."""
+"""Data models for point sets and triangle sets.
+
+Les points et les triangles sont par défaut des listes de tuples. Pour les
+gros ensembles, `PointSet.compact` et `Triangles.compact` basculent vers un
+stockage à plat (`PointArray`, `TriangleArray`) : 8 octets par point et
+12 octets par triangle au lieu d'une centaine d'octets par tuple, avec le
+même accès en séquence pour les appelants existants.
+"""
 
 from dataclasses import dataclass, field
 
+from TP.codec import PointArray, TriangleArray, encode_points
+
 Point = tuple[float, float]
 Triangle = tuple[int, int, int]
 
 
-@dataclass
+@dataclass(slots=True)
 class PointSet:
     """Représente un ensemble de points.
 
@@ -19,36 +28,58 @@ class PointSet:
 
     def to_bytes(self) -> bytes:
         """Encode this PointSet into the binary format described above."""
-        import struct
+        return encode_points(self.points)
 
-        out = len(self.points).to_bytes(4, "little")
-        for x, y in self.points:
-            out += struct.pack("<f", float(x))
-            out += struct.pack("<f", float(y))
-        return out
+    def compact(self) -> "PointSet":
+        """Retourner une copie stockée à plat en float32 (`PointArray`)."""
+        return PointSet(points=PointArray.from_points(self.points))
 
 
-@dataclass
+@dataclass(slots=True)
 class Triangles:
-    """Représente un ensemble de triangles."""
+    """Représente un ensemble de triangles.
+
+    ``index_map``, s'il est fourni, relie les points du PointSet d'origine
+    aux sommets : ``vertices[index_map[i]]`` est le sommet issu du i-ème
+    point, -1 signalant un point écarté (voir `TP.dedup.dedup_points`).
+    """
 
     vertices: list[Point] = field(default_factory=list)
     triangles: list[Triangle] = field(default_factory=list)
+    index_map: list[int] | None = None
 
     def __init__(
         self,
         vertices: list[Point] | None = None,
         sommets: list[Point] | None = None,
         triangles: list[Triangle] | None = None,
+        index_map: list[int] | None = None,
     ) -> None:
         """Construct a Triangles object accepting either `vertices` or `sommets`.
 
         Both `vertices` and `sommets` are accepted for compatibility with tests
-        and previous names.
+        and previous names. Compact sequences (`PointArray`, `TriangleArray`)
+        are kept as is instead of being copied into lists.
         """
         verts = vertices if vertices is not None else (sommets or [])
-        self.vertices = list(verts)
-        self.triangles = list(triangles or [])
-        # compatibility alias (read/write)
-        self.sommets = self.vertices
+        tris = triangles or []
+        self.vertices = verts if isinstance(verts, PointArray) else list(verts)
+        self.triangles = tris if isinstance(tris, TriangleArray) else list(tris)
+        self.index_map = index_map
+
+    @property
+    def sommets(self) -> list[Point]:
+        """Alias (lecture/écriture) de `vertices`, conservé pour compatibilité."""
+        return self.vertices
+
+    @sommets.setter
+    def sommets(self, value: list[Point]) -> None:
+        self.vertices = value
 
+    def compact(self) -> "Triangles":
+        """Retourner une copie stockée à plat (`PointArray`, `TriangleArray`)."""
+        return Triangles(
+            vertices=PointArray.from_points(self.vertices),
+            triangles=TriangleArray.from_triangles(self.triangles),
+            index_map=self.index_map,
+        )
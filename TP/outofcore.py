@@ -0,0 +1,320 @@
+"""Triangulation hors mémoire de PointSet plus gros que la RAM.
+
+`triangulate_file` lit un PointSet au format binaire depuis un fichier et
+écrit sa triangulation de Delaunay au format de `TP.codec.encode_triangles`
+dans un autre, sans jamais charger tous les points :
+
+1. le fichier est lu par blocs pour construire un histogramme des
+   abscisses, d'où l'on tire des bandes verticales (les tuiles) d'au plus
+   ``tile_points`` points chacune ;
+2. une deuxième lecture répartit les points (indice et coordonnées) dans un
+   fichier temporaire par tuile ;
+3. les tuiles sont traitées une à une, de gauche à droite (`_Stitcher`) :
+   chaque tuile est triangulée par `TP.delaunay.Delaunay` avec les points
+   « ouverts » laissés par les précédentes.
+
+Un triangle dont le cercle circonscrit est entièrement à gauche de la tuile
+suivante ne peut plus être modifié (aucun point à venir n'y tombera) : il
+est écrit aussitôt. Les points dont tous les triangles sont écrits sont
+oubliés ; seuls les autres, et ceux de l'enveloppe convexe, sont reportés
+sur la tuile suivante. La couture se fait le long du front, les arêtes qui
+bordent la zone déjà écrite : dans la triangulation de la tuile suivante,
+les triangles atteints depuis le front sans le franchir recouvrent cette
+zone et sont écartés, les autres sont exactement les nouveaux triangles de
+Delaunay. La mémoire se limite ainsi à une tuile et aux points ouverts,
+quelle que soit la taille de l'entrée.
+
+Les sommets écrits sont les points d'origine, dans leur ordre : les indices
+des triangles sont ceux du fichier d'entrée. Les doublons exacts et les
+points non finis ne sont référencés par aucun triangle.
+"""
+
+import math
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_right
+from contextlib import ExitStack
+from pathlib import Path
+
+from TP.codec import INDEX_TYPECODE
+from TP.delaunay import Delaunay
+
+# nombre de points par tuile par défaut (~100 Mo de travail en mémoire)
+DEFAULT_TILE_POINTS = 1_000_000
+
+# nombre de points lus à la fois dans le fichier d'entrée
+_READ_POINTS = 64 * 1024
+
+# cases de l'histogramme des abscisses par tuile visée
+_BINS_PER_TILE = 64
+
+_HEADER = struct.Struct("<I")
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def triangulate_file(
+    src: str | os.PathLike,
+    dst: str | os.PathLike,
+    *,
+    tile_points: int = DEFAULT_TILE_POINTS,
+    tmp_dir: str | os.PathLike | None = None,
+) -> int:
+    """Trianguler le PointSet du fichier ``src`` dans le fichier ``dst``.
+
+    ``tile_points`` borne le nombre de points chargés en même temps (une
+    tuile ne le dépasse que si plus de ``tile_points`` points partagent une
+    même case de l'histogramme des abscisses). Les fichiers de tuiles sont
+    créés dans ``tmp_dir`` (répertoire temporaire du système par défaut) et
+    supprimés à la fin. Retourne le nombre de triangles écrits.
+    """
+    if tile_points < 3:
+        raise ValueError("tile_points must be >= 3")
+    with open(src, "rb") as f:
+        header = f.read(_HEADER.size)
+        count = _HEADER.unpack(header)[0] if len(header) == _HEADER.size else 0
+        count = min(count, (os.fstat(f.fileno()).st_size - _HEADER.size) // 8)
+
+        bounds = _tile_bounds(f, count, tile_points)
+        work = Path(tempfile.mkdtemp(prefix="triangulate-", dir=tmp_dir))
+        try:
+            tiles = _split_tiles(f, count, bounds, work)
+            with open(dst, "wb") as out:
+                # sommets : copie du PointSet d'entrée
+                out.write(_HEADER.pack(count))
+                f.seek(_HEADER.size)
+                remaining = 8 * count
+                while remaining:
+                    block = f.read(min(remaining, 8 * _READ_POINTS))
+                    out.write(block)
+                    remaining -= len(block)
+
+                # triangles : nombre complété à la fin
+                count_offset = out.tell()
+                out.write(_HEADER.pack(0))
+                writer = _TriangleWriter(out)
+                stitcher = _Stitcher(writer.add)
+                for k, (ids_path, coords_path) in enumerate(tiles):
+                    bound = bounds[k] if k < len(bounds) else math.inf
+                    stitcher.add_tile(_read_tile(ids_path, coords_path), bound)
+                    ids_path.unlink()
+                    coords_path.unlink()
+                writer.flush()
+                out.seek(count_offset)
+                out.write(_HEADER.pack(writer.count))
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+    return writer.count
+
+
+def _read_coords(f, count: int):
+    """Parcourir les coordonnées du fichier par blocs d'``array("f")``."""
+    f.seek(_HEADER.size)
+    remaining = count
+    while remaining:
+        n = min(remaining, _READ_POINTS)
+        coords = array("f")
+        coords.frombytes(f.read(8 * n))
+        if not _LITTLE_ENDIAN:
+            coords.byteswap()
+        yield count - remaining, coords
+        remaining -= n
+
+
+def _tile_bounds(f, count: int, tile_points: int) -> list[float]:
+    """Abscisses séparant les tuiles, tirées d'un histogramme des abscisses.
+
+    La tuile k contient les points d'abscisse ``x`` telle que
+    ``bounds[k - 1] <= x < bounds[k]`` (`bisect.bisect_right`).
+    """
+    isfinite = math.isfinite
+    lo = math.inf
+    hi = -math.inf
+    for _, coords in _read_coords(f, count):
+        xs = [x for x in coords[0::2] if isfinite(x)]
+        if xs:
+            lo = min(lo, min(xs))
+            hi = max(hi, max(xs))
+    if not lo < hi:
+        return []
+
+    bins = _BINS_PER_TILE * (count // tile_points + 1)
+    scale = bins / (hi - lo)
+    histogram = [0] * bins
+    for _, coords in _read_coords(f, count):
+        for x in coords[0::2]:
+            if isfinite(x):
+                histogram[min(int((x - lo) * scale), bins - 1)] += 1
+
+    bounds = []
+    filled = 0
+    for k, n in enumerate(histogram):
+        if filled and filled + n > tile_points:
+            bounds.append(lo + k / scale)
+            filled = 0
+        filled += n
+    return bounds
+
+
+def _split_tiles(f, count: int, bounds: list[float], work: Path) -> list:
+    """Répartir les points valides dans un couple de fichiers par tuile."""
+    tiles = [
+        (work / f"{k}.ids", work / f"{k}.coords") for k in range(len(bounds) + 1)
+    ]
+    with ExitStack() as stack:
+        files = [
+            (stack.enter_context(open(a, "wb")), stack.enter_context(open(b, "wb")))
+            for a, b in tiles
+        ]
+        isfinite = math.isfinite
+        for first, coords in _read_coords(f, count):
+            buffers = [(array(INDEX_TYPECODE), array("f")) for _ in files]
+            xs = coords[0::2]
+            ys = coords[1::2]
+            for i, x, y in zip(range(first, first + len(xs)), xs, ys, strict=True):
+                if isfinite(x) and isfinite(y):
+                    ids, xy = buffers[bisect_right(bounds, x)]
+                    ids.append(i)
+                    xy.append(x)
+                    xy.append(y)
+            for (ids_file, coords_file), (ids, xy) in zip(files, buffers, strict=True):
+                ids_file.write(ids.tobytes())
+                coords_file.write(xy.tobytes())
+    return tiles
+
+
+def _read_tile(ids_path: Path, coords_path: Path) -> dict[int, tuple[float, float]]:
+    """Points d'une tuile, indice -> (x, y), sans les doublons exacts."""
+    ids = array(INDEX_TYPECODE)
+    ids.frombytes(ids_path.read_bytes())
+    coords = array("f")
+    coords.frombytes(coords_path.read_bytes())
+    seen = set()
+    tile = {}
+    for i, x, y in zip(ids, coords[0::2], coords[1::2], strict=True):
+        # 0.0 == -0.0 : les deux zéros sont bien des doublons
+        if (x, y) not in seen:
+            seen.add((x, y))
+            tile[i] = (x, y)
+    return tile
+
+
+class _TriangleWriter:
+    """Écriture des triangles par blocs d'indices little-endian."""
+
+    def __init__(self, out, block_triangles: int = 64 * 1024):
+        self.out = out
+        self.count = 0
+        self._block = 3 * block_triangles
+        self._buf = array(INDEX_TYPECODE)
+
+    def add(self, a: int, b: int, c: int) -> None:
+        buf = self._buf
+        buf.append(a)
+        buf.append(b)
+        buf.append(c)
+        self.count += 1
+        if len(buf) >= self._block:
+            self.flush()
+
+    def flush(self) -> None:
+        if not _LITTLE_ENDIAN:
+            self._buf.byteswap()
+        self.out.write(self._buf.tobytes())
+        self._buf = array(INDEX_TYPECODE)
+
+
+def _circle_span(ax, ay, bx, by, cx, cy) -> tuple[float, float]:
+    """Abscisses extrêmes (gauche, droite) du cercle circonscrit à abc."""
+    dx = bx - ax
+    dy = by - ay
+    ex = cx - ax
+    ey = cy - ay
+    den = dx * ey - dy * ex
+    if den == 0:
+        return -math.inf, math.inf
+    bl = dx * dx + dy * dy
+    cl = ex * ex + ey * ey
+    d = 0.5 / den
+    x = (ey * bl - dy * cl) * d
+    y = (dx * cl - ex * bl) * d
+    r = math.sqrt(x * x + y * y)
+    return ax + x - r, ax + x + r
+
+
+class _Stitcher:
+    """Triangulation tuile par tuile, recousue le long du front.
+
+    État conservé entre deux tuiles :
+
+    - ``points`` : coordonnées des points « ouverts » (sommets d'un triangle
+      non terminé, ou de l'enveloppe convexe, auxquels un point à venir peut
+      encore se relier) ;
+    - ``frontier`` : arêtes orientées bordant la zone déjà écrite, dans le
+      sens du triangle écrit qui les porte.
+    """
+
+    def __init__(self, emit):
+        self.emit = emit
+        self.points: dict[int, tuple[float, float]] = {}
+        self.frontier: set[tuple[int, int]] = set()
+
+    def add_tile(self, tile: dict[int, tuple[float, float]], bound: float) -> None:
+        """Trianguler les points ouverts avec ceux de ``tile``.
+
+        Tous les points des tuiles suivantes ont une abscisse >= ``bound``.
+        """
+        ids = list(self.points)
+        ids.extend(tile)
+        points = [*self.points.values(), *tile.values()]
+        d = Delaunay(points)
+        tri, half = d.triangles, d.halfedges
+        frontier = self.frontier
+
+        # triangles recouvrant la zone écrite (triangulée ici sans ses points
+        # intérieurs) : on les atteint depuis le front sans le franchir
+        edges = {(ids[tri[e]], ids[tri[_next(e)]]): e for e in range(len(tri))}
+        written = set()
+        stack = [edges[edge] // 3 for edge in frontier if edge in edges]
+        while stack:
+            t = stack.pop()
+            if t in written:
+                continue
+            written.add(t)
+            for e in range(3 * t, 3 * t + 3):
+                a, b = ids[tri[e]], ids[tri[_next(e)]]
+                o = half[e]
+                if o != -1 and (a, b) not in frontier and (b, a) not in frontier:
+                    stack.append(o // 3)
+
+        # les autres sont des triangles de Delaunay de l'ensemble complet ;
+        # ceux dont le cercle est à gauche de bound ne changeront plus
+        open_ids = set()
+        for t in range(len(tri) // 3):
+            if t in written:
+                continue
+            i, j, k = tri[3 * t], tri[3 * t + 1], tri[3 * t + 2]
+            a, b, c = ids[i], ids[j], ids[k]
+            (ax, ay), (bx, by), (cx, cy) = points[i], points[j], points[k]
+            if _circle_span(ax, ay, bx, by, cx, cy)[1] < bound:
+                self.emit(a, b, c)
+                for edge in ((a, b), (b, c), (c, a)):
+                    reverse = edge[::-1]
+                    if reverse in frontier:
+                        frontier.remove(reverse)
+                    else:
+                        frontier.add(edge)
+            else:
+                open_ids.update((a, b, c))
+
+        open_ids.update(ids[i] for i in d.hull)
+        coords = dict(zip(ids, points, strict=True))
+        self.points = {i: coords[i] for i in open_ids}
+
+
+def _next(e: int) -> int:
+    """Demi-arête suivante dans le même triangle."""
+    return e - 2 if e % 3 == 2 else e + 1
@@ -0,0 +1,178 @@
+"""Triangulation parallèle par bandes (diviser pour régner).
+
+`triangulate_strips` découpe les points nettoyés en bandes verticales de
+même effectif, triangule chaque bande indépendamment (dans un pool de
+processus, un cœur par bande) puis recoud les bandes :
+
+- dans une bande d'abscisses ``[lo, hi[``, un triangle dont le cercle
+  circonscrit reste entre ``lo`` et ``hi`` ne contient aucun point des
+  autres bandes : c'est un triangle de Delaunay de l'ensemble complet, gardé
+  tel quel ;
+- les autres triangles, le long des coutures et de l'enveloppe, sont
+  recalculés en triangulant les seuls points qui les bordent (sommets des
+  triangles rejetés et de l'enveloppe de chaque bande), recousus le long du
+  front des triangles gardés comme pour la triangulation hors mémoire
+  (`TP.outofcore`).
+
+Le résultat est la triangulation de Delaunay séquentielle (aux cas de
+points cocirculaires près). La couture ne porte que sur O(√n) points par
+bande : elle reste faible devant le calcul des bandes.
+
+`ParallelBackend` l'expose au `TP.Triangulator.Triangulator` comme
+``backend``, à la manière de `TP.executor.ProcessPoolBackend`.
+"""
+
+import math
+import multiprocessing
+import os
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from TP.codec import INDEX_TYPECODE, PointArray, TriangleArray
+from TP.delaunay import Delaunay
+from TP.executor import DEFAULT_THRESHOLD
+from TP.models import Point
+from TP.outofcore import _circle_span, _next, _Stitcher
+
+
+def _triangulate_strip(
+    coords: bytes, ids: bytes, lo: float, hi: float
+) -> tuple[bytes, bytes, bytes]:
+    """Trianguler une bande d'abscisses ``[lo, hi[`` (côté worker).
+
+    ``coords`` contient les float64 entrelacés des points de la bande et
+    ``ids`` leurs indices globaux. Retourne, en indices globaux : les
+    triangles gardés, les arêtes orientées bordant la zone qu'ils couvrent
+    (le front) et les points à recoudre.
+    """
+    xy = array("d")
+    xy.frombytes(coords)
+    index = array(INDEX_TYPECODE)
+    index.frombytes(ids)
+    d = Delaunay(PointArray(xy))
+    tri, half, xs, ys = d.triangles, d.halfedges, d.xs, d.ys
+
+    kept = []
+    for t in range(0, len(tri), 3):
+        a, b, c = tri[t], tri[t + 1], tri[t + 2]
+        left, right = _circle_span(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c])
+        kept.append(lo <= left and right < hi)
+
+    triangles = array(INDEX_TYPECODE)
+    frontier = array(INDEX_TYPECODE)
+    seam = set(d.hull)
+    for t, keep in enumerate(kept):
+        vertices = tri[3 * t : 3 * t + 3]
+        if not keep:
+            seam.update(vertices)
+            continue
+        triangles.extend(index[v] for v in vertices)
+        for e in range(3 * t, 3 * t + 3):
+            if half[e] == -1 or not kept[half[e] // 3]:
+                frontier.append(index[tri[e]])
+                frontier.append(index[tri[_next(e)]])
+    seam_ids = array(INDEX_TYPECODE, (index[v] for v in sorted(seam)))
+    return triangles.tobytes(), frontier.tobytes(), seam_ids.tobytes()
+
+
+def triangulate_strips(
+    points: Sequence[Point], strips: int, executor: Executor | None = None
+) -> TriangleArray:
+    """Triangulation de Delaunay de ``points``, calculée par ``strips`` bandes.
+
+    Les points doivent être deux à deux distincts, comme pour
+    `TP.delaunay.Delaunay`. Les bandes sont triangulées dans ``executor``
+    s'il est fourni (p.ex. un ``ProcessPoolExecutor``), sinon l'une après
+    l'autre dans le processus courant.
+    """
+    if strips < 1:
+        raise ValueError("strips must be >= 1")
+    if isinstance(points, PointArray):
+        coords = memoryview(points.coords)
+        xs, ys = coords[0::2].tolist(), coords[1::2].tolist()
+    else:
+        xs = [float(p[0]) for p in points]
+        ys = [float(p[1]) for p in points]
+    n = len(xs)
+
+    # bornes aux quantiles des abscisses ; les ex aequo restent ensemble
+    ordered = sorted(xs)
+    bounds = sorted({ordered[k * n // strips] for k in range(1, strips)} if n else ())
+    parts = [(array("d"), array(INDEX_TYPECODE)) for _ in range(len(bounds) + 1)]
+    for i, (x, y) in enumerate(zip(xs, ys, strict=True)):
+        xy, ids = parts[bisect_right(bounds, x)]
+        xy.append(x)
+        xy.append(y)
+        ids.append(i)
+    del ordered
+
+    edges = [-math.inf, *bounds, math.inf]
+    args = [
+        (xy.tobytes(), ids.tobytes(), edges[k], edges[k + 1])
+        for k, (xy, ids) in enumerate(parts)
+    ]
+    del parts
+    if executor is None:
+        results = [_triangulate_strip(*a) for a in args]
+    else:
+        results = list(executor.map(_triangulate_strip, *zip(*args, strict=True)))
+
+    triangles = array(INDEX_TYPECODE)
+    stitcher = _Stitcher(lambda a, b, c: triangles.extend((a, b, c)))
+    for kept, frontier, seam in results:
+        triangles.frombytes(kept)
+        edges = array(INDEX_TYPECODE)
+        edges.frombytes(frontier)
+        stitcher.frontier.update(zip(edges[0::2], edges[1::2], strict=True))
+        ids = array(INDEX_TYPECODE)
+        ids.frombytes(seam)
+        stitcher.points.update((i, (xs[i], ys[i])) for i in ids)
+    stitcher.add_tile({}, math.inf)
+    return TriangleArray(triangles)
+
+
+class ParallelBackend:
+    """Triangulation par bandes, réparties sur ``max_workers`` processus.
+
+    Les triangulations d'au moins ``threshold`` points sont découpées en
+    ``strips`` bandes (par défaut, une par processus). Les processus sont
+    démarrés avec la méthode ``spawn``, sûre dans un serveur multithreadé.
+    """
+
+    def __init__(
+        self,
+        threshold: int = DEFAULT_THRESHOLD,
+        max_workers: int | None = None,
+        strips: int | None = None,
+        mp_context=None,
+    ):
+        """Créer le pool (les processus sont démarrés à la première tâche)."""
+        self.threshold = threshold
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.strips = strips or self.max_workers
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=mp_context or multiprocessing.get_context("spawn"),
+        )
+
+    def __enter__(self) -> "ParallelBackend":
+        """Utiliser le pool comme gestionnaire de contexte."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Arrêter le pool en attendant les tâches en cours."""
+        self.shutdown()
+
+    def accepts(self, n: int) -> bool:
+        """Indiquer si une triangulation de ``n`` points doit être parallélisée."""
+        return n >= self.threshold
+
+    def triangulate(self, points: Sequence[Point]) -> TriangleArray:
+        """Trianguler ``points`` par bandes dans le pool."""
+        return triangulate_strips(points, self.strips, self._pool)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """Arrêter le pool, en annulant éventuellement les tâches non démarrées."""
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
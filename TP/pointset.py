@@ -3,36 +3,39 @@
 import struct
 from collections.abc import Iterable
 
-from TP.models import PointSet
+from TP.codec import encode_points, float32_view
+from TP.models import PointArray, PointSet
 
 
-def parse_pointset(binary_data: bytes) -> PointSet:
+def parse_pointset(binary_data: bytes, *, zero_copy: bool = False) -> PointSet:
     """Analyser des données binaires et retourner un PointSet.
 
     Format attendu :
       - 4 octets little-endian (entier non signé) : nombre de points
       - pour chaque point : 4 octets float x, 4 octets float y (little-endian)
+
+    Si le tampon contient moins de points que l'en-tête n'en annonce, seuls
+    les points complets sont lus.
+
+    Avec ``zero_copy=True``, aucun point n'est décodé : le PointSet renvoyé
+    est adossé à une vue float32 du tampon d'origine (`TP.codec.PointArray`),
+    qui se parcourt comme la liste de tuples habituelle.
     """
     if not binary_data or len(binary_data) < 4:
         return PointSet(points=[])
 
     count = int.from_bytes(binary_data[:4], "little")
-    pts = []
-    offset = 4
-    for _ in range(count):
-        if len(binary_data) < offset + 8:
-            break
-        x = struct.unpack_from("<f", binary_data, offset)[0]
-        y = struct.unpack_from("<f", binary_data, offset + 4)[0]
-        pts.append((x, y))
-        offset += 8
-    return PointSet(points=pts)
+    count = min(count, (len(binary_data) - 4) // 8)
+    payload = memoryview(binary_data)[4 : 4 + 8 * count]
+
+    if zero_copy:
+        return PointSet(points=PointArray(float32_view(payload)))
+    return PointSet(points=list(struct.iter_unpack("<ff", payload)))
 
 
 def encode_pointset(points: Iterable[tuple[float, float]]) -> bytes:
-    """Encode une séquence de points en représentation binaire."""
-    out = len(list(points)).to_bytes(4, "little")
-    for x, y in points:
-        out += struct.pack("<f", float(x))
-        out += struct.pack("<f", float(y))
-    return out
+    """Encode une séquence de points en représentation binaire.
+
+    ``points`` n'est parcouru qu'une fois : un générateur convient.
+    """
+    return encode_points(points)
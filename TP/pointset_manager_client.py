@@ -1,16 +1,507 @@
-"""Client helper utilities for PointSet manager interactions."""
+"""Client helper utilities for PointSet manager interactions.
+
+`PointSetManagerClient` talks to the PointSetManager HTTP API
+(`point_set_manager.yml`) over a pool of persistent (keep-alive)
+connections, with timeouts and bounded retries. Failures are mapped to the
+exceptions `TP.app` already translates into HTTP errors:
+
+- unknown PointSetID -> `KeyError` (404)
+- malformed PointSetID or payload -> `ValueError` (400)
+- manager unreachable, timing out or answering 5xx -> `ConnectionError` (503)
+
+`AsyncPointSetManagerClient` is its non-blocking counterpart for asyncio
+code, with the same error mapping and retry policy.
+
+The module-level helpers use a default client whose base URL comes from the
+``POINTSET_MANAGER_URL`` environment variable (see `get_default_client`).
+"""
+
+import asyncio
+import contextlib
+import http.client
+import json
+import os
+import queue
+import select
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+from TP.models import PointSet
+from TP.pointset import parse_pointset
 
 Point = tuple[float, float]
 
+DEFAULT_URL = "http://localhost:5000"
+
+# statuses worth retrying: the manager or its database is temporarily down
+_RETRY_STATUSES = {502, 503, 504}
+
+# errors meaning a reused keep-alive connection was closed by the manager
+# (`http.client.RemoteDisconnected` is a `ConnectionResetError`). Raised
+# while sending, the manager never read the request, so even a POST can be
+# sent again on a fresh connection; raised while reading the answer, the
+# request may already have been processed, so only idempotent ones are
+_STALE_CONNECTION_ERRORS = (BrokenPipeError, ConnectionResetError)
+
+
+class PointSetManagerClient:
+    """HTTP client for the PointSetManager with pooled keep-alive connections.
+
+    Up to ``pool_size`` idle connections are kept open and reused across
+    requests (``pool_size=0`` opens a new connection for every request).
+    Each request gets ``timeout`` seconds per socket operation; transport
+    errors and 502/503/504 answers are retried ``retries`` times with an
+    exponential backoff starting at ``backoff`` seconds. A pooled connection
+    the manager closed while idle is replaced by a fresh one at once; a
+    non-idempotent request is only sent again if the connection failed
+    before the request was sent (see `_STALE_CONNECTION_ERRORS`). The client
+    is thread-safe.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_URL,
+        *,
+        pool_size: int = 8,
+        timeout: float = 5.0,
+        retries: int = 2,
+        backoff: float = 0.05,
+    ):
+        """Create a client for the PointSetManager listening at ``base_url``."""
+        secure, self._host, self._port, self._prefix = _split_base_url(base_url)
+        self._connection_class = (
+            http.client.HTTPSConnection if secure else http.client.HTTPConnection
+        )
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._pool: queue.LifoQueue = queue.LifoQueue(maxsize=max(pool_size, 1))
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def __enter__(self) -> "PointSetManagerClient":
+        """Use the client as a context manager (closes the pool on exit)."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close every pooled connection."""
+        self.close()
+
+    def close(self) -> None:
+        """Close every idle pooled connection."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def get_pointset_bytes(self, point_set_id: str) -> bytes:
+        """Fetch the binary PointSet registered under ``point_set_id``."""
+        path = f"/pointset/{quote(str(point_set_id), safe='')}"
+        return self._request("GET", path, idempotent=True)
+
+    def get_pointset(self, point_set_id: str) -> PointSet:
+        """Fetch and decode the PointSet registered under ``point_set_id``.
+
+        The points are a compact `PointArray` view of the received payload
+        (see `TP.pointset.parse_pointset`), ready for `TP.dedup`'s fast path.
+        """
+        return parse_pointset(self.get_pointset_bytes(point_set_id), zero_copy=True)
+
+    def store_pointset_bytes(self, data: bytes) -> str:
+        """Register a binary PointSet and return its PointSetID.
+
+        Only 5xx answers and pooled connections found closed while sending
+        are retried: a transport error after the body was sent may already
+        have registered the PointSet.
+        """
+        body = self._request(
+            "POST",
+            "/pointset",
+            data,
+            {"Content-Type": "application/octet-stream"},
+            idempotent=False,
+        )
+        try:
+            return json.loads(body)["pointSetId"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise ConnectionError("invalid answer from PointSetManager") from e
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        """Take an idle connection from the pool or open a new one.
+
+        Idle connections the manager already closed (readable while no
+        request is pending) are dropped.
+        """
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if conn.sock is None or not select.select([conn.sock], [], [], 0)[0]:
+                return conn
+            conn.close()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        """Open a new connection (lazily: the socket opens on first use)."""
+        with self._lock:
+            self.connections_opened += 1
+        return self._connection_class(self._host, self._port, timeout=self.timeout)
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        """Give a healthy connection back to the pool (or close it if full)."""
+        if self.pool_size <= 0:
+            conn.close()
+            return
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+        *,
+        idempotent: bool,
+    ) -> bytes:
+        """Send a request with retries and return the body of a 200/201 answer."""
+        last_error: Exception | None = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+
+            conn = self._acquire()
+            reused = conn.sock is not None
+            sent = False
+            try:
+                try:
+                    conn.request(method, self._prefix + path, body, headers or {})
+                    sent = True
+                    resp = conn.getresponse()
+                except _STALE_CONNECTION_ERRORS:
+                    if not reused or (sent and not idempotent):
+                        raise
+                    conn.close()
+                    conn = self._connect()
+                    conn.request(method, self._prefix + path, body, headers or {})
+                    resp = conn.getresponse()
+                data = resp.read()
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                last_error = e
+                if idempotent:
+                    continue
+                break
+
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+
+            if resp.status in (200, 201):
+                return data
+            last_error = _status_error(resp.status, resp.reason, data)
+            if resp.status not in _RETRY_STATUSES:
+                break
+
+        message = f"PointSetManager unavailable: {last_error}"
+        raise ConnectionError(message) from last_error
+
+
+class AsyncPointSetManagerClient:
+    """Non-blocking PointSetManager client for asyncio code (see `TP.asgi`).
+
+    Same API, error mapping, timeouts and retry policy (stale pooled
+    connections included) as `PointSetManagerClient`, with coroutine
+    methods: HTTP/1.1 is spoken
+    directly over asyncio streams, and up to ``pool_size`` idle keep-alive
+    connections are reused. A client must only be used from the event loop
+    it was first used in.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_URL,
+        *,
+        pool_size: int = 8,
+        timeout: float = 5.0,
+        retries: int = 2,
+        backoff: float = 0.05,
+    ):
+        """Create a client for the PointSetManager listening at ``base_url``."""
+        secure, self._host, port, self._prefix = _split_base_url(base_url)
+        self._ssl = secure
+        self._port = port or (443 if secure else 80)
+        self._host_header = self._host if port is None else f"{self._host}:{port}"
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self.connections_opened = 0
+
+    async def __aenter__(self) -> "AsyncPointSetManagerClient":
+        """Use the client as an async context manager (closes the pool on exit)."""
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Close every pooled connection."""
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close every idle pooled connection."""
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+            with contextlib.suppress(OSError):
+                await writer.wait_closed()
+
+    async def get_pointset_bytes(self, point_set_id: str) -> bytes:
+        """Fetch the binary PointSet registered under ``point_set_id``."""
+        path = f"/pointset/{quote(str(point_set_id), safe='')}"
+        return await self._request("GET", path, idempotent=True)
+
+    async def get_pointset(self, point_set_id: str) -> PointSet:
+        """Fetch and decode the PointSet registered under ``point_set_id``."""
+        data = await self.get_pointset_bytes(point_set_id)
+        return parse_pointset(data, zero_copy=True)
+
+    async def store_pointset_bytes(self, data: bytes) -> str:
+        """Register a binary PointSet and return its PointSetID.
+
+        As with `PointSetManagerClient.store_pointset_bytes`, only 5xx
+        answers and pooled connections found closed while sending are
+        retried.
+        """
+        body = await self._request(
+            "POST",
+            "/pointset",
+            data,
+            {"Content-Type": "application/octet-stream"},
+            idempotent=False,
+        )
+        try:
+            return json.loads(body)["pointSetId"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise ConnectionError("invalid answer from PointSetManager") from e
+
+    async def _acquire(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Take an idle connection from the pool or open a new one.
+
+        Idle connections the manager already closed are dropped.
+        """
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer
+            writer.close()
+        return await self._connect()
+
+    async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Open a new connection."""
+        self.connections_opened += 1
+        return await asyncio.wait_for(
+            asyncio.open_connection(self._host, self._port, ssl=self._ssl or None),
+            self.timeout,
+        )
+
+    def _release(self, conn: tuple[asyncio.StreamReader, asyncio.StreamWriter]):
+        """Give a healthy connection back to the pool (or close it if full)."""
+        if len(self._idle) < self.pool_size:
+            self._idle.append(conn)
+        else:
+            conn[1].close()
+
+    async def _send(
+        self,
+        conn: tuple[asyncio.StreamReader, asyncio.StreamWriter],
+        method: str,
+        path: str,
+        body: bytes | None,
+        headers: dict[str, str] | None,
+    ) -> None:
+        """Send one request."""
+        writer = conn[1]
+        body = body or b""
+        lines = [
+            f"{method} {self._prefix + path} HTTP/1.1",
+            f"Host: {self._host_header}",
+            f"Content-Length: {len(body)}",
+        ]
+        lines.extend(f"{k}: {v}" for k, v in (headers or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        # written separately: a large PointSet body is not copied
+        writer.write(body)
+        await writer.drain()
+
+    async def _receive(
+        self, conn: tuple[asyncio.StreamReader, asyncio.StreamWriter]
+    ) -> tuple[int, str, bool, bytes]:
+        """Read one answer; return (status, reason, will_close, body)."""
+        reader = conn[0]
+        status_line = await reader.readline()
+        if not status_line:
+            raise http.client.RemoteDisconnected("connection closed by PointSetManager")
+        version, status, *reason = status_line.decode("latin-1").split(None, 2)
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        connection = response_headers.get("connection", "").lower()
+        will_close = connection == "close" or (
+            version == "HTTP/1.0" and connection != "keep-alive"
+        )
+        if "chunked" in response_headers.get("transfer-encoding", "").lower():
+            chunks = []
+            while size := int((await reader.readline()).split(b";")[0], 16):
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            data = b"".join(chunks)
+        elif "content-length" in response_headers:
+            data = await reader.readexactly(int(response_headers["content-length"]))
+        else:
+            data = await reader.read()
+            will_close = True
+        return int(status), "".join(reason).strip(), will_close, data
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+        *,
+        idempotent: bool,
+    ) -> bytes:
+        """Send a request with retries and return the body of a 200/201 answer."""
+        last_error: Exception | None = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+
+            conn = None
+            sent = False
+            try:
+                opened = self.connections_opened
+                conn = await self._acquire()
+                reused = self.connections_opened == opened
+                try:
+                    await asyncio.wait_for(
+                        self._send(conn, method, path, body, headers), self.timeout
+                    )
+                    sent = True
+                    status, reason, will_close, data = await asyncio.wait_for(
+                        self._receive(conn), self.timeout
+                    )
+                except _STALE_CONNECTION_ERRORS:
+                    if not reused or (sent and not idempotent):
+                        raise
+                    conn[1].close()
+                    conn = await self._connect()
+                    await asyncio.wait_for(
+                        self._send(conn, method, path, body, headers), self.timeout
+                    )
+                    status, reason, will_close, data = await asyncio.wait_for(
+                        self._receive(conn), self.timeout
+                    )
+            except (OSError, EOFError, ValueError) as e:
+                if conn is not None:
+                    conn[1].close()
+                last_error = e
+                if idempotent:
+                    continue
+                break
+
+            if will_close:
+                conn[1].close()
+            else:
+                self._release(conn)
+
+            if status in (200, 201):
+                return data
+            last_error = _status_error(status, reason, data)
+            if status not in _RETRY_STATUSES:
+                break
+
+        message = f"PointSetManager unavailable: {last_error}"
+        raise ConnectionError(message) from last_error
+
+
+def _split_base_url(base_url: str) -> tuple[bool, str, int | None, str]:
+    """Split a manager URL into (is_https, host, port, path prefix)."""
+    url = urlsplit(base_url)
+    if url.scheme not in ("http", "https") or not url.hostname:
+        raise ValueError(f"invalid PointSetManager URL: {base_url!r}")
+    return url.scheme == "https", url.hostname, url.port, url.path.rstrip("/")
+
+
+def _status_error(status: int, reason: str, data: bytes) -> Exception:
+    """Map an error answer to an exception.
+
+    404 and 400 raise `KeyError` and `ValueError` at once (never retried);
+    any other status is returned as a `ConnectionError` for the retry loop.
+    """
+    message = _error_message(data) or reason
+    if status == 404:
+        raise KeyError(message)
+    if status == 400:
+        raise ValueError(message)
+    return ConnectionError(f"PointSetManager answered {status}")
+
+
+def _error_message(data: bytes) -> str:
+    """Extract the ``message`` of a JSON error answer, if any."""
+    try:
+        return str(json.loads(data)["message"])
+    except (ValueError, KeyError, TypeError):
+        return ""
+
+
+_default_client: PointSetManagerClient | None = None
+_default_lock = threading.Lock()
+
+
+def get_default_client() -> PointSetManagerClient:
+    """Return the shared client, created from ``POINTSET_MANAGER_URL`` on first use."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            url = os.environ.get("POINTSET_MANAGER_URL", DEFAULT_URL)
+            _default_client = PointSetManagerClient(url)
+        return _default_client
+
 
 def decode_pointset(data: bytes) -> list[Point]:
-    """Decode a PointSet binary payload from the client."""
-    raise NotImplementedError
+    """Decode a PointSet binary payload from the client.
+
+    Unlike `TP.pointset.parse_pointset`, the payload must be exactly as long
+    as its header announces; otherwise `ValueError` is raised.
+    """
+    if len(data) < 4:
+        raise ValueError("PointSet payload shorter than its 4-byte header")
+    count = int.from_bytes(data[:4], "little")
+    if len(data) != 4 + 8 * count:
+        raise ValueError(
+            f"PointSet header announces {count} points but payload has "
+            f"{len(data) - 4} bytes"
+        )
+    return list(parse_pointset(data).points)
 
 
 def store_pointset(points: list[Point]) -> str:
     """Store a decoded PointSet and return its PointSetID."""
-    raise NotImplementedError
+    return get_default_client().store_pointset_bytes(PointSet(points=points).to_bytes())
 
 
 def register_pointset(data: bytes) -> str:
@@ -21,4 +512,4 @@ def register_pointset(data: bytes) -> str:
     2. Store the PointSet.
     3. Return the PointSetID to the client.
     """
-    raise NotImplementedError
+    return store_pointset(decode_pointset(data))
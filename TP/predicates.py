@@ -0,0 +1,190 @@
+"""Prédicats géométriques robustes : orientation et cercle circonscrit.
+
+Les deux tests sur lesquels reposent la triangulation et la localisation,
+évalués naïvement en flottants, peuvent se tromper de signe quand les points
+sont presque alignés (ou presque cocirculaires) : un triangle peut alors
+être inversé. Ici, chaque test est adaptatif, à la manière de Shewchuk
+(« Adaptive Precision Floating-Point Arithmetic and Fast Robust Geometric
+Predicates », 1997) :
+
+1. le déterminant est calculé en flottants, avec une borne de son erreur
+   d'arrondi (`ORIENT_ERROR_BOUND`, `INCIRCLE_ERROR_BOUND`) ;
+2. si sa valeur dépasse la borne, son signe est sûr : c'est le cas de
+   presque tous les appels, pour le coût de quelques opérations ;
+3. sinon, il est recalculé exactement en entiers (les flottants sont des
+   rationnels dyadiques), et seul son signe (-1.0, 0.0 ou 1.0) est retourné.
+
+`orientations` et `incircles` appliquent ces tests à des triangles entiers
+d'un coup (indices à plat, coordonnées en listes), sans appel de fonction
+par triangle dans le cas courant.
+"""
+
+from collections.abc import Sequence
+
+_EPSILON = 2.0**-53
+
+# bornes relatives de l'erreur d'arrondi (Shewchuk, ccwerrboundA et
+# iccerrboundA) ; la seconde est majorée pour s'appliquer à la borne
+# simplifiée ap * bp + bp * cp + cp * ap du permanent (cf. `incircle`)
+ORIENT_ERROR_BOUND = (3.0 + 16.0 * _EPSILON) * _EPSILON
+INCIRCLE_ERROR_BOUND = (11.0 + 128.0 * _EPSILON) * _EPSILON
+
+
+def orient2d(ax, ay, bx, by, cx, cy) -> float:
+    """Double de l'aire signée du triangle abc (> 0 si abc tourne à gauche).
+
+    Le signe est toujours exact ; près de zéro, seul le signe (-1.0, 0.0 ou
+    1.0) est retourné.
+    """
+    detleft = (bx - ax) * (cy - ay)
+    detright = (by - ay) * (cx - ax)
+    det = detleft - detright
+    bound = ORIENT_ERROR_BOUND * (abs(detleft) + abs(detright))
+    if det > bound or -det > bound:
+        return det
+    try:
+        return float(_orient_exact(ax, ay, bx, by, cx, cy))
+    except (OverflowError, ValueError):  # coordonnées infinies ou NaN
+        return det
+
+
+def incircle(ax, ay, bx, by, cx, cy, px, py) -> float:
+    """Déterminant du test du cercle circonscrit (abc dans le sens direct).
+
+    Positif si p est strictement dans le cercle circonscrit de abc, négatif
+    s'il est à l'extérieur, nul s'il est dessus. Le signe est toujours
+    exact ; près de zéro, seul le signe est retourné.
+    """
+    dx = ax - px
+    dy = ay - py
+    ex = bx - px
+    ey = by - py
+    fx = cx - px
+    fy = cy - py
+    ap = dx * dx + dy * dy
+    bp = ex * ex + ey * ey
+    cp = fx * fx + fy * fy
+    det = (
+        ap * (ex * fy - fx * ey)
+        + bp * (fx * dy - dx * fy)
+        + cp * (dx * ey - ex * dy)
+    )
+    # |ex * fy| + |fx * ey| <= (bp + cp) / 2, etc. : le permanent est
+    # majoré par ap * bp + bp * cp + cp * ap
+    bound = INCIRCLE_ERROR_BOUND * (ap * bp + bp * cp + cp * ap)
+    if det > bound or -det > bound:
+        return det
+    try:
+        return float(_incircle_exact(ax, ay, bx, by, cx, cy, px, py))
+    except (OverflowError, ValueError):  # coordonnées infinies ou NaN
+        return det
+
+
+def orientations(
+    xs: Sequence[float], ys: Sequence[float], triangles: Sequence[int]
+) -> list[int]:
+    """Signe de l'orientation (`orient2d`) de chaque triangle.
+
+    ``triangles`` contient les indices à plat (trois par triangle) dans
+    ``xs`` et ``ys``. Retourne 1 (sens direct), -1 (sens indirect) ou 0
+    (sommets alignés) par triangle.
+    """
+    signs = []
+    append = signs.append
+    for t in range(0, len(triangles) - 2, 3):
+        a, b, c = triangles[t], triangles[t + 1], triangles[t + 2]
+        ax = xs[a]
+        ay = ys[a]
+        detleft = (xs[b] - ax) * (ys[c] - ay)
+        detright = (ys[b] - ay) * (xs[c] - ax)
+        det = detleft - detright
+        bound = ORIENT_ERROR_BOUND * (abs(detleft) + abs(detright))
+        if det > bound:
+            append(1)
+        elif -det > bound:
+            append(-1)
+        else:
+            append(_sign(orient2d(ax, ay, xs[b], ys[b], xs[c], ys[c])))
+    return signs
+
+
+def incircles(
+    xs: Sequence[float],
+    ys: Sequence[float],
+    triangles: Sequence[int],
+    points: Sequence[int],
+) -> list[int]:
+    """Signe du test du cercle circonscrit (`incircle`) par triangle.
+
+    Le triangle k (indices ``triangles[3k : 3k + 3]``, sens direct) est
+    testé contre le point d'indice ``points[k]`` : 1 s'il est strictement
+    dans le cercle, -1 s'il est à l'extérieur, 0 s'il est dessus.
+    """
+    signs = []
+    append = signs.append
+    for t, p in zip(range(0, len(triangles) - 2, 3), points, strict=True):
+        a, b, c = triangles[t], triangles[t + 1], triangles[t + 2]
+        px = xs[p]
+        py = ys[p]
+        dx = xs[a] - px
+        dy = ys[a] - py
+        ex = xs[b] - px
+        ey = ys[b] - py
+        fx = xs[c] - px
+        fy = ys[c] - py
+        ap = dx * dx + dy * dy
+        bp = ex * ex + ey * ey
+        cp = fx * fx + fy * fy
+        det = (
+            ap * (ex * fy - fx * ey)
+            + bp * (fx * dy - dx * fy)
+            + cp * (dx * ey - ex * dy)
+        )
+        bound = INCIRCLE_ERROR_BOUND * (ap * bp + bp * cp + cp * ap)
+        if det > bound:
+            append(1)
+        elif -det > bound:
+            append(-1)
+        else:
+            append(
+                _sign(incircle(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c], px, py))
+            )
+    return signs
+
+
+def _sign(value: float) -> int:
+    """Signe de ``value`` (0 pour NaN)."""
+    return (value > 0) - (value < 0)
+
+
+def _integers(*values) -> list[int]:
+    """Coordonnées multipliées par un même facteur qui les rend entières."""
+    ratios = [v.as_integer_ratio() for v in values]
+    # les dénominateurs sont des puissances de 2 : le plus grand est multiple
+    # de tous les autres
+    scale = max(d for _, d in ratios)
+    return [n * (scale // d) for n, d in ratios]
+
+
+def _orient_exact(ax, ay, bx, by, cx, cy) -> int:
+    """Signe exact de `orient2d` (coordonnées finies)."""
+    ax, ay, bx, by, cx, cy = _integers(ax, ay, bx, by, cx, cy)
+    det = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+    return (det > 0) - (det < 0)
+
+
+def _incircle_exact(ax, ay, bx, by, cx, cy, px, py) -> int:
+    """Signe exact de `incircle` (coordonnées finies)."""
+    ax, ay, bx, by, cx, cy, px, py = _integers(ax, ay, bx, by, cx, cy, px, py)
+    dx = ax - px
+    dy = ay - py
+    ex = bx - px
+    ey = by - py
+    fx = cx - px
+    fy = cy - py
+    det = (
+        (dx * dx + dy * dy) * (ex * fy - fx * ey)
+        + (ex * ex + ey * ey) * (fx * dy - dx * fy)
+        + (fx * fx + fy * fy) * (dx * ey - ex * dy)
+    )
+    return (det > 0) - (det < 0)
@@ -0,0 +1,155 @@
+"""Dépôt local, sur disque, des PointSet et des triangulations encodés.
+
+`DiskStore` range chaque PointSet et chaque triangulation dans un fichier,
+dans le format binaire de l'API (en-tête de comptage puis float32 / entiers
+32 bits little-endian), et les relit par ``mmap`` : les pages sont chargées
+à la demande par le système et partagées avec son cache de fichiers, de
+sorte qu'un nœud peut garder bien plus de données que sa mémoire, et
+redémarrer sans rien redemander au PointSetManager ni recalculer.
+
+- Côté PointSet, le dépôt s'utilise comme client du PointSetManager
+  (``Triangulator(client=...)``) : `DiskStore.get_pointset` décode sans
+  copie (`TP.pointset.parse_pointset` en ``zero_copy``) et, avec un client
+  ``upstream``, les PointSet absents sont récupérés puis conservés.
+- Côté triangulations, ``Triangulator(store=...)`` conserve les résultats
+  encodés et sert les réponses en flux directement depuis la projection.
+
+Les écritures passent par un fichier temporaire renommé (``os.replace``) :
+un lecteur voit l'ancien ou le nouveau fichier, jamais un fichier partiel.
+"""
+
+import mmap
+import os
+import tempfile
+import uuid
+from pathlib import Path
+from urllib.parse import quote
+
+from TP.models import PointSet
+from TP.pointset import parse_pointset
+
+_HEADER_SIZE = 4
+
+
+class DiskStore:
+    """Fichiers de PointSet et de triangulations encodés sous ``root``.
+
+    ``upstream`` est un client du PointSetManager (méthodes
+    ``get_pointset_bytes`` et ``store_pointset_bytes``) interrogé pour les
+    PointSet absents du dépôt ; sans lui, seuls les PointSet enregistrés
+    localement sont connus. Les lectures retournent des ``memoryview`` sur
+    une projection en lecture seule, valables tant qu'on les référence.
+    """
+
+    def __init__(self, root: str | os.PathLike, upstream=None):
+        """Ouvrir (ou créer) le dépôt situé dans le répertoire ``root``."""
+        self.root = Path(root)
+        self.upstream = upstream
+        self._pointsets = self.root / "pointsets"
+        self._triangles = self.root / "triangles"
+        self._pointsets.mkdir(parents=True, exist_ok=True)
+        self._triangles.mkdir(parents=True, exist_ok=True)
+
+    # PointSet
+
+    def get_pointset_bytes(self, point_set_id: str) -> memoryview:
+        """PointSet encodé de ``point_set_id``, projeté depuis son fichier.
+
+        Lève `KeyError` s'il est inconnu (localement et, le cas échéant, de
+        ``upstream``).
+        """
+        path = self._path(self._pointsets, point_set_id)
+        data = _map(path)
+        if data is not None:
+            return data
+        if self.upstream is None:
+            raise KeyError(point_set_id)
+        _write(path, self.upstream.get_pointset_bytes(point_set_id))
+        return _map(path)
+
+    def get_pointset(self, point_set_id: str) -> PointSet:
+        """PointSet de ``point_set_id``, adossé sans copie à son fichier."""
+        return parse_pointset(self.get_pointset_bytes(point_set_id), zero_copy=True)
+
+    def put_pointset_bytes(self, point_set_id: str, data: bytes) -> None:
+        """Enregistrer le PointSet encodé ``data`` sous ``point_set_id``.
+
+        Lève `ValueError` si la taille de ``data`` ne correspond pas à son
+        en-tête.
+        """
+        _check_pointset(data)
+        _write(self._path(self._pointsets, point_set_id), data)
+
+    def store_pointset_bytes(self, data: bytes) -> str:
+        """Enregistrer un PointSet encodé et retourner son identifiant.
+
+        Avec ``upstream``, le PointSet est enregistré auprès du
+        PointSetManager, qui attribue l'identifiant ; sinon un UUID est tiré.
+        """
+        _check_pointset(data)
+        if self.upstream is not None:
+            point_set_id = self.upstream.store_pointset_bytes(data)
+        else:
+            point_set_id = str(uuid.uuid4())
+        _write(self._path(self._pointsets, point_set_id), data)
+        return point_set_id
+
+    # triangulations
+
+    def get_triangles_bytes(self, point_set_id: str) -> memoryview | None:
+        """Triangulation encodée de ``point_set_id``, ou ``None`` si absente."""
+        return _map(self._path(self._triangles, point_set_id))
+
+    def put_triangles_bytes(self, point_set_id: str, data: bytes) -> None:
+        """Enregistrer la triangulation encodée ``data`` de ``point_set_id``."""
+        _write(self._path(self._triangles, point_set_id), data)
+
+    def invalidate(self, point_set_id: str | None = None) -> None:
+        """Supprimer la triangulation de ``point_set_id`` (toutes si ``None``)."""
+        if point_set_id is None:
+            paths = list(self._triangles.glob("*.bin"))
+        else:
+            paths = [self._path(self._triangles, point_set_id)]
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _path(directory: Path, point_set_id: str) -> Path:
+        """Fichier d'un identifiant (échappé : il ne peut pas sortir du dépôt)."""
+        return directory / f"{quote(str(point_set_id), safe='')}.bin"
+
+
+def _check_pointset(data: bytes) -> None:
+    """Vérifier que la taille d'un PointSet encodé correspond à son en-tête."""
+    if len(data) < _HEADER_SIZE:
+        raise ValueError("PointSet payload shorter than its 4-byte header")
+    count = int.from_bytes(data[:_HEADER_SIZE], "little")
+    if len(data) != _HEADER_SIZE + 8 * count:
+        raise ValueError(
+            f"PointSet header announces {count} points but payload has "
+            f"{len(data) - _HEADER_SIZE} bytes"
+        )
+
+
+def _map(path: Path) -> memoryview | None:
+    """Projeter le fichier ``path`` en lecture seule, ou ``None`` s'il n'existe pas."""
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(b"")
+            # la projection survit à la fermeture du fichier
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    except FileNotFoundError:
+        return None
+
+
+def _write(path: Path, data) -> None:
+    """Écrire ``data`` dans ``path`` de façon atomique."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
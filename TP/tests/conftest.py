@@ -1,13 +1,182 @@
 """Pytest fixtures for triangulator tests.
 
-This module ensures the `TP` package directory is on sys.path so tests can
-import project modules (e.g. `from app import create_app`).
+Provides a local stand-in PointSetManager HTTP server for client tests and
+a helper to call ASGI applications in-process. Project modules are imported
+as `TP.<module>`, with the repository root on the path (``PYTHONPATH=.``).
 """
 
-import sys
-from pathlib import Path
+import json
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Ensure the TP package directory is importable during tests
-_PROJECT_ROOT = Path(__file__).resolve().parent.parent
-if str(_PROJECT_ROOT) not in sys.path:
-    sys.path.insert(0, str(_PROJECT_ROOT))
+import pytest
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # file d'attente de connexions assez longue pour les tests de charge
+    request_queue_size = 128
+
+
+class StandInPointSetManager:
+    """Serveur HTTP local jouant le rôle du PointSetManager.
+
+    Implémente ``GET /pointset/<id>`` et ``POST /pointset`` selon
+    `point_set_manager.yml`, avec des connexions persistantes (HTTP/1.1).
+    ``fail_statuses`` permet de simuler des pannes : chaque requête consomme
+    le premier statut de la liste et répond une erreur JSON avec ce code.
+    ``delay`` (en secondes) simule la latence d'une base de données distante
+    sur ``GET /pointset/<id>``. Avec ``drop_idle``, le serveur ferme chaque
+    connexion après sa réponse sans l'annoncer, comme à l'expiration de son
+    délai de keep-alive (``dropped`` compte ces fermetures). Avec
+    ``drop_unanswered``, ``POST /pointset`` enregistre le PointSet puis
+    ferme la connexion sans répondre.
+    """
+
+    def __init__(self):
+        """Démarrer le serveur sur un port libre de localhost."""
+        self.pointsets: dict[str, bytes] = {}
+        self.fail_statuses: list[int] = []
+        self.delay = 0.0
+        self.drop_idle = False
+        self.drop_unanswered = False
+        self.dropped = 0
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        """URL de base du serveur."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def close(self) -> None:
+        """Arrêter le serveur."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        manager = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                with manager._lock:
+                    manager.connections += 1
+                super().setup()
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                if manager.drop_idle:
+                    self.close_connection = True
+                    self.connection.shutdown(socket.SHUT_WR)
+                    with manager._lock:
+                        manager.dropped += 1
+
+            def _error(self, status, code, message):
+                body = json.dumps({"code": code, "message": message}).encode()
+                self._send(status, body, "application/json")
+
+            def _failure(self):
+                with manager._lock:
+                    manager.requests += 1
+                    if not manager.fail_statuses:
+                        return False
+                    status = manager.fail_statuses.pop(0)
+                self._error(status, "SIMULATED", "simulated failure")
+                return True
+
+            def do_GET(self):
+                if self._failure():
+                    return
+                if manager.delay:
+                    time.sleep(manager.delay)
+                point_set_id = self.path.rsplit("/", 1)[-1]
+                data = manager.pointsets.get(point_set_id)
+                if data is None:
+                    self._error(404, "NOT_FOUND", f"unknown PointSet {point_set_id}")
+                else:
+                    self._send(200, data, "application/octet-stream")
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self._failure():
+                    return
+                count = int.from_bytes(body[:4], "little")
+                if len(body) < 4 or len(body) != 4 + 8 * count:
+                    self._error(400, "BAD_REQUEST", "invalid PointSet payload")
+                    return
+                point_set_id = str(uuid.uuid4())
+                manager.pointsets[point_set_id] = body
+                if manager.drop_unanswered:
+                    self.close_connection = True
+                    return
+                payload = json.dumps({"pointSetId": point_set_id}).encode()
+                self._send(201, payload, "application/json")
+
+        return Handler
+
+
+@pytest.fixture
+def pointset_manager():
+    """PointSetManager local démarré pour la durée d'un test."""
+    manager = StandInPointSetManager()
+    yield manager
+    manager.close()
+
+
+async def _call_asgi(app, method, path, body=b"", headers=None, query=b""):
+    """Envoyer une requête à une application ASGI (statut, en-têtes, corps).
+
+    ``body`` peut être une liste de morceaux, envoyés en messages successifs.
+    """
+    chunks = body if isinstance(body, list) else [body]
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": k < len(chunks) - 1}
+        for k, chunk in enumerate(chunks)
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": [
+            (name.lower().encode(), value.encode())
+            for name, value in (headers or {}).items()
+        ],
+    }
+    await app(scope, receive, send)
+    headers = {k.decode(): v.decode() for k, v in sent[0]["headers"]}
+    return sent[0]["status"], headers, b"".join(m.get("body", b"") for m in sent[1:])
+
+
+@pytest.fixture
+def call_asgi():
+    """Coroutine ``call_asgi(app, method, path, body, headers, query)`` (app ASGI)."""
+    return _call_asgi
@@ -1,8 +1,29 @@
 """Integration tests for the Triangulator API and helpers."""
 
+import asyncio
+import gzip
+import json
+import socket
+import time
+import zlib
+
+import pytest
+
+from TP.admission import AdmissionController
 from TP.app import create_app
+from TP.asgi import create_asgi_app
+from TP.codec import decode_frames
+from TP.metrics import Metrics
 from TP.models import PointSet, Triangles
+from TP.pointset_manager_client import (
+    AsyncPointSetManagerClient,
+    PointSetManagerClient,
+    decode_pointset,
+    register_pointset,
+)
+from TP.store import DiskStore
 from TP.Triangulator import Triangulator
+from TP.wire import COMPACT_MEDIA_TYPE, decode_compact
 
 
 class FakePointSetManager:
@@ -204,3 +225,782 @@ def test_api_triangulate_manager_unavailable():
     assert "code" in body and "message" in body
 
 
+
+
+def test_api_triangulate_streaming_matches_buffered():
+    """Vérifie que la réponse en flux contient exactement les mêmes octets."""
+    manager = FakePointSetManager()
+    points = [(float(i % 7), float(i // 7)) for i in range(70)]
+    manager.save("grid", PointSet(points=points))
+    manager.save("empty", PointSet(points=[]))
+
+    triangulator = Triangulator()
+    triangulator.get_pointset = lambda pid: manager.get(pid)
+
+    buffered = create_app(triangulator).test_client()
+    # morceaux minuscules pour forcer plusieurs envois par bloc
+    streamed = create_app(triangulator, stream_chunk_size=64).test_client()
+
+    for pid in ("grid", "empty"):
+        r = streamed.get(f"/triangulate/{pid}")
+        assert r.status_code == 200
+        assert r.is_streamed
+        assert r.headers.get("Content-Type", "").startswith("application/octet-stream")
+        assert r.data == buffered.get(f"/triangulate/{pid}").data
+
+
+def test_api_triangulate_streaming_errors_stay_json():
+    """Vérifie qu'en mode flux les erreurs restent des réponses JSON classiques."""
+    triangulator = Triangulator()
+    triangulator.get_pointset = lambda pid: (_ for _ in ()).throw(KeyError("absent"))
+
+    client = create_app(triangulator, stream_chunk_size=1024).test_client()
+
+    r = client.get("/triangulate/absent")
+    assert r.status_code == 404
+    assert r.get_json()["code"] == "NOT_FOUND"
+
+
+# tests du client PointSetManager (serveur local de substitution)
+
+
+def test_client_store_then_get_pointset(pointset_manager):
+    """Vérifie l'aller-retour POST /pointset puis GET /pointset/<id>."""
+    points = [(0.0, 0.0), (1.0, 0.0), (0.0, 1.0)]
+
+    with PointSetManagerClient(pointset_manager.url) as client:
+        point_set_id = client.store_pointset_bytes(PointSet(points=points).to_bytes())
+        assert client.get_pointset(point_set_id).points == points
+
+
+def test_client_reuses_pooled_connections(pointset_manager):
+    """Vérifie que les requêtes successives réutilisent la même connexion."""
+    pointset_manager.pointsets["ps"] = PointSet(points=[(1.0, 2.0)]).to_bytes()
+
+    with PointSetManagerClient(pointset_manager.url, pool_size=2) as client:
+        for _ in range(20):
+            client.get_pointset("ps")
+        assert client.connections_opened == 1
+    assert pointset_manager.connections == 1
+
+    with PointSetManagerClient(pointset_manager.url, pool_size=0) as client:
+        for _ in range(5):
+            client.get_pointset("ps")
+        assert client.connections_opened == 5
+
+
+def test_client_maps_errors(pointset_manager):
+    """Vérifie la traduction des erreurs HTTP en exceptions Python."""
+    client = PointSetManagerClient(pointset_manager.url, retries=1, backoff=0)
+
+    with pytest.raises(KeyError):
+        client.get_pointset("inconnu")
+
+    with pytest.raises(ValueError):
+        client.store_pointset_bytes(b"\x05\x00\x00\x00")
+
+    pointset_manager.fail_statuses = [503, 503]
+    with pytest.raises(ConnectionError):
+        client.get_pointset("inconnu")
+
+
+def test_client_retries_transient_failures(pointset_manager):
+    """Vérifie qu'une panne passagère (503) est absorbée par les tentatives."""
+    pointset_manager.pointsets["ps"] = PointSet(points=[(1.0, 2.0)]).to_bytes()
+    pointset_manager.fail_statuses = [503, 503]
+
+    client = PointSetManagerClient(pointset_manager.url, retries=2, backoff=0)
+
+    assert client.get_pointset("ps").points == [(1.0, 2.0)]
+    assert pointset_manager.requests == 3
+
+
+def test_client_replaces_stale_pooled_connections(pointset_manager):
+    """Vérifie qu'une connexion fermée au repos est remplacée, même pour un POST."""
+    data = PointSet(points=[(1.0, 2.0)]).to_bytes()
+    pointset_manager.drop_idle = True
+
+    def idle(dropped):
+        # attendre que le serveur ait fermé la connexion de la requête
+        while pointset_manager.dropped < dropped:
+            time.sleep(0.001)
+
+    with PointSetManagerClient(pointset_manager.url, retries=0) as client:
+        ids = []
+        for k in range(3):
+            ids.append(client.store_pointset_bytes(data))
+            idle(k + 1)
+        assert client.get_pointset(ids[-1]).points == [(1.0, 2.0)]
+        assert client.connections_opened == 4
+    # chaque POST n'a été reçu qu'une fois
+    assert pointset_manager.requests == 4 and len(pointset_manager.pointsets) == 3
+
+    async def scenario():
+        url = pointset_manager.url
+        async with AsyncPointSetManagerClient(url, retries=0) as client:
+            point_set_id = await client.store_pointset_bytes(data)
+            while pointset_manager.dropped < 5:
+                await asyncio.sleep(0.001)
+            assert await client.store_pointset_bytes(data) != point_set_id
+            assert client.connections_opened == 2
+
+    asyncio.run(scenario())
+    assert pointset_manager.requests == 6
+
+
+def test_client_does_not_resend_a_post_the_manager_may_have_processed(
+    pointset_manager,
+):
+    """Vérifie qu'un POST sans réponse n'est pas renvoyé (pas de doublon).
+
+    Le PointSetManager enregistre le PointSet puis ferme une connexion
+    réutilisée sans répondre : le client ne peut pas savoir si le POST a
+    été traité, il le signale au lieu de le renvoyer.
+    """
+    data = PointSet(points=[(1.0, 2.0)]).to_bytes()
+    pointset_manager.pointsets["ps"] = data
+
+    with PointSetManagerClient(pointset_manager.url, retries=2, backoff=0) as client:
+        client.get_pointset_bytes("ps")
+        pointset_manager.drop_unanswered = True
+        with pytest.raises(ConnectionError):
+            client.store_pointset_bytes(data)
+        assert client.connections_opened == 1
+    assert len(pointset_manager.pointsets) == 2
+
+    async def scenario():
+        url = pointset_manager.url
+        async with AsyncPointSetManagerClient(url, retries=2, backoff=0) as client:
+            await client.get_pointset_bytes("ps")
+            with pytest.raises(ConnectionError):
+                await client.store_pointset_bytes(data)
+            assert client.connections_opened == 1
+
+    asyncio.run(scenario())
+    assert len(pointset_manager.pointsets) == 3
+    assert pointset_manager.requests == 4
+
+
+def test_client_unreachable_manager_is_connection_error():
+    """Vérifie qu'un PointSetManager injoignable donne une ConnectionError."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    client = PointSetManagerClient(f"http://127.0.0.1:{port}", retries=1, backoff=0)
+
+    with pytest.raises(ConnectionError):
+        client.get_pointset("ps")
+
+
+def test_api_triangulate_through_client(pointset_manager):
+    """Client -> PointSetManager (HTTP) -> Triangulator -> API, sans monkeypatch."""
+    pointset_manager.pointsets["ps1"] = PointSet(
+        points=[(0, 0), (1, 0), (1, 1), (0, 1)]
+    ).to_bytes()
+
+    client = PointSetManagerClient(pointset_manager.url, retries=0)
+    app = create_app(Triangulator(client=client)).test_client()
+
+    r = app.get("/triangulate/ps1")
+    assert r.status_code == 200
+    assert r.data[:4] == (4).to_bytes(4, "little")
+
+    assert app.get("/triangulate/absent").status_code == 404
+
+    pointset_manager.fail_statuses = [503]
+    r = app.get("/triangulate/ps1")
+    assert r.status_code == 503
+    assert r.get_json()["code"] == "SERVICE_UNAVAILABLE"
+
+
+def test_register_pointset_validates_payload():
+    """Vérifie que register_pointset refuse un en-tête incohérent avec le corps."""
+    with pytest.raises(ValueError):
+        register_pointset((3).to_bytes(4, "little") + bytes(8))
+    assert decode_pointset(PointSet(points=[(1.0, 2.0)]).to_bytes()) == [(1.0, 2.0)]
+
+
+def test_disk_store_restart_warm(pointset_manager, tmp_path):
+    """PointSetManager -> dépôt local -> API ; un nœud relancé ne refait rien."""
+    pointset_manager.pointsets["ps1"] = PointSet(
+        points=[(0, 0), (1, 0), (1, 1), (0, 1)]
+    ).to_bytes()
+
+    def node():
+        upstream = PointSetManagerClient(pointset_manager.url, retries=0)
+        store = DiskStore(tmp_path, upstream=upstream)
+        return create_app(
+            Triangulator(client=store, store=store), stream_chunk_size=16
+        ).test_client()
+
+    expected = node().get("/triangulate/ps1").data
+    assert expected[:4] == (4).to_bytes(4, "little")
+    assert pointset_manager.requests == 1
+
+    r = node().get("/triangulate/ps1")
+    assert r.status_code == 200 and r.data == expected
+    assert node().get("/triangulate/absent").status_code == 404
+    assert pointset_manager.requests == 2
+
+
+# tests de l'endpoint groupé
+
+
+def test_api_triangulate_batch_per_item_status():
+    """Vérifie POST /triangulate : un résultat par id, chacun avec son statut."""
+    manager = FakePointSetManager()
+    manager.save("small", PointSet(points=[(0, 0), (1, 0), (0, 1)]))
+    manager.save("square", PointSet(points=[(0, 0), (1, 0), (1, 1), (0, 1)]))
+
+    triangulator = Triangulator()
+    fetched = []
+    triangulator.get_pointset = lambda pid: fetched.append(pid) or manager.get(pid)
+    client = create_app(triangulator).test_client()
+
+    r = client.post(
+        "/triangulate", json={"pointSetIds": ["small", "absent", "square", "small"]}
+    )
+    assert r.status_code == 200
+    # sans cache, l'identifiant répété n'est tout de même calculé qu'une fois
+    assert sorted(fetched) == ["absent", "small", "square"]
+    assert r.headers.get("Content-Type", "").startswith("application/octet-stream")
+
+    frames = decode_frames(r.data)
+    assert [status for status, _ in frames] == [200, 404, 200, 200]
+    assert frames[0][1] == client.get("/triangulate/small").data
+    assert frames[2][1] == client.get("/triangulate/square").data
+    assert frames[3][1] == frames[0][1]
+    assert json.loads(frames[1][1])["code"] == "NOT_FOUND"
+
+
+def test_api_triangulate_batch_bad_body():
+    """Vérifie qu'un corps invalide donne une erreur 400 JSON."""
+    client = create_app(Triangulator()).test_client()
+
+    for body in ({"ids": ["a"]}, {"pointSetIds": "a"}, {"pointSetIds": [1, 2]}):
+        r = client.post("/triangulate", json=body)
+        assert r.status_code == 400
+        assert r.get_json()["code"] == "BAD_REQUEST"
+
+    r = client.post("/triangulate", data=b"not json")
+    assert r.status_code == 400
+
+
+def test_api_triangulate_batch_empty_list():
+    """Vérifie qu'une liste vide donne un corps ne contenant aucun résultat."""
+    client = create_app(Triangulator()).test_client()
+
+    r = client.post("/triangulate", json={"pointSetIds": []})
+    assert r.status_code == 200
+    assert decode_frames(r.data) == []
+
+
+def test_api_triangulate_delta():
+    """Vérifie PATCH /triangulate/<id> : modifications cumulées et erreurs."""
+    manager = FakePointSetManager()
+    manager.save("small", PointSet(points=[(0, 0), (1, 0), (0, 1)]))
+    triangulator = Triangulator()
+    triangulator.get_pointset = lambda pid: manager.get(pid)
+    client = create_app(triangulator).test_client()
+
+    r = client.patch("/triangulate/small", json={"insert": [[1, 1], [0.5, 0.25]]})
+    assert r.status_code == 200
+    assert r.headers.get("Content-Type", "").startswith("application/octet-stream")
+    assert r.data[:4] == (5).to_bytes(4, "little")
+
+    r = client.patch("/triangulate/small", json={"remove": [[0.5, 0.25]]})
+    assert r.data[:4] == (4).to_bytes(4, "little")
+    assert client.get("/triangulate/small").data[:4] == (3).to_bytes(4, "little")
+
+    for body in ({"insert": [[1]]}, {"remove": [[9, 9]]}, {"insert": "x"}):
+        r = client.patch("/triangulate/small", json=body)
+        assert r.status_code == 400
+        assert r.get_json()["code"] == "BAD_REQUEST"
+    assert client.patch("/triangulate/absent", json={}).status_code == 404
+
+
+# tests de la variante ASGI
+
+
+def test_async_client_store_get_and_errors(pointset_manager):
+    """Vérifie le client asynchrone : aller-retour, pool et erreurs."""
+    points = [(0.0, 0.0), (1.0, 0.0), (0.0, 1.0)]
+
+    async def scenario():
+        url = pointset_manager.url
+        async with AsyncPointSetManagerClient(url, retries=1, backoff=0) as client:
+            point_set_id = await client.store_pointset_bytes(
+                PointSet(points=points).to_bytes()
+            )
+            for _ in range(5):
+                assert (await client.get_pointset(point_set_id)).points == points
+            assert client.connections_opened == 1
+
+            with pytest.raises(KeyError):
+                await client.get_pointset("inconnu")
+            with pytest.raises(ValueError):
+                await client.store_pointset_bytes(b"\x05\x00\x00\x00")
+            pointset_manager.fail_statuses = [503, 503]
+            with pytest.raises(ConnectionError):
+                await client.get_pointset(point_set_id)
+
+    asyncio.run(scenario())
+
+
+def test_asgi_api_matches_flask_api(pointset_manager, call_asgi):
+    """Vérifie que la variante ASGI répond comme l'application Flask."""
+    pointset_manager.pointsets["ps1"] = PointSet(
+        points=[(0, 0), (1, 0), (1, 1), (0, 1)]
+    ).to_bytes()
+    flask_client = create_app(
+        Triangulator(client=PointSetManagerClient(pointset_manager.url, retries=0))
+    ).test_client()
+
+    async def scenario():
+        client = AsyncPointSetManagerClient(pointset_manager.url, retries=0)
+        app = create_asgi_app(Triangulator(), client=client)
+
+        status, headers, body = await call_asgi(app, "GET", "/triangulate/ps1")
+        assert status == 200
+        assert headers["content-type"] == "application/octet-stream"
+        assert body == flask_client.get("/triangulate/ps1").data
+
+        status, _, body = await call_asgi(app, "GET", "/triangulate/absent")
+        assert (status, json.loads(body)["code"]) == (404, "NOT_FOUND")
+
+        request = json.dumps({"pointSetIds": ["ps1", "absent"]}).encode()
+        status, _, body = await call_asgi(app, "POST", "/triangulate", request)
+        assert status == 200
+        assert [s for s, _ in decode_frames(body)] == [200, 404]
+
+        status, _, body = await call_asgi(app, "POST", "/triangulate", b"not json")
+        assert (status, json.loads(body)["code"]) == (400, "BAD_REQUEST")
+
+        delta = {"insert": [[0.5, 0.5]]}
+        request = json.dumps(delta).encode()
+        status, _, body = await call_asgi(app, "PATCH", "/triangulate/ps1", request)
+        assert status == 200
+        assert body == flask_client.patch("/triangulate/ps1", json=delta).data
+
+        pointset_manager.fail_statuses = [503]
+        status, _, body = await call_asgi(app, "GET", "/triangulate/ps1")
+        assert (status, json.loads(body)["code"]) == (503, "SERVICE_UNAVAILABLE")
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_asgi_coalesces_concurrent_requests(pointset_manager, call_asgi):
+    """Vérifie que des requêtes simultanées d'un PointSet partagent un calcul."""
+    pointset_manager.pointsets["ps"] = PointSet(
+        points=[(0, 0), (1, 0), (1, 1), (0, 1)]
+    ).to_bytes()
+    pointset_manager.delay = 0.05
+
+    async def scenario():
+        client = AsyncPointSetManagerClient(pointset_manager.url, retries=0)
+        app = create_asgi_app(Triangulator(), client=client)
+        for accept in ("application/octet-stream", COMPACT_MEDIA_TYPE):
+            headers = {"Accept": accept}
+            requests = [
+                call_asgi(app, "GET", "/triangulate/ps", headers=headers)
+                for _ in range(8)
+            ]
+            responses = await asyncio.gather(*requests)
+            assert {status for status, _, _ in responses} == {200}
+            assert len({body for _, _, body in responses}) == 1
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert pointset_manager.requests == 2
+
+
+def test_asgi_api_without_async_client(call_asgi):
+    """Sans client asynchrone, le calcul complet passe par l'exécuteur."""
+    manager = FakePointSetManager()
+    manager.save("small", PointSet(points=[(0, 0), (1, 0), (0, 1)]))
+    triangulator = Triangulator()
+    triangulator.get_pointset = lambda pid: manager.get(pid)
+    app = create_asgi_app(triangulator)
+
+    status, _, body = asyncio.run(call_asgi(app, "GET", "/triangulate/small"))
+    assert status == 200
+    assert body == triangulator.triangulate_bytes("small")
+
+    status, _, body = asyncio.run(call_asgi(app, "GET", "/triangulate/absent"))
+    assert (status, json.loads(body)["code"]) == (404, "NOT_FOUND")
+
+
+def test_api_metrics_per_stage_and_requests():
+    """Vérifie l'export Prometheus des étapes, requêtes, octets et du cache."""
+    manager = FakePointSetManager()
+    manager.save("square", PointSet(points=[(0, 0), (1, 0), (1, 1), (0, 1)]))
+    triangulator = Triangulator(cache_max_bytes=1 << 20)
+    triangulator.get_pointset = lambda pid: manager.get(pid)
+    client = create_app(triangulator).test_client()
+
+    sent = len(client.get("/triangulate/square").data)
+    sent += len(client.get("/triangulate/square").data)
+    assert client.get("/triangulate/absent").status_code == 404
+
+    metrics = triangulator.metrics
+    # la récupération de l'identifiant inconnu, en échec, est chronométrée aussi
+    assert metrics.value("triangulator_stage_seconds", stage="get_pointset") == 2
+    for stage in ("dedup", "triangulate", "encode"):
+        assert metrics.value("triangulator_stage_seconds", stage=stage) == 1
+    assert metrics.value("triangulator_output_triangles") == 1
+    assert metrics.value("triangulator_errors_total", code="NOT_FOUND") == 1
+    route = "/triangulate/<point_set_id>"
+    assert metrics.value("triangulator_request_seconds", route=route) == 3
+    assert metrics.value(
+        "triangulator_requests_total", route=route, method="GET", status=200
+    ) == 2
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    text = r.get_data(as_text=True)
+    assert "# TYPE triangulator_stage_seconds histogram" in text
+    assert 'triangulator_stage_seconds_count{stage="dedup"} 1' in text
+    assert (
+        'triangulator_requests_total{method="GET",route="/triangulate/<point_set_id>",'
+        'status="404"} 1'
+    ) in text
+    assert "triangulator_cache_hits_total 1" in text
+    assert "triangulator_cache_misses_total 2" in text
+    assert metrics.value("triangulator_response_bytes_total") >= sent
+
+    # flux : les octets sont comptés à l'envoi
+    streamed = create_app(triangulator, stream_chunk_size=16).test_client()
+    before = metrics.value("triangulator_response_bytes_total")
+    body = streamed.get("/triangulate/square").data
+    assert metrics.value("triangulator_response_bytes_total") == before + len(body)
+
+
+def test_api_metrics_disabled():
+    """Vérifie qu'avec l'instrumentation désactivée rien n'est enregistré."""
+    triangulator = Triangulator(metrics=Metrics(enabled=False))
+    triangulator.get_pointset = lambda pid: PointSet(points=[(0, 0), (1, 0), (0, 1)])
+    client = create_app(triangulator).test_client()
+
+    assert client.get("/triangulate/a").status_code == 200
+    assert triangulator.metrics.value("triangulator_stage_seconds", stage="dedup") == 0
+    text = client.get("/metrics").get_data(as_text=True)
+    assert "triangulator_stage_seconds" not in text
+    assert "triangulator_requests_total" not in text
+
+
+def test_asgi_api_metrics(call_asgi):
+    """Vérifie la route /metrics et les métriques des requêtes en ASGI."""
+    manager = FakePointSetManager()
+    manager.save("small", PointSet(points=[(0, 0), (1, 0), (0, 1)]))
+    triangulator = Triangulator()
+    triangulator.get_pointset = lambda pid: manager.get(pid)
+    app = create_asgi_app(triangulator)
+
+    async def scenario():
+        await call_asgi(app, "GET", "/triangulate/small")
+        await call_asgi(app, "GET", "/triangulate/absent")
+        return await call_asgi(app, "GET", "/metrics")
+
+    status, headers, body = asyncio.run(scenario())
+    assert status == 200
+    assert headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = body.decode()
+    assert 'triangulator_stage_seconds_count{stage="triangulate"} 1' in text
+    assert 'triangulator_errors_total{code="NOT_FOUND"} 1' in text
+    assert (
+        'triangulator_requests_total{method="GET",route="/triangulate/<point_set_id>",'
+        'status="200"} 1'
+    ) in text
+
+
+def test_api_triangulate_negotiated_formats(call_asgi):
+    """Vérifie les formats compacts et compressés négociés (Flask et ASGI)."""
+    manager = FakePointSetManager()
+    manager.save("square", PointSet(points=[(0, 0), (1, 0), (1, 1), (0, 1)]))
+    triangulator = Triangulator(cache_max_bytes=1 << 20)
+    triangulator.get_pointset = lambda pid: manager.get(pid)
+    client = create_app(triangulator, stream_chunk_size=16).test_client()
+    r = client.get("/triangulate/square")
+    assert r.headers["Vary"] == "Accept, Accept-Encoding"
+    raw = r.data
+    compact = "application/vnd.triangulator.compact; indices=u16"
+
+    r = client.get("/triangulate/square", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["Content-Type"] == "application/octet-stream"
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in r.headers["Vary"]
+    assert gzip.decompress(r.data) == raw
+
+    r = client.get("/triangulate/square", headers={"Accept": compact})
+    assert r.status_code == 200
+    assert r.headers["Content-Type"] == compact
+    assert "Content-Encoding" not in r.headers
+    vertices, _, triangles = decode_compact(r.data)
+    assert len(triangles) == 2 and len(vertices) == 4
+
+    r = client.get(
+        "/triangulate/square",
+        headers={"Accept": "application/vnd.triangulator.compact; indices=u8"},
+    )
+    assert (r.status_code, r.get_json()["code"]) == (400, "BAD_REQUEST")
+    r = client.get("/triangulate/absent", headers={"Accept": compact})
+    assert (r.status_code, r.get_json()["code"]) == (404, "NOT_FOUND")
+
+    app = create_asgi_app(triangulator)
+    headers = {"Accept": compact, "Accept-Encoding": "deflate"}
+    status, response_headers, body = asyncio.run(
+        call_asgi(app, "GET", "/triangulate/square", headers=headers)
+    )
+    assert status == 200
+    assert response_headers["content-type"] == compact
+    assert response_headers["content-encoding"] == "deflate"
+    assert zlib.decompress(body) == zlib.decompress(
+        client.get("/triangulate/square", headers=headers).data
+    )
+    assert response_headers["vary"] == "Accept, Accept-Encoding"
+    status, response_headers, body = asyncio.run(
+        call_asgi(app, "GET", "/triangulate/square", headers={"Accept": "text/html"})
+    )
+    assert status == 200 and body == raw
+    assert response_headers["vary"] == "Accept, Accept-Encoding"
+
+
+def test_asgi_api_negotiated_formats_with_async_client(pointset_manager, call_asgi):
+    """Formats négociés en ASGI avec le client asynchrone du PointSetManager."""
+    points = [(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]
+    pointset_manager.pointsets["ps1"] = PointSet(points=points).to_bytes()
+    omit = "application/vnd.triangulator.compact; indices=varint; vertices=omit"
+
+    async def scenario():
+        client = AsyncPointSetManagerClient(pointset_manager.url, retries=0)
+        app = create_asgi_app(Triangulator(), client=client)
+        accept = {"Accept": omit}
+        first = await call_asgi(app, "GET", "/triangulate/ps1", headers=accept)
+        full = await call_asgi(
+            app,
+            "GET",
+            "/triangulate/ps1",
+            headers={"Accept": "application/vnd.triangulator.compact"},
+        )
+        await client.aclose()
+        return first, full
+
+    (status, headers, body), (_, _, full) = asyncio.run(scenario())
+    assert status == 200 and headers["content-type"] == omit
+    vertices, n_vertices, triangles = decode_compact(body)
+    assert vertices is None and n_vertices == len(points)
+    assert len(triangles) == 2 and all(4 not in t for t in triangles)
+    assert len(decode_compact(full)[2]) == 2
+
+
+# tests de l'ingestion POST /pointset
+
+
+def test_api_upload_pointset_then_triangulate(tmp_path):
+    """POST /pointset enregistre le PointSet ; ``?triangulate=1`` le triangule."""
+    data = PointSet(points=[(0, 0), (1, 0), (1, 1), (0, 1)]).to_bytes()
+    store = DiskStore(tmp_path)
+    triangulator = Triangulator(client=store)
+    fetched = []
+    get_pointset = store.get_pointset
+    store.get_pointset = lambda pid: fetched.append(pid) or get_pointset(pid)
+    client = create_app(triangulator).test_client()
+
+    r = client.post("/pointset", data=data)
+    assert r.status_code == 201
+    point_set_id = r.get_json()["pointSetId"]
+    assert r.headers["Location"] == f"/triangulate/{point_set_id}"
+    expected = client.get(r.headers["Location"]).data
+    assert expected[:4] == (4).to_bytes(4, "little")
+    assert fetched == [point_set_id]
+
+    r = client.post("/pointset?triangulate=1", data=data)
+    assert r.status_code == 201
+    assert r.headers["Content-Type"] == "application/octet-stream"
+    assert r.headers["Vary"] == "Accept, Accept-Encoding"
+    assert r.data == expected and len(fetched) == 1
+    assert r.headers["Location"] == f"/triangulate/{r.headers['PointSet-Id']}"
+    assert store.get_pointset_bytes(r.headers["PointSet-Id"]) == data
+
+    compact = "application/vnd.triangulator.compact"
+    r = client.post(
+        "/pointset?triangulate=true", data=data, headers={"Accept": compact}
+    )
+    assert r.status_code == 201 and r.headers["Content-Type"].startswith(compact)
+    assert len(decode_compact(r.data)[2]) == 2 and len(fetched) == 1
+
+    for query, body in (("", data[:-1]), ("?triangulate=2", data), ("", b"\1")):
+        r = client.post(f"/pointset{query}", data=body)
+        assert (r.status_code, r.get_json()["code"]) == (400, "BAD_REQUEST")
+
+    r = create_app(Triangulator()).test_client().post("/pointset", data=data)
+    assert (r.status_code, r.get_json()["code"]) == (404, "NOT_FOUND")
+
+
+def test_asgi_upload_pointset_in_chunks(pointset_manager, call_asgi, tmp_path):
+    """POST /pointset en ASGI, corps en plusieurs messages, client sync ou async."""
+    data = PointSet(points=[(0, 0), (1, 0), (1, 1), (0, 1)]).to_bytes()
+    chunks = [data[:3], data[3:10], b"", data[10:]]
+
+    app = create_asgi_app(Triangulator(client=DiskStore(tmp_path)))
+    status, headers, body = asyncio.run(call_asgi(app, "POST", "/pointset", chunks))
+    assert status == 201
+    point_set_id = json.loads(body)["pointSetId"]
+    assert headers["location"] == f"/triangulate/{point_set_id}"
+    status, _, expected = asyncio.run(call_asgi(app, "GET", headers["location"]))
+    assert status == 200 and expected[:4] == (4).to_bytes(4, "little")
+
+    status, headers, body = asyncio.run(
+        call_asgi(app, "POST", "/pointset", chunks, query=b"triangulate=1")
+    )
+    assert status == 201 and body == expected
+    assert headers["content-type"] == "application/octet-stream"
+    assert headers["vary"] == "Accept, Accept-Encoding"
+    assert headers["location"] == f"/triangulate/{headers['pointset-id']}"
+
+    status, _, body = asyncio.run(call_asgi(app, "POST", "/pointset", chunks[:2]))
+    assert (status, json.loads(body)["code"]) == (400, "BAD_REQUEST")
+
+    async def scenario():
+        client = AsyncPointSetManagerClient(pointset_manager.url, retries=0)
+        app = create_asgi_app(Triangulator(), client=client)
+        result = await call_asgi(
+            app, "POST", "/pointset", chunks, query=b"triangulate=1"
+        )
+        await client.aclose()
+        return result
+
+    status, headers, body = asyncio.run(scenario())
+    assert status == 201 and body == expected
+    assert pointset_manager.pointsets[headers["pointset-id"]] == data
+    assert pointset_manager.requests == 1
+
+
+# tests du préchauffage en arrière-plan
+
+
+def test_api_warmup_then_warm_requests(tmp_path):
+    """POST /pointset et POST /warmup préchauffent ; GET /warmup en rend compte."""
+    data = PointSet(points=[(0, 0), (1, 0), (1, 1), (0, 1)]).to_bytes()
+    store = DiskStore(tmp_path)
+    store.put_pointset_bytes("known", data)
+    triangulator = Triangulator(client=store, store=store, warmup_workers=2)
+    client = create_app(triangulator).test_client()
+
+    point_set_id = client.post("/pointset", data=data).get_json()["pointSetId"]
+    r = client.post("/warmup", json={"pointSetIds": ["known", "absent"], "priority": 3})
+    assert (r.status_code, r.get_json()) == (202, {"queued": 2})
+    assert triangulator.warmup.join(timeout=5)
+    assert triangulator.is_warm(point_set_id) and triangulator.is_warm("known")
+
+    assert client.get(f"/triangulate/{point_set_id}").status_code == 200
+    assert client.get("/triangulate/absent").status_code == 404
+    stats = client.get("/warmup").get_json()
+    assert stats["warmed"] == 2 and stats["failed"] == 1
+    assert (stats["requests"], stats["hits"], stats["queued"]) == (1, 1, 0)
+    assert "triangulator_warmup_hits_total 1" in client.get("/metrics").text
+
+    for body in ({"pointSetIds": "known"}, {"pointSetIds": [], "priority": "high"}):
+        r = client.post("/warmup", json=body)
+        assert (r.status_code, r.get_json()["code"]) == (400, "BAD_REQUEST")
+    disabled = create_app(Triangulator()).test_client()
+    announce = {"pointSetIds": ["known"]}
+    for r in (disabled.get("/warmup"), disabled.post("/warmup", json=announce)):
+        assert (r.status_code, r.get_json()["code"]) == (404, "NOT_FOUND")
+    triangulator.warmup.close()
+
+
+def test_asgi_warmup(call_asgi, tmp_path):
+    """Routes de préchauffage de la variante ASGI."""
+    store = DiskStore(tmp_path)
+    store.put_pointset_bytes("ps", PointSet(points=[(0, 0), (1, 0), (0, 1)]).to_bytes())
+    triangulator = Triangulator(client=store, store=store, warmup_workers=1)
+    app = create_asgi_app(triangulator)
+
+    body = json.dumps({"pointSetIds": ["ps"]}).encode()
+    status, headers, payload = asyncio.run(call_asgi(app, "POST", "/warmup", body))
+    assert (status, json.loads(payload)) == (202, {"queued": 1})
+    assert headers["content-type"] == "application/json"
+    assert triangulator.warmup.join(timeout=5)
+    assert asyncio.run(call_asgi(app, "GET", "/triangulate/ps"))[0] == 200
+
+    status, _, payload = asyncio.run(call_asgi(app, "GET", "/warmup"))
+    stats = json.loads(payload)
+    assert status == 200 and stats["hit_ratio"] == 1.0 and stats["warmed"] == 1
+    status, _, payload = asyncio.run(call_asgi(app, "DELETE", "/warmup"))
+    assert status == 405
+    triangulator.warmup.close()
+
+    disabled = create_asgi_app(Triangulator())
+    for method in ("GET", "POST"):
+        status, _, payload = asyncio.run(call_asgi(disabled, method, "/warmup", body))
+        assert (status, json.loads(payload)["code"]) == (404, "NOT_FOUND")
+
+
+def test_asgi_shared_results_with_async_client(pointset_manager, call_asgi):
+    """PointSet identiques via le client asynchrone : un seul calcul partagé."""
+    data = PointSet(points=[(0, 0), (1, 0), (1, 1), (0, 1)]).to_bytes()
+    pointset_manager.pointsets["ps1"] = data
+    pointset_manager.pointsets["ps2"] = data
+    triangulator = Triangulator(cache_max_bytes=1 << 20, share_results=True)
+    compact = {"Accept": "application/vnd.triangulator.compact"}
+
+    async def scenario():
+        client = AsyncPointSetManagerClient(pointset_manager.url, retries=0)
+        app = create_asgi_app(triangulator, client=client)
+        responses = [
+            await call_asgi(app, "GET", "/triangulate/ps1"),
+            await call_asgi(app, "GET", "/triangulate/ps2"),
+            await call_asgi(app, "GET", "/triangulate/ps2"),
+            await call_asgi(app, "GET", "/triangulate/ps1", headers=compact),
+            await call_asgi(app, "GET", "/triangulate/ps2", headers=compact),
+        ]
+        await client.aclose()
+        return [body for _, _, body in responses]
+
+    first, second, again, compact1, compact2 = asyncio.run(scenario())
+    assert first == second == again and first[:4] == (4).to_bytes(4, "little")
+    assert compact1 == compact2
+    assert pointset_manager.requests == 2  # une récupération par identifiant
+    stats = triangulator.results.stats()
+    assert (stats["contents"], stats["shared"]) == (1, 1)
+    assert len(triangulator.cache) == 2  # défaut + compact, une fois chacun
+
+
+# tests du contrôle d'admission
+
+
+def test_api_overloaded_is_503_with_retry_after(call_asgi):
+    """Voie des gros calculs saturée : 503 et Retry-After ; les petits passent."""
+    admission = AdmissionController(1_000, small_cost=10, max_queue=0)
+    pointsets = {
+        "large": PointSet(points=[(i % 7, i // 7) for i in range(50)]),
+        "small": PointSet(points=[(0, 0), (1, 0), (0, 1)]),
+    }
+    triangulator = Triangulator(admission=admission)
+    triangulator.get_pointset = lambda pid: pointsets[pid]
+    client = create_app(triangulator, stream_chunk_size=64).test_client()
+    app = create_asgi_app(triangulator)
+
+    with admission.acquire(1_000):
+        r = client.get("/triangulate/large")
+        assert r.status_code == 503
+        assert r.get_json()["code"] == "SERVICE_UNAVAILABLE"
+        assert int(r.headers["Retry-After"]) >= 1
+        assert client.get("/triangulate/small").status_code == 200
+
+        status, headers, body = asyncio.run(
+            call_asgi(app, "GET", "/triangulate/large")
+        )
+        assert status == 503 and json.loads(body)["code"] == "SERVICE_UNAVAILABLE"
+        assert headers["content-type"] == "application/json"
+        assert int(headers["retry-after"]) >= 1
+
+    assert client.get("/triangulate/large").status_code == 200
+    text = client.get("/metrics").text
+    assert "triangulator_admission_rejected_total 2" in text
+    assert 'triangulator_errors_total{code="SERVICE_UNAVAILABLE"} 2' in text
@@ -1,74 +1,73 @@
 """Tests de performance pour le triangulateur."""
 
+import asyncio
+import math
+import os
+import random
 import statistics
+import struct
+import threading
 import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
+from TP.admission import AdmissionController
+from TP.api import UPLOAD_CHUNK_SIZE, PointSetUpload
+from TP.app import create_app
+from TP.asgi import create_asgi_app
+from TP.benchmarks.suite import (
+    CASES,
+    DISTRIBUTIONS,
+    STARTUP_CASES,
+    compare,
+    run_startup,
+    run_suite,
+)
+from TP.dedup import dedup_points
+from TP.delaunay import delaunay_triangles
+from TP.executor import ProcessPoolBackend
+from TP.locate import OUTSIDE, PointLocator
+from TP.mesh import IncrementalMesh
+from TP.metrics import Metrics
 from TP.models import PointSet, Triangles
+from TP.outofcore import triangulate_file
+from TP.parallel import ParallelBackend
+from TP.pointset import parse_pointset
+from TP.pointset_manager_client import (
+    AsyncPointSetManagerClient,
+    PointSetManagerClient,
+)
+from TP.predicates import incircle, incircles, orient2d, orientations
+from TP.store import DiskStore
 from TP.Triangulator import Triangulator
+from TP.wire import WireFormat, encode_as
 
 pytestmark = pytest.mark.perf  
 
 
-def test_perf_triangulate_100_points():
-    """Test la vitesse de triangulate sur 100 points."""
-    # crée 100 points simples
-    points = []
-    for i in range(100):
-        points.append((i * 0.1, i * 0.1))
-
-    tri = Triangulator()
-    tri.get_pointset = lambda pid: PointSet(points=points)
-
-    start = time.time()
-    res = tri.triangulate("x")
-    end = time.time()
-
-    # vérifie juste que ça renvoie bien des triangles
-    assert isinstance(res, Triangles)
-
-    assert (end - start) < 0.5  # moins d'une demi seconde
-
-
-
-def test_perf_triangulate_1000_points():
-    """Test la vitesse de triangulate sur 1000 points."""
-    # crée 1000 points simples
-    points = []
-    for i in range(1000):
-        points.append((i * 0.1, i * 0.1))
-
-    tri = Triangulator()
-    tri.get_pointset = lambda pid: PointSet(points=points)
-
-    start = time.time()
-    res = tri.triangulate("x")
-    end = time.time()
-
-    # vérifie juste que ça renvoie bien des triangles
-    assert isinstance(res, Triangles)
-
-    assert (end - start) < 1  # moins d'une seconde
+def test_benchmark_suite_covers_every_case_and_distribution():
+    """Vérifie que la suite de benchmarks mesure chaque cas sur chaque distribution.
 
+    Remplace les anciennes mesures isolées à seuil fixe : les temps sont des
+    médianes d'échantillons répétés après échauffement, et leur suivi se fait
+    par comparaison à une ligne de base (``make bench``).
+    """
+    results = run_suite([300, 3000], repeat=3, max_time=1.0)
 
-def test_perf_encode_triangles():
-    """Test la vitesse de encode_triangles."""
-    verts = [(0.0, 0.0), (1.0, 0.0), (0.0, 1.0)]
-    tris = [(0, 1, 2)]
-
-    obj = Triangles(sommets=verts, triangles=tris)
-
-    tri = Triangulator()
-
-    start = time.time()
-    data = tri.encode_triangles(obj)
-    end = time.time()
-
-    # encode doit renvoyer des bytes
-    assert isinstance(data, bytes)
+    assert len(results) == len(CASES) * len(DISTRIBUTIONS) * 2
+    for stats in results.values():
+        assert 0 < stats["min"] <= stats["median"] <= stats["max"]
+        assert stats["runs"] >= 3
+    rows = compare(results, results)
+    assert {status for *_, status in rows} == {"ok"}
 
-    assert (end - start) < 0.2
+    # l'encodage de triangles, en O(n), ne doit pas croître plus vite que n
+    for distribution in DISTRIBUTIONS:
+        small = results[f"encode_triangles/{distribution}/300"]["median"]
+        large = results[f"encode_triangles/{distribution}/3000"]["median"]
+        assert large < 30 * small
 
 
 def test_scaling_triangulate_linear():
@@ -103,3 +102,873 @@ def test_scaling_triangulate_linear():
 
     # le max/min des temps par point ne doit pas dépasser 2x
     assert max(rates) / min(rates) < 2
+
+
+def test_scaling_triangulate_nlogn():
+    """Vérifie que 'triangulate' croît en O(n log n) jusqu'à 1M de points.
+
+    Contrairement au test précédent (points alignés, aucun triangle), les
+    points sont tirés uniformément dans le carré unité pour exercer le moteur
+    de Delaunay. On compare le temps rapporté à n log n pour chaque taille :
+    un algorithme quadratique ferait exploser ce ratio d'un facteur ~100
+    entre 10k et 1M points.
+    """
+    sizes = [10_000, 100_000, 1_000_000]
+    rng = random.Random(0)
+    rates = []
+
+    for n in sizes:
+        points = [(rng.random(), rng.random()) for _ in range(n)]
+
+        tri = Triangulator()
+        tri.get_pointset = lambda pid, pts=points: PointSet(points=pts)
+
+        # une seule mesure pour 1M de points, sinon la médiane de 3
+        run_times = []
+        for _ in range(1 if n >= 1_000_000 else 3):
+            start = time.perf_counter()
+            res = tri.triangulate("x")
+            run_times.append(time.perf_counter() - start)
+
+        # 2n - h - 2 triangles, h étant petit devant n
+        assert len(res.triangles) > 2 * n - 100
+        rates.append(statistics.median(run_times) / (n * math.log(n)))
+
+    assert max(rates) / min(rates) < 3
+
+
+def test_perf_parse_pointset_1m_points():
+    """Compare le décodage d'1M de points : liste de tuples et zero_copy.
+
+    Le mode liste doit être au moins 2x plus rapide que l'ancien décodage
+    point par point (`_parse_point_by_point`) ; le mode zero_copy ne décode
+    rien et doit être au moins 100x plus rapide que le mode liste.
+    """
+    n = 1_000_000
+    data = n.to_bytes(4, "little") + bytes(8 * n)
+
+    eager = parse_pointset(data)
+
+    start = time.perf_counter()
+    lazy = parse_pointset(data, zero_copy=True)
+    t_lazy = time.perf_counter() - start
+
+    assert len(eager.points) == len(lazy.points) == n
+    assert _parse_point_by_point(data) == eager.points
+    t_eager, t_old = _best_times(
+        lambda: parse_pointset(data), lambda: _parse_point_by_point(data), repeat=3
+    )
+    assert t_eager < t_old / 2, (t_eager, t_old)
+    assert t_lazy * 100 < t_eager
+
+
+def _parse_point_by_point(data):
+    """Ancien décodage de `parse_pointset`, un `struct.unpack_from` par coordonnée."""
+    points = []
+    offset = 4
+    for _ in range(int.from_bytes(data[:4], "little")):
+        x = struct.unpack_from("<f", data, offset)[0]
+        y = struct.unpack_from("<f", data, offset + 4)[0]
+        points.append((x, y))
+        offset += 8
+    return points
+
+
+def _allocated_bytes(build):
+    """Mesure la mémoire encore allouée par l'objet renvoyé par build()."""
+    tracemalloc.start()
+    try:
+        obj = build()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del obj
+    return current
+
+
+@pytest.mark.parametrize("n", [10_000, 100_000, 1_000_000])
+def test_memory_compact_models(n):
+    """Compare l'empreinte mémoire des modèles en listes et en stockage compact.
+
+    Le stockage compact doit rester proche de 8 octets par point et de
+    20 octets par (sommet + triangle), et être au moins 5x plus petit que
+    les listes de tuples (~110 octets par point).
+    """
+
+    def points():
+        rng = random.Random(n)
+        return [(rng.random(), rng.random()) for _ in range(n)]
+
+    def triangles():
+        return Triangles(vertices=points(), triangles=[(i, 0, i) for i in range(n)])
+
+    list_bytes = _allocated_bytes(lambda: PointSet(points=points()))
+    ps = PointSet(points=points())
+    compact_bytes = _allocated_bytes(ps.compact)
+
+    assert compact_bytes < 8 * n * 1.1 + 1024
+    assert list_bytes > 10 * compact_bytes
+
+    list_bytes = _allocated_bytes(triangles)
+    t = triangles()
+    compact_bytes = _allocated_bytes(t.compact)
+
+    assert compact_bytes < 20 * n * 1.1 + 1024
+    assert list_bytes > 5 * compact_bytes
+
+
+def test_perf_encode_1m_triangles():
+    """Encode 1M de triangles (et 500k sommets) en une opération groupée.
+
+    L'encodage se fait en une passe : depuis des listes de tuples, il doit
+    battre un `struct.pack` par sommet et par triangle (`_encode_item_by_item`)
+    ; depuis le stockage compact, il doit être au moins 10x plus rapide.
+    """
+    n = 1_000_000
+    verts = [(i * 0.5, i * 0.25) for i in range(n // 2)]
+    tris = [(i % (n // 2), (i + 1) % (n // 2), (i + 2) % (n // 2)) for i in range(n)]
+    obj = Triangles(vertices=verts, triangles=tris)
+    tri = Triangulator()
+
+    start = time.perf_counter()
+    data = tri.encode_triangles(obj)
+    t_list = time.perf_counter() - start
+
+    compact = obj.compact()
+    start = time.perf_counter()
+    data_compact = tri.encode_triangles(compact)
+    t_compact = time.perf_counter() - start
+
+    assert len(data) == 4 + 8 * (n // 2) + 4 + 12 * n
+    assert data_compact == data
+    assert _encode_item_by_item(obj) == data
+    t_list, t_old = _best_times(
+        lambda: tri.encode_triangles(obj), lambda: _encode_item_by_item(obj), repeat=3
+    )
+    assert t_list < t_old, (t_list, t_old)
+    assert t_compact * 10 < t_list, (t_compact, t_list)
+
+
+def _encode_item_by_item(triangles):
+    """Encodage de référence, un `struct.pack` par sommet et par triangle."""
+    vertex = struct.Struct("<2f").pack
+    triangle = struct.Struct("<3I").pack
+    return b"".join(
+        [
+            len(triangles.vertices).to_bytes(4, "little"),
+            *(vertex(x, y) for x, y in triangles.vertices),
+            len(triangles.triangles).to_bytes(4, "little"),
+            *(triangle(a, b, c) for a, b, c in triangles.triangles),
+        ]
+    )
+
+
+def _measure_response(client, url):
+    """Temps jusqu'au premier octet, pic mémoire et taille d'une réponse."""
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        resp = client.get(url, buffered=False)
+        chunks = iter(resp.response)
+        first = next(chunks)
+        ttfb = time.perf_counter() - start
+        size = len(first) + sum(len(c) for c in chunks)
+        resp.close()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return ttfb, peak, size
+
+
+def test_perf_streaming_response_memory_and_ttfb():
+    """Compare la réponse en flux à la réponse encodée d'un bloc (1M triangles).
+
+    La triangulation est court-circuitée pour ne mesurer que l'encodage et
+    l'envoi. En flux, le premier octet doit partir au moins 10x plus tôt et
+    le pic mémoire rester au moins 10x plus bas que la taille du résultat.
+    """
+    n = 1_000_000
+    res = Triangles(
+        vertices=[(i * 0.5, i * 0.25) for i in range(n // 2)],
+        triangles=[(i % (n // 2), (i + 1) % (n // 2), 0) for i in range(n)],
+    )
+    tri = Triangulator()
+    tri.triangulate = lambda pid, **kwargs: res
+
+    buffered = create_app(tri).test_client()
+    streamed = create_app(tri, stream_chunk_size=64 * 1024).test_client()
+
+    ttfb_buf, peak_buf, size_buf = _measure_response(buffered, "/triangulate/x")
+    ttfb_str, peak_str, size_str = _measure_response(streamed, "/triangulate/x")
+
+    assert size_buf == size_str == 4 + 8 * (n // 2) + 4 + 12 * n
+    assert peak_buf > size_buf
+    assert peak_str * 10 < size_str
+    assert ttfb_str * 10 < ttfb_buf
+
+
+def _requests_per_second(client, n, threads):
+    """Débit (requêtes/s) de n GET /pointset répartis sur plusieurs threads."""
+    def worker(count):
+        for _ in range(count):
+            client.get_pointset_bytes("ps")
+
+    workers = [
+        threading.Thread(target=worker, args=(n // threads,)) for _ in range(threads)
+    ]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return n / (time.perf_counter() - start)
+
+
+def test_perf_client_pooling_throughput(pointset_manager):
+    """Compare le débit du client avec et sans connexions persistantes.
+
+    Sans pool, chaque requête paie l'établissement d'une connexion TCP (et,
+    côté serveur local, la création d'un thread) : le pool doit être plus
+    rapide, en séquentiel comme avec 4 threads concurrents.
+    """
+    pointset_manager.pointsets["ps"] = PointSet(
+        points=[(float(i), float(i)) for i in range(1000)]
+    ).to_bytes()
+
+    for threads in (1, 4):
+        with PointSetManagerClient(pointset_manager.url, pool_size=threads) as c:
+            pooled = _requests_per_second(c, 400, threads)
+        with PointSetManagerClient(pointset_manager.url, pool_size=0) as c:
+            unpooled = _requests_per_second(c, 400, threads)
+
+        assert pooled > unpooled
+
+
+def test_perf_batch_endpoint_throughput():
+    """Compare le débit de POST /triangulate (par lots de 100) à GET unitaire.
+
+    Pour 1000 petits PointSet, l'endpoint groupé évite le coût HTTP et Flask
+    par ensemble : il doit traiter au moins 1.5x plus d'ensembles par seconde.
+    """
+    rng = random.Random(0)
+    sets = {
+        f"ps{i}": PointSet(points=[(rng.random(), rng.random()) for _ in range(10)])
+        for i in range(1000)
+    }
+    tri = Triangulator()
+    tri.get_pointset = lambda pid: sets[pid]
+    client = create_app(tri).test_client()
+    ids = list(sets)
+
+    start = time.perf_counter()
+    for pid in ids:
+        assert client.get(f"/triangulate/{pid}").status_code == 200
+    single_rate = len(ids) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(0, len(ids), 100):
+        r = client.post("/triangulate", json={"pointSetIds": ids[i : i + 100]})
+        assert r.status_code == 200
+    batch_rate = len(ids) / (time.perf_counter() - start)
+
+    assert batch_rate > 1.5 * single_rate
+
+
+def test_perf_process_pool_keeps_requests_responsive():
+    """Vérifie qu'une grosse triangulation dans le pool n'affame pas les autres.
+
+    Pendant qu'un PointSet de 200 000 points est triangulé par le
+    `ProcessPoolBackend`, le thread principal (qui ne fait qu'attendre le
+    résultat) doit pouvoir servir des petites requêtes à un rythme normal.
+    """
+    rng = random.Random(0)
+    big = PointSet(points=[(rng.random(), rng.random()) for _ in range(200_000)])
+    small = PointSet(points=[(rng.random(), rng.random()) for _ in range(10)])
+    sets = {"big": big, "small": small}
+
+    def small_latency(tri):
+        start = time.perf_counter()
+        for _ in range(50):
+            tri.triangulate("small")
+        return (time.perf_counter() - start) / 50
+
+    with ProcessPoolBackend(threshold=100_000, max_workers=1) as backend:
+        tri = Triangulator(backend=backend)
+        tri.get_pointset = lambda pid: sets[pid]
+        backend.triangulate(big.points[:100])  # démarrage du processus
+        idle = small_latency(tri)
+
+        worker = threading.Thread(target=tri.triangulate, args=("big",))
+        worker.start()
+        while not backend.stats()["in_flight"]:
+            time.sleep(0.001)
+        busy = small_latency(tri)
+        assert backend.stats()["in_flight"] == 1
+        worker.join()
+
+    assert busy < 5 * idle + 0.001
+    assert backend.stats()["completed"] == 2
+
+
+def _percentiles(latencies):
+    """p50, p95 et p99 (en secondes) d'une liste de latences."""
+    q = statistics.quantiles(latencies, n=100)
+    return q[49], q[94], q[98]
+
+
+def test_perf_asgi_concurrent_latency(pointset_manager, call_asgi):
+    """Compare les latences sous charge concurrente : ASGI contre Flask.
+
+    64 requêtes arrivent en même temps ; le PointSetManager met 50 ms à
+    répondre. L'application Flask est servie par 8 threads, qui restent
+    bloqués pendant chaque récupération ; la variante ASGI attend toutes les
+    récupérations en parallèle dans une seule boucle. Sa latence p95 (file
+    d'attente comprise) doit être au moins 2x plus basse.
+    """
+    rng = random.Random(0)
+    for i in range(64):
+        pointset_manager.pointsets[f"ps{i}"] = PointSet(
+            points=[(rng.random(), rng.random()) for _ in range(20)]
+        ).to_bytes()
+    pointset_manager.delay = 0.05
+    ids = [f"ps{i}" for i in range(64)]
+
+    client = PointSetManagerClient(pointset_manager.url, pool_size=8)
+    flask_app = create_app(Triangulator(client=client)).test_client()
+
+    def flask_request(pid, start):
+        assert flask_app.get(f"/triangulate/{pid}").status_code == 200
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=8) as server:
+        start = time.perf_counter()
+        futures = [server.submit(flask_request, pid, start) for pid in ids]
+        flask_latencies = [f.result() for f in futures]
+    client.close()
+
+    async def asgi_load():
+        async with AsyncPointSetManagerClient(pointset_manager.url) as client:
+            app = create_asgi_app(Triangulator(), client=client)
+
+            async def asgi_request(pid, start):
+                status, _, _ = await call_asgi(app, "GET", f"/triangulate/{pid}")
+                assert status == 200
+                return time.perf_counter() - start
+
+            start = time.perf_counter()
+            return await asyncio.gather(*(asgi_request(pid, start) for pid in ids))
+
+    asgi_latencies = asyncio.run(asgi_load())
+
+    flask_p = _percentiles(flask_latencies)
+    asgi_p = _percentiles(asgi_latencies)
+    assert asgi_p[1] * 2 < flask_p[1], (
+        "latences p50/p95/p99 (ms) : flask "
+        + "/".join(f"{1000 * v:.0f}" for v in flask_p)
+        + ", asgi "
+        + "/".join(f"{1000 * v:.0f}" for v in asgi_p)
+    )
+
+
+def _dedup_point_by_point(points):
+    """Ancien nettoyage de `Triangulator.triangulate`, point par point."""
+    cleaned = []
+    seen = set()
+    for p in points:
+        try:
+            x, y = float(p[0]), float(p[1])
+        except Exception:
+            continue
+        key = (x, y)
+        if key in seen:
+            continue
+        seen.add(key)
+        cleaned.append(key)
+    return cleaned
+
+
+def _best_times(*fns, repeat: int = 5) -> list[float]:
+    """Meilleurs temps (secondes) de ``repeat`` appels de chaque fonction.
+
+    Les appels sont alternés, pour que la charge de la machine pèse autant
+    sur chaque mesure.
+    """
+    best = [float("inf")] * len(fns)
+    for _ in range(repeat):
+        for k, fn in enumerate(fns):
+            start = time.perf_counter()
+            fn()
+            best[k] = min(best[k], time.perf_counter() - start)
+    return best
+
+
+def test_perf_dedup_1m_points():
+    """Compare le dédoublonnage à l'ancienne boucle point par point, à 1M de points.
+
+    Le PointSet est décodé comme le fait le client du PointSetManager
+    (`PointArray`) : sans doublon, avec 1 000 doublons, ou avec un -0.0,
+    `dedup_points` hache les motifs binaires des points et doit prendre
+    moins de 75 % du temps de la boucle (meilleur de 5 mesures alternées).
+    Sur une liste de tuples, le hachage d'un tuple par point domine dans les
+    deux cas : le dédoublonnage ne doit pas y être sensiblement plus lent.
+    """
+    rng = random.Random(0)
+    n = 1_000_000
+    raw = [(rng.random(), rng.random()) for _ in range(n)]
+    duplicates = raw[: n - 1000] + raw[:1000]
+
+    for name, points in (
+        ("unique", raw),
+        ("duplicates", duplicates),
+        ("negative_zero", [(-0.0, 0.5), *raw[1:]]),
+    ):
+        data = PointSet(points=points).to_bytes()
+        points = parse_pointset(data, zero_copy=True).points
+        expected = _dedup_point_by_point(points)
+        cleaned, index_map = dedup_points(points)
+        assert cleaned == expected, name
+        assert len(index_map) == n
+        del expected, cleaned, index_map
+
+        t_new, t_old = _best_times(
+            lambda: dedup_points(points),  # noqa: B023
+            lambda: _dedup_point_by_point(points),  # noqa: B023
+        )
+        assert t_new < 0.75 * t_old, (name, t_new, t_old)
+
+    points = duplicates
+    cleaned, index_map = dedup_points(points)
+    assert len(cleaned) == n - 1000 and index_map[-1] == 999
+    t_new, t_old = _best_times(
+        lambda: dedup_points(points), lambda: _dedup_point_by_point(points)
+    )
+    assert t_new < 1.25 * t_old, ("list", t_new, t_old)
+
+
+def test_perf_incremental_edits_vs_rebuilds():
+    """Compare 1 000 modifications d'un point à 1 000 triangulations complètes.
+
+    Sur 1 000 points, chaque modification (une insertion ou une suppression,
+    en alternance) est appliquée à une `IncrementalMesh` ; la référence
+    re-triangule tout l'ensemble modifié. Les modifications doivent être au
+    moins 10 fois plus rapides.
+    """
+    rng = random.Random(0)
+    points = [(rng.random(), rng.random()) for _ in range(1000)]
+    edits = []
+    for i in range(1000):
+        if i % 2 == 0:
+            edits.append(("insert", (rng.random(), rng.random())))
+        else:
+            edits.append(("remove", edits[-1][1]))
+
+    mesh = IncrementalMesh(points)
+    start = time.perf_counter()
+    for op, (x, y) in edits:
+        if op == "insert":
+            mesh.insert(x, y)
+        else:
+            mesh.remove(x, y)
+    t_edits = time.perf_counter() - start
+
+    current = list(points)
+    start = time.perf_counter()
+    for op, point in edits:
+        if op == "insert":
+            current.append(point)
+        else:
+            current.pop()
+        delaunay_triangles(current)
+    t_rebuilds = time.perf_counter() - start
+
+    assert len(mesh) == len(current)
+    assert t_edits * 10 < t_rebuilds
+
+
+def test_perf_point_locator_1m_queries():
+    """Mesure 1M de requêtes (localisation et plus proche sommet), 100k sommets.
+
+    Les réponses d'un échantillon sont vérifiées par force brute ; chaque
+    requête doit coûter en moyenne au moins 100x moins que cette recherche
+    exhaustive en O(n).
+    """
+    rng = random.Random(0)
+    raw = [(rng.random(), rng.random()) for _ in range(100_000)]
+    points = parse_pointset(PointSet(points=raw).to_bytes(), zero_copy=True).points
+    triangles = delaunay_triangles(points)
+    locator = PointLocator(Triangles(vertices=points, triangles=triangles))
+    queries = [(rng.random(), rng.random()) for _ in range(1_000_000)]
+
+    start = time.perf_counter()
+    located = locator.locate(queries)
+    t_locate = time.perf_counter() - start
+
+    start = time.perf_counter()
+    nearest = locator.nearest(queries)
+    t_nearest = time.perf_counter() - start
+
+    for (qx, qy), t in zip(queries[:1000], located, strict=False):
+        if t != OUTSIDE:
+            a, b, c = (points[i] for i in triangles[t])
+            signs = [orient2d(*p, *r, qx, qy) for p, r in ((a, b), (b, c), (c, a))]
+            assert min(signs) >= 0 or max(signs) <= 0
+    start = time.perf_counter()
+    for q, v in zip(queries[:20], nearest, strict=False):
+        distances = [(x - q[0]) ** 2 + (y - q[1]) ** 2 for x, y in points]
+        assert distances[v] == min(distances)
+    t_brute = (time.perf_counter() - start) / 20
+    assert t_locate / len(queries) < t_brute / 100, (t_locate, t_brute)
+    assert t_nearest / len(queries) < t_brute / 100, (t_nearest, t_brute)
+
+
+def test_memory_disk_store_maps_without_copy(tmp_path):
+    """Vérifie qu'un PointSet de 1M de points se relit du disque sans copie.
+
+    Le PointSet (8 Mo) et sa triangulation encodée sont projetés : ni leur
+    relecture ni le parcours de la réponse en flux n'allouent plus de
+    quelques kilo-octets par morceau.
+    """
+    n = 1_000_000
+    rng = random.Random(0)
+    data = PointSet(points=[(rng.random(), rng.random()) for _ in range(n)]).to_bytes()
+    store = DiskStore(tmp_path)
+    store.put_pointset_bytes("ps", data)
+    store.put_triangles_bytes("ps", data)
+    tri = Triangulator(store=store)
+
+    def read():
+        ps = store.get_pointset("ps")
+        return ps, ps.points[n - 1]
+
+    assert _allocated_bytes(read) < 64 * 1024
+
+    def stream():
+        return sum(map(len, tri.iter_triangulate_bytes("ps", 64 * 1024)))
+
+    tracemalloc.start()
+    try:
+        assert stream() == len(data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 1 << 20
+
+
+def test_memory_pointset_upload_single_copy():
+    """Vérifie qu'un envoi de 1M de points n'occupe qu'une fois sa taille.
+
+    Avec Content-Length, le tampon est alloué d'après l'en-tête (qui doit
+    concorder) et les morceaux y sont copiés au fil de l'eau : le pic reste
+    proche de la taille du corps (8 Mo), loin des copies successives d'une
+    concaténation.
+    """
+    n = 1_000_000
+    data = PointSet(points=[(float(i), 0.5) for i in range(n)]).to_bytes()
+    chunks = [
+        data[i : i + UPLOAD_CHUNK_SIZE] for i in range(0, len(data), UPLOAD_CHUNK_SIZE)
+    ]
+
+    tracemalloc.start()
+    try:
+        upload = PointSetUpload(len(data))
+        for chunk in chunks:
+            upload.feed(chunk)
+        body = upload.finish()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert body == data
+    assert peak < len(data) * 1.1
+
+
+def test_memory_out_of_core_bounded_by_tile(tmp_path):
+    """Vérifie que la triangulation hors mémoire tient dans son budget de tuile.
+
+    Avec des tuiles de 2 000 points, le pic de mémoire pour 20 000 points
+    reste bien en dessous de celui de la triangulation en mémoire.
+    """
+    n = 20_000
+    rng = random.Random(0)
+    src, dst = tmp_path / "in.bin", tmp_path / "out.bin"
+    data = PointSet(points=[(rng.random(), rng.random()) for _ in range(n)]).to_bytes()
+    src.write_bytes(data)
+    points = parse_pointset(data, zero_copy=True).points
+
+    def peak(build):
+        tracemalloc.start()
+        try:
+            result = build()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return result, peak
+
+    count, out_of_core = peak(lambda: triangulate_file(src, dst, tile_points=2_000))
+    triangles, in_memory = peak(lambda: delaunay_triangles(points))
+    assert count == len(triangles)
+    assert out_of_core < in_memory / 2
+
+
+def test_perf_parallel_strips_speedup():
+    """Vérifie l'accélération de la triangulation par bandes sur 200 000 points.
+
+    Avec un processus par cœur, le découpage et la couture coûtent peu : le
+    temps reste proche du séquentiel sur un seul cœur et s'en écarte nettement
+    à partir de quatre (courbes complètes : ``python -m TP.benchmarks.parallel``).
+    """
+    rng = random.Random(0)
+    points = [(rng.random(), rng.random()) for _ in range(200_000)]
+    start = time.perf_counter()
+    expected = delaunay_triangles(points)
+    sequential = time.perf_counter() - start
+
+    workers = os.cpu_count() or 1
+    with ParallelBackend(threshold=0, max_workers=workers) as backend:
+        backend.triangulate(points[:100])  # démarrage des processus
+        start = time.perf_counter()
+        triangles = backend.triangulate(points)
+        parallel = time.perf_counter() - start
+
+    assert len(triangles) == len(expected)
+    assert parallel < 1.5 * sequential
+    if workers >= 4:
+        assert parallel < sequential / 1.5
+
+
+def test_perf_metrics_overhead():
+    """Vérifie le faible coût de l'instrumentation par requête.
+
+    Une requête chronomètre cinq étapes et met à jour quelques compteurs :
+    une fois désactivé, cela ne coûte presque rien (hors appel). Activé, le
+    coût reste négligeable devant une petite requête réelle (100 points) :
+    moins de 10 % de plus que la même requête sans instrumentation. Les
+    deux variantes sont mesurées en alternance (meilleur temps) pour
+    qu'une machine chargée les ralentisse autant l'une que l'autre.
+    """
+    def request(metrics):
+        for stage in ("get_pointset", "dedup", "triangulate", "encode", "store"):
+            with metrics.stage(stage):
+                pass
+        metrics.observe("triangulator_input_points", 1000)
+        metrics.inc("triangulator_requests_total", route="/r", status=200)
+        metrics.inc("triangulator_response_bytes_total", 4096)
+
+    def per_request(metrics, n=20_000):
+        start = time.perf_counter()
+        for _ in range(n):
+            request(metrics)
+        return (time.perf_counter() - start) / n
+
+    enabled = per_request(Metrics())
+    disabled = per_request(Metrics(enabled=False))
+    assert disabled < enabled / 3
+
+    rng = random.Random(0)
+    ps = PointSet(points=[(rng.random(), rng.random()) for _ in range(100)])
+    triangulators = []
+    for metrics in (Metrics(), Metrics(enabled=False)):
+        triangulator = Triangulator(metrics=metrics)
+        triangulator.get_pointset = lambda pid: ps
+        triangulators.append(triangulator)
+    best = [float("inf")] * 2
+    for _ in range(15):
+        for k, triangulator in enumerate(triangulators):
+            start = time.perf_counter()
+            for _ in range(20):
+                triangulator.triangulate_bytes("id")
+            best[k] = min(best[k], time.perf_counter() - start)
+    assert best[0] < 1.10 * best[1], best
+
+
+def test_perf_compact_wire_format_size():
+    """Vérifie le gain de taille du format compact sur 50 000 points.
+
+    Le format par défaut coûte 12 octets d'indices par triangle ; le codage
+    varint doit descendre sous 6 (sous 8 sans les sommets, dont la
+    numérotation d'origine est conservée), la réponse compressée sous la
+    moitié du format par défaut, pour moins d'un tiers du temps de la
+    triangulation.
+    """
+    rng = random.Random(0)
+    points = [(rng.random(), rng.random()) for _ in range(50_000)]
+    start = time.perf_counter()
+    result = Triangles(vertices=points, triangles=delaunay_triangles(points))
+    t_triangulate = time.perf_counter() - start
+    n = len(result.triangles)
+    vertex_bytes = 8 + 8 * len(points)
+
+    start = time.perf_counter()
+    varint = encode_as(result, WireFormat(compact=True))
+    elapsed = time.perf_counter() - start
+    gzipped = encode_as(result, WireFormat(compact=True, compression="gzip"))
+    omit = encode_as(result, WireFormat(compact=True, vertices=False))
+
+    assert (len(varint) - vertex_bytes) / n < 6
+    assert (len(omit) - 13) / n < 8
+    assert len(gzipped) < 0.5 * (vertex_bytes + 12 * n)
+    assert elapsed < t_triangulate / 3, (elapsed, t_triangulate)
+
+
+def test_perf_predicates_batches():
+    """Vérifie le débit des prédicats robustes par lots (300 000 triangles).
+
+    Le calcul exact n'intervient que près des cas dégénérés : sur des points
+    aléatoires, les lots ne doivent pas coûter plus qu'un appel de
+    `orient2d` ou `incircle` par triangle.
+    """
+    rng = random.Random(0)
+    n = 100_000
+    xs = [rng.random() for _ in range(n)]
+    ys = [rng.random() for _ in range(n)]
+    flat = [rng.randrange(n) for _ in range(3 * 300_000)]
+    queries = [rng.randrange(n) for _ in range(300_000)]
+
+    triples = list(zip(flat[0::3], flat[1::3], flat[2::3], strict=True))
+
+    def orient_calls():
+        return [
+            orient2d(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c]) for a, b, c in triples
+        ]
+
+    def incircle_calls():
+        return [
+            incircle(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c], xs[p], ys[p])
+            for (a, b, c), p in zip(triples, queries, strict=True)
+        ]
+
+    signs = orientations(xs, ys, flat)
+    inside = incircles(xs, ys, flat, queries)
+    assert len(signs) == len(inside) == 300_000
+    orient_time, orient_ref, incircle_time, incircle_ref = _best_times(
+        lambda: orientations(xs, ys, flat),
+        orient_calls,
+        lambda: incircles(xs, ys, flat, queries),
+        incircle_calls,
+        repeat=3,
+    )
+    assert orient_time < 1.2 * orient_ref, (orient_time, orient_ref)
+    assert incircle_time < 1.2 * incircle_ref, (incircle_time, incircle_ref)
+
+
+def test_perf_startup_import_and_first_request():
+    """Vérifie le démarrage à froid d'un worker (imports, première requête).
+
+    Le cœur (`TP.Triangulator`) se charge sans Flask, nettement plus vite
+    que l'application Flask ; servir la première requête ne doit pas
+    ajouter plus de la moitié du temps d'import de l'application (suivi :
+    ``make bench``, clés ``startup/*``).
+    """
+    results = run_startup(repeat=3)
+
+    assert set(results) == {f"startup/{case}" for case in STARTUP_CASES}
+    core = results["startup/import_core"]["median"]
+    assert core < 0.7 * results["startup/import_flask_app"]["median"]
+    flask_app = results["startup/import_flask_app"]["median"]
+    assert results["startup/first_request"]["median"] < 1.5 * flask_app
+
+
+def test_perf_warmed_first_request_latency():
+    """Vérifie qu'un PointSet annoncé d'avance est servi sans calcul.
+
+    La première requête sur un PointSet de 100k points paie sinon sa
+    triangulation ; préchauffé, il est servi depuis le cache.
+    """
+    rng = random.Random(0)
+    data = PointSet(points=[(rng.random(), rng.random()) for _ in range(100_000)])
+    pointsets = {"cold": data, "warm": data}
+    triangulator = Triangulator(cache_max_bytes=64 << 20, warmup_workers=1)
+    triangulator.get_pointset = lambda pid: pointsets[pid]
+    client = create_app(triangulator).test_client()
+
+    triangulator.warmup.schedule(["warm"])
+    assert triangulator.warmup.join(timeout=60)
+
+    def first_request(point_set_id):
+        start = time.perf_counter()
+        assert client.get(f"/triangulate/{point_set_id}").status_code == 200
+        return time.perf_counter() - start
+
+    cold = first_request("cold")
+    warm = first_request("warm")
+    assert warm < cold / 10
+    assert triangulator.warmup.stats()["hit_ratio"] == 1.0
+    triangulator.warmup.close()
+
+
+def test_perf_shared_results_skip_recomputation():
+    """Vérifie que des PointSet identiques sous 5 identifiants ne coûtent qu'un calcul.
+
+    Le partage ajoute l'empreinte du contenu (BLAKE2b, quelques ms pour
+    100k points) mais évite 4 triangulations sur 5.
+    """
+    rng = random.Random(0)
+    data = PointSet(points=[(rng.random(), rng.random()) for _ in range(100_000)])
+    data = parse_pointset(data.to_bytes(), zero_copy=True)
+    ids = [f"copy-{k}" for k in range(5)]
+
+    def run(share_results):
+        triangulator = Triangulator(
+            cache_max_bytes=64 << 20, share_results=share_results
+        )
+        triangulator.get_pointset = lambda pid: data
+        start = time.perf_counter()
+        results = [triangulator.triangulate_bytes(pid) for pid in ids]
+        return time.perf_counter() - start, results, triangulator
+
+    unshared, expected, _ = run(False)
+    shared, results, triangulator = run(True)
+    assert results == expected
+    assert shared < unshared / 3
+    stats = triangulator.results.stats()
+    assert stats["dedup_ratio"] == 0.8
+    assert stats["saved_seconds"] > unshared / 5
+
+
+def test_perf_admission_bounds_burst_of_large_requests():
+    """Vérifie qu'une rafale de gros calculs reste dans le budget.
+
+    Huit requêtes de 100k points arrivent ensemble : une seule est calculée
+    à la fois (budget de 150k points), deux attendent, les autres sont
+    refusées tout de suite (503), au moins 4x plus vite que le plus rapide
+    des calculs. Pendant ce temps, les petites requêtes passent par leur
+    propre voie.
+    """
+    rng = random.Random(0)
+    large = PointSet(points=[(rng.random(), rng.random()) for _ in range(100_000)])
+    small = PointSet(points=[(rng.random(), rng.random()) for _ in range(100)])
+    admission = AdmissionController(150_000, max_queue=2, queue_timeout=60)
+    triangulator = Triangulator(admission=admission)
+    triangulator.get_pointset = lambda pid: small if pid == "small" else large
+    app = create_app(triangulator)
+
+    peak = 0
+    done = threading.Event()
+
+    def watch():
+        nonlocal peak
+        while not done.is_set():
+            peak = max(peak, admission.stats()["large_active"])
+            time.sleep(0.001)
+
+    def request(point_set_id):
+        start = time.perf_counter()
+        status = app.test_client().get(f"/triangulate/{point_set_id}").status_code
+        return status, time.perf_counter() - start
+
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        burst = [pool.submit(request, f"large-{k}") for k in range(8)]
+        time.sleep(0.2)
+        smalls = [request("small") for _ in range(5)]
+        results = [f.result() for f in burst]
+    done.set()
+    watcher.join()
+
+    statuses = sorted(status for status, _ in results)
+    assert statuses == [200] * 3 + [503] * 5
+    rejected = max(elapsed for status, elapsed in results if status == 503)
+    computed = min(elapsed for status, elapsed in results if status == 200)
+    assert rejected < computed / 4, (rejected, computed)
+    assert all(status == 200 for status, _ in smalls)
+    assert peak == 100_000
@@ -1,9 +1,44 @@
 """Tests unitaires pour le Triangulator."""
 
+import random
 import struct
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
 
+import pytest
+
+from TP.admission import AdmissionController, Overloaded
+from TP.api import PointSetUpload, error_info, upload_mode
+from TP.benchmarks.suite import compare, measure
+from TP.cache import ResultCache, SharedResults, content_key
+from TP.codec import TriangleArray, encode_triangles
+from TP.dedup import DROPPED, dedup_points
+from TP.delaunay import delaunay_triangles
+from TP.executor import ProcessPoolBackend
+from TP.locate import OUTSIDE, PointLocator
+from TP.mesh import IncrementalMesh
+from TP.metrics import Metrics
 from TP.models import PointSet, Triangles
-from TP.Triangulator import Triangulator
+from TP.outofcore import triangulate_file
+from TP.parallel import ParallelBackend, triangulate_strips
+from TP.pointset import encode_pointset, parse_pointset
+from TP.predicates import incircle, incircles, orient2d, orientations
+from TP.store import DiskStore
+from TP.Triangulator import FeatureDisabled, Triangulator
+from TP.wire import (
+    DEFAULT_FORMAT,
+    WireFormat,
+    all_formats,
+    decode_compact,
+    decompress,
+    encode_as,
+    negotiate,
+    transcode,
+)
 
 
 def test_triangulate_small_pointset():
@@ -162,3 +197,1333 @@ def test_encode_triangles_simple():
 
     attendu = header_v + v0 + v1 + v2 + header_t + tri_b
     assert data == attendu
+
+
+def _aire(a, b, c):
+    """Double de l'aire signée du triangle abc."""
+    return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+
+def _dans_cercle(a, b, c, p):
+    """Vrai si p est strictement dans le cercle circonscrit du triangle direct abc."""
+    m = [
+        (q[0] - p[0], q[1] - p[1], (q[0] - p[0]) ** 2 + (q[1] - p[1]) ** 2)
+        for q in (a, b, c)
+    ]
+    det = (
+        m[0][0] * (m[1][1] * m[2][2] - m[2][1] * m[1][2])
+        - m[0][1] * (m[1][0] * m[2][2] - m[2][0] * m[1][2])
+        + m[0][2] * (m[1][0] * m[2][1] - m[2][0] * m[1][1])
+    )
+    return det > 1e-9
+
+
+def test_triangulator_delaunay_property_random_points():
+    """Vérifie la propriété de Delaunay : aucun point dans un cercle circonscrit."""
+    rng = random.Random(42)
+    points = [(rng.uniform(0, 100), rng.uniform(0, 100)) for _ in range(150)]
+
+    tri = Triangulator()
+    tri.get_pointset = lambda pid: PointSet(points=points)
+    res = tri.triangulate("id")
+
+    assert res.triangles
+    for a, b, c in res.triangles:
+        pa, pb, pc = res.vertices[a], res.vertices[b], res.vertices[c]
+        # triangles orientés dans le sens trigonométrique, jamais dégénérés
+        assert _aire(pa, pb, pc) > 0
+        for i, p in enumerate(res.vertices):
+            if i not in (a, b, c):
+                assert not _dans_cercle(pa, pb, pc, p)
+
+
+def test_triangulator_non_convex_input_has_no_overlap():
+    """Vérifie qu'une entrée non convexe donne des triangles sans chevauchement.
+
+    La somme des aires des triangles doit être égale à l'aire de l'enveloppe
+    convexe (ici le carré englobant) : aucun recouvrement ni trou.
+    """
+    # forme en « U » : le sommet 0 ne voit pas tous les autres points
+    points = [(0, 0), (3, 0), (3, 3), (2, 3), (2, 1), (1, 1), (1, 3), (0, 3)]
+
+    tri = Triangulator()
+    tri.get_pointset = lambda pid: PointSet(points=points)
+    res = tri.triangulate("id")
+
+    aire_totale = sum(
+        _aire(res.vertices[a], res.vertices[b], res.vertices[c])
+        for a, b, c in res.triangles
+    )
+    assert aire_totale == 2 * 9
+    # formule d'Euler : 2n - h - 2 triangles, h = 6 points sur le bord de
+    # l'enveloppe ((1, 3) et (2, 3) sont sur le côté supérieur)
+    assert len(res.triangles) == 2 * len(points) - 6 - 2
+
+
+def test_triangulator_all_collinear_points():
+    """Vérifie que de nombreux points alignés ne produisent aucun triangle."""
+    tri = Triangulator()
+    tri.get_pointset = lambda pid: PointSet(points=[(i, 2 * i) for i in range(50)])
+
+    res = tri.triangulate("id")
+    assert res.triangles == []
+    assert len(res.vertices) == 50
+
+
+def test_triangulator_grid_covers_every_point():
+    """Vérifie qu'une grille (points cocirculaires) est entièrement triangulée."""
+    points = [(i, j) for i in range(10) for j in range(10)]
+
+    tri = Triangulator()
+    tri.get_pointset = lambda pid: PointSet(points=points)
+    res = tri.triangulate("id")
+
+    # 9 x 9 carrés, chacun coupé en 2 triangles
+    assert len(res.triangles) == 162
+    assert {i for t in res.triangles for i in t} == set(range(100))
+
+
+def test_parse_pointset_zero_copy_matches_list_mode():
+    """Vérifie que le mode zero_copy décode les mêmes points que le mode liste."""
+    points = [(1.0, 2.5), (-3.0, 4.0), (0.125, -7.5)]
+    data = PointSet(points=points).to_bytes()
+
+    eager = parse_pointset(data)
+    lazy = parse_pointset(data, zero_copy=True)
+
+    assert eager.points == points
+    assert lazy.points == points
+    assert len(lazy.points) == 3
+    assert lazy.points[1] == (-3.0, 4.0)
+    assert lazy.points[-1] == (0.125, -7.5)
+    assert list(lazy.points) == points
+
+
+def test_parse_pointset_zero_copy_shares_buffer():
+    """Vérifie que le mode zero_copy ne recopie pas les coordonnées."""
+    data = bytearray(PointSet(points=[(1.0, 2.0)]).to_bytes())
+
+    lazy = parse_pointset(data, zero_copy=True)
+    data[4:8] = struct.pack("<f", 9.0)
+
+    assert lazy.points[0] == (9.0, 2.0)
+
+
+def test_parse_pointset_truncated_payload():
+    """Vérifie que seuls les points complets sont lus si l'en-tête ment."""
+    data = PointSet(points=[(1.0, 2.0), (3.0, 4.0)]).to_bytes()
+    # l'en-tête annonce 5 points, le dernier point est tronqué
+    truncated = (5).to_bytes(4, "little") + data[4:-2]
+
+    assert parse_pointset(truncated).points == [(1.0, 2.0)]
+    assert parse_pointset(truncated, zero_copy=True).points == [(1.0, 2.0)]
+
+
+def test_compact_models_behave_like_lists():
+    """Vérifie que les modèles compacts s'utilisent comme les listes de tuples."""
+    verts = [(0.0, 0.0), (1.0, 0.0), (0.0, 1.0), (1.0, 1.0)]
+    tris = [(0, 1, 2), (1, 3, 2)]
+
+    ps = PointSet(points=verts).compact()
+    assert ps.points == verts
+    assert ps.to_bytes() == PointSet(points=verts).to_bytes()
+
+    t = Triangles(sommets=verts, triangles=tris).compact()
+    assert t == Triangles(vertices=verts, triangles=tris)
+    assert t.sommets is t.vertices
+    assert t.triangles[1] == (1, 3, 2)
+    assert list(t.triangles) == tris
+    assert len(t.vertices) == 4
+    assert Triangulator().encode_triangles(t) == Triangulator().encode_triangles(
+        Triangles(vertices=verts, triangles=tris)
+    )
+
+
+def test_triangles_sommets_alias_follows_vertices():
+    """Vérifie que l'alias `sommets` suit les réaffectations de `vertices`."""
+    t = Triangles(vertices=[(0, 0)])
+    t.vertices = [(1, 1), (2, 2)]
+    assert t.sommets == [(1, 1), (2, 2)]
+
+    t.sommets = [(3, 3)]
+    assert t.vertices == [(3, 3)]
+
+
+def test_encode_pointset_accepts_generator():
+    """Vérifie qu'un générateur n'est parcouru qu'une fois et bien encodé."""
+    points = [(1.0, 2.5), (-3.0, 4.0)]
+
+    data = encode_pointset(p for p in points)
+
+    assert data == PointSet(points=points).to_bytes()
+    assert data[:4] == (2).to_bytes(4, "little")
+
+
+def test_encode_pointset_rejects_malformed_points():
+    """Vérifie qu'un point à 3 coordonnées est refusé au lieu d'être mal aligné."""
+    with pytest.raises(ValueError):
+        encode_pointset([(1.0, 2.0, 3.0)])
+
+
+def test_encode_triangles_from_generators():
+    """Vérifie l'encodage de Triangles à partir d'itérables quelconques."""
+    verts = [(0.0, 0.0), (1.0, 0.0), (0.0, 1.0)]
+    expected = Triangulator().encode_triangles(
+        Triangles(vertices=verts, triangles=[(0, 1, 2)])
+    )
+
+    assert encode_triangles(iter(verts), iter([(0, 1, 2)])) == expected
+
+
+def test_result_cache_lru_eviction_by_bytes():
+    """Vérifie l'éviction LRU dès que le budget en octets est dépassé."""
+    cache = ResultCache(max_bytes=10)
+    cache.put("a", b"xxxx")
+    cache.put("b", b"yyyy")
+    assert cache.get("a") == b"xxxx"  # "a" devient le plus récent
+
+    cache.put("c", b"zzzz")  # 12 octets > 10 : "b" est évincé
+
+    assert "b" not in cache
+    assert cache.get("a") == b"xxxx"
+    assert cache.get("c") == b"zzzz"
+    assert cache.stats()["bytes"] == 8
+    assert cache.evictions == 1
+
+    cache.put("big", b"0123456789A")  # plus gros que le budget : ignoré
+    assert "big" not in cache and len(cache) == 2
+
+
+def test_result_cache_hits_misses_and_invalidation():
+    """Vérifie les compteurs et l'invalidation explicite."""
+    cache = ResultCache(max_bytes=100)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return b"result"
+
+    assert cache.get_or_compute("id", compute) == b"result"
+    assert cache.get_or_compute("id", compute) == b"result"
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.invalidate("id")
+    cache.get_or_compute("id", compute)
+    assert len(calls) == 2
+
+    cache.invalidate()
+    assert len(cache) == 0 and cache.size == 0
+
+
+def test_result_cache_coalesces_concurrent_computations():
+    """Vérifie qu'un seul calcul a lieu pour des requêtes simultanées."""
+    cache = ResultCache(max_bytes=0)
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return b"done"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(cache.get_or_compute, "id", compute) for _ in range(8)]
+        while cache.misses < 8:
+            time.sleep(0.001)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert results == [b"done"] * 8
+    assert len(calls) == 1
+
+
+def test_streaming_miss_skips_cache_but_joins_pending_computation():
+    """Vérifie que le flux ne compte pas de miss et attend un calcul en cours."""
+    triangulator = Triangulator(cache_max_bytes=1 << 20)
+    release = threading.Event()
+    calls = []
+
+    def get_pointset(pid):
+        calls.append(pid)
+        release.wait(5)
+        return PointSet(points=[(0, 0), (1, 0), (0, 1)])
+
+    triangulator.get_pointset = get_pointset
+    cache = triangulator.cache
+    release.set()
+    streamed = b"".join(triangulator.iter_triangulate_bytes("a", 8))
+    assert streamed == triangulator.triangulate_bytes("a")
+    assert (cache.hits, cache.misses, calls) == (0, 1, ["a", "a"])
+
+    release.clear()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        buffered = pool.submit(triangulator.triangulate_bytes, "b")
+        while calls.count("b") == 0:
+            time.sleep(0.001)
+        streamed = pool.submit(
+            lambda: b"".join(triangulator.iter_triangulate_bytes("b", 8))
+        )
+        while cache.misses < 3:
+            time.sleep(0.001)
+        release.set()
+        assert streamed.result(5) == buffered.result(5)
+    assert calls.count("b") == 1
+
+
+def test_result_cache_does_not_keep_errors():
+    """Vérifie qu'une erreur de calcul est propagée et non mise en cache."""
+    cache = ResultCache(max_bytes=100)
+
+    with pytest.raises(KeyError):
+        cache.get_or_compute("id", lambda: (_ for _ in ()).throw(KeyError("id")))
+
+    assert cache.get_or_compute("id", lambda: b"ok") == b"ok"
+
+
+def test_triangulator_cache_skips_recomputation():
+    """Vérifie que triangulate_bytes ne refait pas la triangulation d'un id connu."""
+    tri = Triangulator(cache_max_bytes=1 << 20)
+    fetched = []
+
+    def get_pointset(point_set_id):
+        fetched.append(point_set_id)
+        return PointSet(points=[(0, 0), (1, 0), (0, 1)])
+
+    tri.get_pointset = get_pointset
+
+    first = tri.triangulate_bytes("id")
+    assert tri.triangulate_bytes("id") == first
+    assert b"".join(tri.iter_triangulate_bytes("id", 5)) == first
+    assert fetched == ["id"]
+
+    tri.invalidate("id")
+    tri.triangulate_bytes("id")
+    assert fetched == ["id", "id"]
+
+
+def test_process_pool_backend_matches_local_triangulation():
+    """Vérifie que le pool de processus donne la même triangulation qu'en local."""
+    rng = random.Random(3)
+    points = [(rng.random(), rng.random()) for _ in range(500)]
+
+    with ProcessPoolBackend(threshold=100, max_workers=2) as backend:
+        tri = Triangulator(backend=backend)
+        tri.get_pointset = lambda pid: PointSet(points=points)
+
+        assert not backend.accepts(99)
+        res = tri.triangulate("id")
+        assert isinstance(res.triangles, TriangleArray)
+        assert res.triangles == delaunay_triangles(points)
+
+        tri.get_pointset = lambda pid: PointSet(points=points[:3])
+        assert len(tri.triangulate("small").triangles) == 1
+        assert backend.stats() == {
+            "workers": 2,
+            "in_flight": 0,
+            "queued": 0,
+            "completed": 1,
+            "failed": 0,
+        }
+
+
+def test_dedup_points_exact_and_invalid_values():
+    """Vérifie la fusion des doublons exacts et la correspondance des indices."""
+    points = [(0, 0), (1, 0), (None, 0), (0, 0), (0, 1), (float("nan"), 1), (1, 0)]
+
+    cleaned, index_map = dedup_points(points)
+
+    assert cleaned == [(0.0, 0.0), (1.0, 0.0), (0.0, 1.0)]
+    assert index_map == [0, 1, DROPPED, 0, 2, DROPPED, 1]
+
+
+def test_dedup_points_compact_pointset():
+    """Vérifie le chemin rapide sur un PointSet compact (tampon float32)."""
+    compact = PointSet(points=[(2, 0), (1, 0), (2, 0), (2, 1), (1, 0)]).compact()
+    cleaned, index_map = dedup_points(compact.points)
+    assert cleaned == [(2.0, 0.0), (1.0, 0.0), (2.0, 1.0)]
+    assert list(index_map) == [0, 1, 0, 2, 1]
+
+    unique = PointSet(points=[(2, 0), (1, 0)]).compact().points
+    cleaned, index_map = dedup_points(unique)
+    assert cleaned is unique
+    assert list(index_map) == [0, 1]
+
+    # -0.0 et 0.0 sont le même point malgré des motifs binaires différents
+    signed = PointSet(points=[(0, 1), (-0.0, 1), (1, 1)]).compact().points
+    cleaned, index_map = dedup_points(signed)
+    assert cleaned == [(0.0, 1.0), (1.0, 1.0)]
+    assert list(index_map) == [0, 0, 1]
+
+
+def test_dedup_points_with_tolerance():
+    """Vérifie que les points quasi confondus sont fusionnés sur la grille."""
+    points = [(0.0, 0.0), (1.0, 0.0), (1e-9, -1e-9), (0.0, 1.0), (1.0 + 2e-9, 0.0)]
+
+    assert dedup_points(points)[0] == points
+    cleaned, index_map = dedup_points(points, epsilon=1e-6)
+    assert cleaned == [(0.0, 0.0), (1.0, 0.0), (0.0, 1.0)]
+    assert index_map == [0, 1, 0, 2, 1]
+
+    with pytest.raises(ValueError):
+        dedup_points(points, epsilon=-1)
+
+
+def test_triangulator_dedup_epsilon_removes_slivers():
+    """Vérifie qu'avec dedup_epsilon un quasi-doublon ne crée plus de triangle."""
+    points = [(0, 0), (1, 0), (0, 1), (1, 1e-7)]
+    tri = Triangulator()
+    tri.get_pointset = lambda pid: PointSet(points=points)
+    assert len(tri.triangulate("id").triangles) == 2
+
+    tri = Triangulator(dedup_epsilon=1e-4)
+    tri.get_pointset = lambda pid: PointSet(points=points)
+    res = tri.triangulate("id")
+    assert len(res.triangles) == 1
+    assert list(res.index_map) == [0, 1, 2, 1]
+    assert [res.vertices[j] for j in res.index_map][:3] == res.vertices
+
+
+def _triangle_set(triangles: Triangles) -> set:
+    """Triangles d'une triangulation, identifiés par leurs sommets (sans ordre)."""
+    v = triangles.vertices
+    return {frozenset((v[a], v[b], v[c])) for a, b, c in triangles.triangles}
+
+
+def test_incremental_mesh_matches_full_triangulation():
+    """Vérifie qu'après insertions et suppressions on retrouve la triangulation."""
+    rng = random.Random(5)
+    mesh = IncrementalMesh([(rng.random(), rng.random()) for _ in range(50)])
+
+    for _ in range(200):
+        if rng.random() < 0.5:
+            assert mesh.insert(rng.random(), rng.random())
+        else:
+            x, y = rng.choice(mesh.to_triangles().vertices)
+            mesh.remove(x, y)
+        res = mesh.to_triangles()
+        expected = Triangles(
+            vertices=res.vertices, triangles=delaunay_triangles(res.vertices)
+        )
+        assert _triangle_set(res) == _triangle_set(expected)
+
+
+def test_incremental_mesh_from_triangles_and_degenerate_cases():
+    """Vérifie le chargement d'une triangulation, les doublons et les cas dégénérés."""
+    square = [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)]
+    mesh = IncrementalMesh.from_triangles(
+        Triangles(vertices=square, triangles=delaunay_triangles(square))
+    )
+    assert len(mesh) == 4 and (1.0, 1.0) in mesh
+    assert not mesh.insert(1.0, 1.0)
+    assert mesh.insert(0.5, 0.5)
+    assert len(mesh.to_triangles().triangles) == 4
+
+    with pytest.raises(KeyError):
+        mesh.remove(2.0, 2.0)
+
+    # retour à des points alignés : plus aucun triangle, puis de nouveau un
+    for point in [(0.5, 0.5), (1.0, 1.0), (0.0, 1.0)]:
+        mesh.remove(*point)
+    assert mesh.to_triangles().triangles == []
+    mesh.insert(2.0, 0.0)
+    assert mesh.to_triangles().triangles == []
+    mesh.insert(0.0, 3.0)
+    assert len(mesh.to_triangles().triangles) == 2
+
+    with pytest.raises(ValueError):
+        IncrementalMesh.from_triangles(Triangles(vertices=square + [(0.0, 0.0)]))
+
+
+def test_incremental_mesh_compacts_removed_vertices():
+    """Vérifie que les sommets supprimés sont oubliés sans changer le maillage."""
+    rng = random.Random(8)
+    points = [(rng.random(), rng.random()) for _ in range(400)]
+    mesh = IncrementalMesh(points)
+    for x, y in points[:300]:
+        mesh.remove(x, y)
+        assert len(mesh.xs) - len(mesh) <= max(len(mesh), 64)
+    assert len(mesh.xs) < 400
+    for _ in range(50):
+        mesh.insert(rng.random(), rng.random())
+
+    res = mesh.to_triangles()
+    assert res.vertices[:100] == points[300:]
+    expected = Triangles(
+        vertices=res.vertices, triangles=delaunay_triangles(res.vertices)
+    )
+    assert _triangle_set(res) == _triangle_set(expected)
+
+
+def test_triangulator_apply_delta_accumulates_edits():
+    """Vérifie que apply_delta cumule les modifications sans toucher au résultat GET."""
+    tri = Triangulator()
+    tri.get_pointset = lambda pid: PointSet(points=[(0, 0), (1, 0), (0, 1)])
+    original = tri.triangulate_bytes("id")
+
+    res = tri.apply_delta("id", insert=[(1.0, 1.0)])
+    assert len(res.triangles) == 2
+    res = tri.apply_delta("id", remove=[(0.0, 0.0)])
+    assert sorted(res.vertices) == [(0.0, 1.0), (1.0, 0.0), (1.0, 1.0)]
+
+    with pytest.raises(ValueError, match="not a vertex"):
+        tri.apply_delta("id", insert=[(5.0, 5.0)], remove=[(0.0, 0.0)])
+    with pytest.raises(ValueError) as excinfo:
+        tri.apply_delta("id", remove=[(1.0, 1.0), (0.0, 1.0), (1.0, 1.0)])
+    assert str(excinfo.value) == "duplicate point in remove: [(1.0, 1.0)]"
+    assert len(tri.apply_delta("id").vertices) == 3
+    assert tri.triangulate_bytes("id") == original
+
+    tri.invalidate("id")
+    assert len(tri.apply_delta("id").vertices) == 3
+    assert (0.0, 0.0) in tri.apply_delta("id").vertices
+
+
+def test_triangulator_apply_delta_builds_meshes_outside_the_lock():
+    """Vérifie qu'une première modification lente ne bloque pas les autres PointSet."""
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def get_pointset(pid):
+        calls.append(pid)
+        if pid == "slow":
+            started.set()
+            assert release.wait(5)
+        return PointSet(points=[(0, 0), (1, 0), (0, 1)])
+
+    tri = Triangulator()
+    tri.get_pointset = get_pointset
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        slow = [pool.submit(tri.apply_delta, "slow", [(1.0, 1.0)]) for _ in range(2)]
+        assert started.wait(5)
+        assert len(tri.apply_delta("fast", insert=[(1.0, 1.0)]).triangles) == 2
+        release.set()
+        results = [f.result(5) for f in slow]
+    # un seul calcul pour les deux appels concurrents, qui se cumulent
+    assert calls.count("slow") == 1
+    assert all(len(r.vertices) == 4 for r in results)
+
+    def missing(pid):
+        raise KeyError(pid)
+
+    tri.get_pointset = missing
+    with pytest.raises(KeyError):
+        tri.apply_delta("missing")
+    assert not tri.has_mesh("missing")
+
+
+def _contains(points, triangle, q) -> bool:
+    """Indiquer si q est dans le triangle (bord compris)."""
+    (ax, ay), (bx, by), (cx, cy) = (points[i] for i in triangle)
+    qx, qy = q
+    signs = (
+        (bx - ax) * (qy - ay) - (by - ay) * (qx - ax),
+        (cx - bx) * (qy - by) - (cy - by) * (qx - bx),
+        (ax - cx) * (qy - cy) - (ay - cy) * (qx - cx),
+    )
+    return min(signs) >= 0 or max(signs) <= 0
+
+
+def test_point_locator_matches_brute_force():
+    """Vérifie locate et nearest contre une recherche exhaustive."""
+    rng = random.Random(11)
+    points = [(rng.random(), rng.random()) for _ in range(300)]
+    res = Triangles(vertices=points, triangles=delaunay_triangles(points))
+    locator = PointLocator(res)
+    queries = [(rng.uniform(-0.5, 1.5), rng.uniform(-0.5, 1.5)) for _ in range(500)]
+
+    located = locator.locate(queries)
+    nearest = locator.nearest(queries)
+    for q, t, v in zip(queries, located, nearest, strict=True):
+        inside = [i for i, tr in enumerate(res.triangles) if _contains(points, tr, q)]
+        assert t in inside if inside else t == OUTSIDE
+        distances = [(x - q[0]) ** 2 + (y - q[1]) ** 2 for x, y in points]
+        assert distances[v] == min(distances)
+
+
+def test_point_locator_compact_inputs_and_degenerate_cases():
+    """Vérifie les entrées compactes et les triangulations sans triangle."""
+    square = PointSet(points=[(0, 0), (1, 0), (1, 1), (0, 1)])
+    compact = parse_pointset(square.to_bytes(), zero_copy=True).points
+    res = Triangles(
+        vertices=compact,
+        triangles=TriangleArray.from_triangles(delaunay_triangles(compact)),
+    )
+    locator = PointLocator(res)
+    queries = parse_pointset(
+        PointSet(points=[(0.9, 0.8), (2, 2), (0.1, 0.2)]).to_bytes(), zero_copy=True
+    ).points
+    located = locator.locate(queries)
+    assert located[1] == OUTSIDE and OUTSIDE not in (located[0], located[2])
+    assert locator.nearest(queries) == [2, 2, 0]
+
+    collinear = PointLocator(Triangles(vertices=[(0, 0), (1, 1), (2, 2)]))
+    assert collinear.locate([(1, 1)]) == [OUTSIDE]
+    assert collinear.nearest([(1.9, 1.7), (-5, 0)]) == [2, 0]
+    assert PointLocator(Triangles()).nearest([(0, 0)]) == [-1]
+
+
+def test_disk_store_pointsets_and_triangles(tmp_path):
+    """Vérifie l'enregistrement et la relecture (projetée) du dépôt sur disque."""
+    store = DiskStore(tmp_path)
+    data = PointSet(points=[(0, 0), (1, 0), (0, 1)]).to_bytes()
+
+    point_set_id = store.store_pointset_bytes(data)
+    assert store.get_pointset_bytes(point_set_id) == data
+    assert store.get_pointset(point_set_id).points == [(0, 0), (1, 0), (0, 1)]
+    with pytest.raises(KeyError):
+        store.get_pointset("inconnu")
+    with pytest.raises(ValueError):
+        store.put_pointset_bytes("id", data[:-1])
+
+    store.put_pointset_bytes("../dehors", data)
+    assert DiskStore(tmp_path).get_pointset_bytes("../dehors") == data
+    assert not (tmp_path / "dehors.bin").exists()
+
+    assert store.get_triangles_bytes("id") is None
+    store.put_triangles_bytes("id", b"result")
+    store.put_triangles_bytes("other", b"")
+    assert store.get_triangles_bytes("id") == b"result"
+    assert store.get_triangles_bytes("other") == b""
+    store.invalidate("id")
+    assert store.get_triangles_bytes("id") is None
+    store.invalidate()
+    assert store.get_triangles_bytes("other") is None
+
+
+def test_disk_store_reads_through_upstream(tmp_path):
+    """Vérifie qu'un PointSet absent est demandé une seule fois à l'amont."""
+    data = PointSet(points=[(0, 0), (1, 0), (0, 1)]).to_bytes()
+    fetched = []
+
+    class Upstream:
+        def get_pointset_bytes(self, point_set_id):
+            fetched.append(point_set_id)
+            if point_set_id != "ps":
+                raise KeyError(point_set_id)
+            return data
+
+        def store_pointset_bytes(self, payload):
+            return "attribué"
+
+    store = DiskStore(tmp_path, upstream=Upstream())
+    assert store.get_pointset_bytes("ps") == data
+    assert DiskStore(tmp_path, upstream=Upstream()).get_pointset_bytes("ps") == data
+    assert fetched == ["ps"]
+    with pytest.raises(KeyError):
+        store.get_pointset_bytes("absent")
+    assert store.store_pointset_bytes(data) == "attribué"
+    assert DiskStore(tmp_path).get_pointset_bytes("attribué") == data
+
+
+def test_triangulator_store_survives_restart(tmp_path):
+    """Vérifie qu'un Triangulator relancé sur le même dépôt ne recalcule rien."""
+    data = PointSet(points=[(0, 0), (1, 0), (1, 1), (0, 1)]).to_bytes()
+    DiskStore(tmp_path).put_pointset_bytes("ps", data)
+
+    first = Triangulator(client=DiskStore(tmp_path), store=DiskStore(tmp_path))
+    expected = first.triangulate_bytes("ps")
+
+    restarted = Triangulator(store=DiskStore(tmp_path))
+    restarted.get_pointset = lambda pid: pytest.fail("PointSet fetched again")
+    assert restarted.triangulate_bytes("ps") == expected
+    assert b"".join(restarted.iter_triangulate_bytes("ps", 7)) == expected
+
+    restarted.invalidate("ps")
+    assert DiskStore(tmp_path).get_triangles_bytes("ps") is None
+
+
+def _triangulate_file(tmp_path, points, tile_points):
+    """Trianguler ``points`` hors mémoire ; retourne sommets et triangles lus."""
+    src, dst = tmp_path / "in.bin", tmp_path / "out.bin"
+    src.write_bytes(PointSet(points=points).to_bytes())
+    count = triangulate_file(src, dst, tile_points=tile_points)
+    data = dst.read_bytes()
+    n = struct.unpack_from("<I", data)[0]
+    vertices = parse_pointset(data[: 4 + 8 * n]).points
+    assert struct.unpack_from("<I", data, 4 + 8 * n)[0] == count
+    indices = struct.unpack_from(f"<{3 * count}I", data, 8 + 8 * n)
+    assert len(data) == 8 + 8 * n + 12 * count
+    return vertices, [tuple(indices[i : i + 3]) for i in range(0, len(indices), 3)]
+
+
+@pytest.mark.parametrize("tile_points", [3, 50, 10_000])
+def test_triangulate_file_matches_in_memory(tmp_path, tile_points):
+    """Vérifie que la triangulation par tuiles recousues est celle de Delaunay."""
+    rng = random.Random(tile_points)
+    points = [(rng.random(), rng.random()) for _ in range(1000)]
+    vertices, triangles = _triangulate_file(tmp_path, points, tile_points)
+
+    assert vertices == parse_pointset(PointSet(points=points).to_bytes()).points
+    expected = {frozenset(t) for t in delaunay_triangles(vertices)}
+    assert {frozenset(t) for t in triangles} == expected
+    for a, b, c in triangles:
+        (ax, ay), (bx, by), (cx, cy) = vertices[a], vertices[b], vertices[c]
+        assert (bx - ax) * (cy - ay) - (by - ay) * (cx - ax) > 0
+
+
+def test_triangulate_file_degenerate_inputs(tmp_path):
+    """Vérifie les petits PointSet, les doublons, les NaN et l'alignement."""
+    assert _triangulate_file(tmp_path, [], 3) == ([], [])
+    assert _triangulate_file(tmp_path, [(0, 0), (1, 1)], 3)[1] == []
+    assert _triangulate_file(tmp_path, [(0, 0), (1, 1), (2, 2), (3, 3)], 3)[1] == []
+
+    square = [(0, 0), (1, 0), (0, 0), (float("nan"), 0), (1, 1), (0, 1), (1, 1)]
+    _, triangles = _triangulate_file(tmp_path, square, 3)
+    assert len(triangles) == 2
+    assert set().union(*triangles) == {0, 1, 4, 5}
+
+    # grille : points cocirculaires, sur les bornes des tuiles
+    grid = [(float(i), float(j)) for i in range(12) for j in range(12)]
+    _, triangles = _triangulate_file(tmp_path, grid, 20)
+    assert len(triangles) == 2 * 11 * 11
+
+    with pytest.raises(ValueError):
+        triangulate_file(tmp_path / "in.bin", tmp_path / "out.bin", tile_points=2)
+
+
+@pytest.mark.parametrize("strips", [1, 2, 5, 16])
+def test_triangulate_strips_matches_sequential(strips):
+    """Vérifie que les bandes recousues donnent la triangulation séquentielle."""
+    rng = random.Random(strips)
+    points = [(rng.gauss(0, 1), rng.gauss(0, 1)) for _ in range(1000)]
+    triangles = triangulate_strips(points, strips)
+
+    expected = {frozenset(t) for t in delaunay_triangles(points)}
+    assert {frozenset(t) for t in triangles} == expected
+    for a, b, c in triangles:
+        (ax, ay), (bx, by), (cx, cy) = points[a], points[b], points[c]
+        assert (bx - ax) * (cy - ay) - (by - ay) * (cx - ax) > 0
+
+    # grille : abscisses ex aequo et points cocirculaires aux coutures
+    grid = [(float(i), float(j)) for i in range(15) for j in range(15)]
+    triangles = triangulate_strips(grid, strips)
+    assert len(triangles) == 2 * 14 * 14
+    edges = [(t[k], t[(k + 1) % 3]) for t in triangles for k in range(3)]
+    assert len(set(edges)) == len(edges)
+
+    assert list(triangulate_strips([(0, 0), (1, 1), (2, 2)], strips)) == []
+
+
+def test_parallel_backend_matches_local_triangulation():
+    """Vérifie le Triangulator avec le backend parallèle par bandes."""
+    rng = random.Random(4)
+    points = [(rng.random(), rng.random()) for _ in range(500)]
+
+    with ParallelBackend(threshold=100, max_workers=2) as backend:
+        tri = Triangulator(backend=backend)
+        tri.get_pointset = lambda pid: PointSet(points=points)
+
+        assert not backend.accepts(99)
+        res = tri.triangulate("id")
+        assert isinstance(res.triangles, TriangleArray)
+        assert {frozenset(t) for t in res.triangles} == {
+            frozenset(t) for t in delaunay_triangles(points)
+        }
+    with pytest.raises(ValueError):
+        triangulate_strips(points, 0)
+
+
+def test_benchmark_measure_and_compare():
+    """Vérifie les statistiques d'une mesure et le repérage des régressions."""
+    calls = []
+    stats = measure(lambda: calls.append(None), repeat=4, warmup=2, min_sample=0)
+    assert stats["runs"] == 4
+    assert stats["number"] == 1
+    assert len(calls) == 2 + 4
+    assert stats["min"] <= stats["median"] <= stats["max"]
+
+    baseline = {"a": {"median": 1.0}, "b": {"median": 1.0}, "c": {"median": 1.0}}
+    results = {
+        "a": {"median": 1.05},
+        "b": {"median": 1.2},
+        "c": {"median": 0.5},
+        "d": {"median": 1.0},
+    }
+    assert compare(results, baseline, tolerance=0.1) == [
+        ("a", 1.0, 1.05, "ok"),
+        ("b", 1.0, 1.2, "regression"),
+        ("c", 1.0, 0.5, "improvement"),
+        ("d", None, 1.0, "new"),
+    ]
+
+
+def test_metrics_histograms_counters_and_render():
+    """Vérifie les séries étiquetées et leur export au format Prometheus."""
+    metrics = Metrics()
+    metrics.observe("triangulator_input_points", 5)
+    metrics.observe("triangulator_input_points", 500)
+    metrics.observe("triangulator_input_points", 10**9)
+    metrics.inc("triangulator_errors_total", code="NOT_FOUND")
+    metrics.inc("triangulator_errors_total", 2, code='say "hi"')
+    with metrics.stage("dedup"):
+        pass
+    metrics.add_collector(lambda: [("extra_gauge", "gauge", "Extra.", 2.5)])
+
+    assert metrics.value("triangulator_input_points") == 3
+    assert metrics.value("triangulator_errors_total", code="NOT_FOUND") == 1
+    assert metrics.value("triangulator_stage_seconds", stage="dedup") == 1
+    lines = metrics.render().splitlines()
+    assert "# TYPE triangulator_input_points histogram" in lines
+    assert 'triangulator_input_points_bucket{le="10"} 1' in lines
+    assert 'triangulator_input_points_bucket{le="1000"} 2' in lines
+    assert 'triangulator_input_points_bucket{le="+Inf"} 3' in lines
+    assert "triangulator_input_points_sum 1000000505" in lines
+    assert "triangulator_input_points_count 3" in lines
+    assert 'triangulator_errors_total{code="say \\"hi\\""} 2' in lines
+    assert "extra_gauge 2.5" in lines
+    with pytest.raises(KeyError):
+        metrics.observe("unknown", 1)
+
+    disabled = Metrics(enabled=False)
+    with disabled.stage("dedup"):
+        disabled.inc("triangulator_errors_total", code="X")
+    assert disabled.render() == "\n"
+
+
+def _float32(points) -> list[tuple[float, float]]:
+    """Points arrondis en float32, comme dans les réponses encodées."""
+    return [struct.unpack("<2f", struct.pack("<2f", *p)) for p in points]
+
+
+def test_wire_formats_round_trip():
+    """Vérifie que chaque format compact/compressé redonne les mêmes triangles."""
+    rng = random.Random(3)
+    points = [(rng.random(), rng.random()) for _ in range(300)]
+    points += [(0.5, 0.5), (0.5, 0.5), (float("nan"), 1.0)]
+    triangulator = Triangulator()
+    triangulator.get_pointset = lambda pid: PointSet(points=points)
+    result = triangulator.triangulate("p")
+    raw = triangulator.triangulate_bytes("p")
+    expected = _triangle_set(
+        Triangles(vertices=_float32(result.vertices), triangles=result.triangles)
+    )
+
+    for fmt in all_formats():
+        data = encode_as(result, fmt)
+        assert triangulator.triangulate_bytes("p", fmt) == data
+        if fmt.vertices:
+            assert transcode(raw, fmt) == data
+        if not fmt.compact:
+            assert decompress(data, fmt.compression) == raw
+            continue
+        vertices, n_vertices, triangles = decode_compact(
+            decompress(data, fmt.compression)
+        )
+        assert len(triangles) == len(result.triangles)
+        if fmt.vertices:
+            decoded = Triangles(vertices=vertices, triangles=triangles)
+            assert _triangle_set(decoded) == expected
+        else:
+            # indices du PointSet d'origine : le doublon est sa 1re occurrence
+            assert vertices is None and n_vertices == len(points)
+            assert all(i != len(points) - 2 for t in triangles for i in t)
+            decoded = Triangles(vertices=_float32(points), triangles=triangles)
+            assert _triangle_set(decoded) == expected
+
+    compact = triangulator.triangulate_bytes("p", WireFormat(compact=True))
+    assert len(compact) < 0.6 * len(raw)
+    with pytest.raises(ValueError):
+        transcode(raw, WireFormat(compact=True, vertices=False))
+    with pytest.raises(ValueError):
+        decode_compact(raw)
+    with pytest.raises(ValueError):
+        decode_compact(compact[:-2])
+
+
+def test_wire_u16_falls_back_to_u32():
+    """Au-delà de 65536 sommets, le codage u16 cède la place à u32."""
+    n = 0x10001
+    triangles = Triangles(
+        vertices=[(float(i), float(i % 7)) for i in range(n)],
+        triangles=[(0, n - 1, 1)],
+    )
+    data = encode_as(triangles, WireFormat(compact=True, indices="u16"))
+    _, n_vertices, decoded = decode_compact(data)
+    assert n_vertices == n and decoded == [(0, 1, 2)]
+
+
+def test_wire_negotiate():
+    """Vérifie le choix du format d'après Accept et Accept-Encoding."""
+    assert negotiate(None) == DEFAULT_FORMAT
+    assert negotiate("application/json, text/html") == DEFAULT_FORMAT
+    assert negotiate("application/vnd.triangulator.compact") == WireFormat(True)
+    fmt = negotiate(
+        "application/octet-stream;q=0.5, "
+        "application/vnd.triangulator.compact; indices=u16; vertices=omit",
+        "br, gzip;q=0.8",
+    )
+    assert fmt == WireFormat(True, "u16", False, "gzip")
+    assert fmt.media_type == (
+        "application/vnd.triangulator.compact; indices=u16; vertices=omit"
+    )
+    assert negotiate(
+        "application/vnd.triangulator.compact;q=0.2, */*", "gzip;q=0, deflate"
+    ) == WireFormat(compression="deflate")
+    with pytest.raises(ValueError):
+        negotiate("application/vnd.triangulator.compact; indices=u8")
+    with pytest.raises(ValueError):
+        negotiate("application/vnd.triangulator.compact; vertices=maybe")
+
+
+def test_wire_formats_cached_and_invalidated():
+    """Les autres formats sont mis en cache à part et oubliés avec le PointSet."""
+    calls = []
+    triangulator = Triangulator(cache_max_bytes=1 << 20)
+
+    def get_pointset(pid):
+        calls.append(pid)
+        return PointSet(points=[(0, 0), (1, 0), (0, 1), (1, 1)])
+
+    triangulator.get_pointset = get_pointset
+    fmt = WireFormat(compact=True, compression="gzip")
+    first = triangulator.triangulate_bytes("a", fmt)
+    assert triangulator.triangulate_bytes("a", fmt) == first
+    triangulator.triangulate_bytes("a")
+    assert calls == ["a"]
+    assert triangulator.cache.get(fmt.cache_key("a")) == first
+
+    triangulator.invalidate("a")
+    assert triangulator.cache.get(fmt.cache_key("a")) is None
+    triangulator.triangulate_bytes("a", fmt)
+    assert calls == ["a", "a"]
+
+
+def _exact_orient(a, b, c) -> int:
+    """Signe exact de l'orientation de abc (arithmétique rationnelle)."""
+    (ax, ay), (bx, by), (cx, cy) = (map(Fraction, p) for p in (a, b, c))
+    det = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+    return (det > 0) - (det < 0)
+
+
+def test_predicates_exact_sign_near_degenerate():
+    """Vérifie le signe exact des prédicats sur des points presque alignés.
+
+    Autour de (0.5, 0.5), à quelques ulps de la droite y = x, le calcul
+    naïf en flottants se trompe de signe ; `orient2d` jamais.
+    """
+    naive_errors = 0
+    for i in range(64):
+        for j in range(64):
+            p = (0.5 + i * 2.0**-53, 0.5 + j * 2.0**-53)
+            expected = _exact_orient(p, (12.0, 12.0), (24.0, 24.0))
+            o = orient2d(*p, 12.0, 12.0, 24.0, 24.0)
+            assert (o > 0) - (o < 0) == expected
+            naive = (12.0 - p[0]) * (24.0 - p[1]) - (12.0 - p[1]) * (24.0 - p[0])
+            naive_errors += (naive > 0) - (naive < 0) != expected
+    assert naive_errors > 0
+
+    assert orient2d(0, 0, 1, 1, 2, 2) == 0
+    assert orient2d(0.0, 0.0, 1.0, 0.0, 0.0, 1.0) == 1.0
+    # points cocirculaires, puis à un ulp du cercle
+    assert incircle(0.0, 0.0, 1.0, 0.0, 1.0, 1.0, 0.0, 1.0) == 0
+    assert incircle(0.0, 0.0, 1.0, 0.0, 1.0, 1.0, 0.0, 1.0 - 2.0**-53) > 0
+    assert incircle(0.0, 0.0, 1.0, 0.0, 1.0, 1.0, 0.0, 1.0 + 2.0**-52) < 0
+    assert incircle(0.1, 0.1, 0.7, 0.1, 0.7, 0.7, 0.1, 0.7) == 0
+
+
+def test_predicates_batches_match_scalar_tests():
+    """Vérifie `orientations` et `incircles` contre les tests un à un."""
+    rng = random.Random(5)
+    xs = [rng.choice((0.5, 1.5, rng.random())) for _ in range(60)]
+    ys = [rng.choice((0.5, 1.5, rng.random())) for _ in range(60)]
+    flat = [rng.randrange(60) for _ in range(3 * 500)]
+    queries = [rng.randrange(60) for _ in range(500)]
+
+    def sign(value):
+        return (value > 0) - (value < 0)
+
+    expected = [
+        sign(orient2d(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c]))
+        for a, b, c in zip(flat[0::3], flat[1::3], flat[2::3], strict=True)
+    ]
+    assert orientations(xs, ys, flat) == expected
+    assert 0 in expected
+    expected = [
+        sign(incircle(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c], xs[p], ys[p]))
+        for a, b, c, p in zip(flat[0::3], flat[1::3], flat[2::3], queries, strict=True)
+    ]
+    assert incircles(xs, ys, flat, queries) == expected
+    assert orientations([], [], []) == incircles([], [], [], []) == []
+
+
+def test_delaunay_nearly_collinear_points_never_inverted():
+    """Sur des points à quelques ulps d'une droite, aucun triangle inversé.
+
+    La triangulation doit aussi recouvrir exactement l'enveloppe convexe
+    (somme des aires égale à son aire, calculées exactement).
+    """
+    for seed in range(10):
+        rng = random.Random(seed)
+        points = set()
+        while len(points) < 150:
+            t = 0.5 + 10 * rng.random()
+            points.add(
+                (t + rng.randint(-8, 8) * 2.0**-50, t + rng.randint(-8, 8) * 2.0**-50)
+            )
+        points = [*points, (0.0, 0.0), (20.0, 20.0)]
+        triangles = delaunay_triangles(points)
+        assert triangles
+        for a, b, c in triangles:
+            assert _exact_orient(points[a], points[b], points[c]) == 1
+        _assert_covers_hull(points, triangles)
+
+
+def _assert_covers_hull(points, triangles):
+    """Vérifie (en rationnels) que les triangles recouvrent l'enveloppe convexe.
+
+    La somme des aires des triangles doit être égale à l'aire de l'enveloppe.
+    """
+    area = 0
+    for a, b, c in triangles:
+        (ax, ay), (bx, by), (cx, cy) = (map(Fraction, points[i]) for i in (a, b, c))
+        area += (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+
+    # aire de l'enveloppe convexe (chaîne monotone)
+    hull = []
+    ordered = sorted(points)
+    for chain in (ordered, ordered[::-1]):
+        start = len(hull)
+        for p in chain:
+            while len(hull) >= start + 2 and _exact_orient(hull[-2], hull[-1], p) <= 0:
+                hull.pop()
+            hull.append(p)
+        hull.pop()
+    hull = [tuple(map(Fraction, p)) for p in hull]
+    hull_area = sum(
+        p[0] * q[1] - q[0] * p[1]
+        for p, q in zip(hull, hull[1:] + hull[:1], strict=True)
+    )
+    assert area == hull_area
+
+
+def _assert_delaunay(points, triangles):
+    """Vérifie (prédicats exacts) une triangulation de Delaunay de ``points``.
+
+    Chaque point distinct est un sommet, chaque triangle est direct et aucun
+    point n'est strictement dans un cercle circonscrit.
+    """
+    used = {points[i] for t in triangles for i in t}
+    assert used == set(points)
+    for a, b, c in triangles:
+        (ax, ay), (bx, by), (cx, cy) = points[a], points[b], points[c]
+        assert orient2d(ax, ay, bx, by, cx, cy) > 0
+        for px, py in points:
+            assert incircle(ax, ay, bx, by, cx, cy, px, py) <= 0
+
+
+def test_delaunay_points_on_a_line_plus_one_off_it():
+    """Des points alignés et un point juste à côté : tous triangulés.
+
+    Le germe est alors très plat et ses points s'insèrent sur les arêtes de
+    l'enveloppe, voire à l'intérieur : aucun ne doit être ignoré.
+    """
+    points = [(float(i), 0.0) for i in range(8)] + [(7.2989192976893715, 1e-9)]
+    _assert_delaunay(points, delaunay_triangles(points))
+
+    for offset in (1e-9, 1e-6, -1e-12):
+        for seed in range(100):
+            rng = random.Random(seed)
+            n = rng.randint(3, 30)
+            points = [(float(i), 0.0) for i in range(n)]
+            points.append((rng.uniform(0, n), offset))
+            rng.shuffle(points)
+            _assert_delaunay(points, delaunay_triangles(points))
+
+
+def test_delaunay_ulp_noise_around_a_line_is_delaunay():
+    """Des points à quelques ulps de y = x : une triangulation de Delaunay valide.
+
+    Bout à bout par `delaunay_triangles` : tous les points sont des sommets,
+    les triangles recouvrent l'enveloppe convexe et aucun cercle circonscrit
+    ne contient de point.
+    """
+    for seed in range(10):
+        rng = random.Random(seed)
+        points = set()
+        while len(points) < 60:
+            t = 0.5 + 10 * rng.random()
+            points.add(
+                (t + rng.randint(-4, 4) * 2.0**-50, t + rng.randint(-4, 4) * 2.0**-50)
+            )
+        points = list(points)
+        triangles = delaunay_triangles(points)
+        assert triangles
+        _assert_delaunay(points, triangles)
+        _assert_covers_hull(points, triangles)
+
+
+def test_pointset_upload_assembles_chunks_and_validates():
+    """Vérifie l'assemblage en flux du corps de POST /pointset et ses erreurs."""
+    data = encode_pointset([(float(i), 2.0 * i) for i in range(100)])
+
+    for content_length in (len(data), None):
+        for size in (1, 3, 7, 64, len(data)):
+            upload = PointSetUpload(content_length)
+            for i in range(0, len(data), size):
+                upload.feed(data[i : i + size])
+            assert upload.finish() == data
+            assert upload.count == 100
+
+    # Content-Length contredisant l'en-tête : refusé dès l'en-tête reçu
+    upload = PointSetUpload(len(data) - 8)
+    with pytest.raises(ValueError, match="Content-Length"):
+        upload.feed(data[:16])
+    # corps trop long ou tronqué
+    upload = PointSetUpload()
+    upload.feed(data)
+    with pytest.raises(ValueError, match="longer"):
+        upload.feed(b"\0")
+    upload = PointSetUpload()
+    upload.feed(data[:-1])
+    with pytest.raises(ValueError, match="99 points|100 points"):
+        upload.finish()
+    with pytest.raises(ValueError, match="header"):
+        PointSetUpload().finish()
+    with pytest.raises(ValueError, match="header"):
+        PointSetUpload(3)
+    # en-tête annonçant trop de points
+    with pytest.raises(ValueError, match="at most 10 points"):
+        PointSetUpload(max_points=10).feed(data[:4])
+
+    assert upload_mode(None) is upload_mode("0") is upload_mode("false") is False
+    assert upload_mode("1") is upload_mode("True") is True
+    with pytest.raises(ValueError):
+        upload_mode("yes please")
+
+
+def test_core_modules_import_without_flask():
+    """Vérifie que le cœur et l'application ASGI n'importent pas Flask."""
+    code = (
+        "import sys, TP.Triangulator, TP.models, TP.pointset, TP.asgi; "
+        "print(sorted(m for m in ('flask', 'werkzeug') if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    ).stdout
+    assert output.strip() == "[]"
+    assert Triangulator().parse_pointset(encode_pointset([(1.0, 2.0)])).points == [
+        (1.0, 2.0)
+    ]
+
+
+def test_warmup_scheduler_priorities_and_hit_ratio():
+    """Vérifie l'ordre de préchauffage, la file bornée et le taux de hits."""
+    triangulator = Triangulator(cache_max_bytes=1 << 20, warmup_workers=1)
+    warmup = triangulator.warmup
+    warmup.max_queue = 3
+    gate = threading.Event()
+    fetched = []
+
+    def get_pointset(point_set_id):
+        gate.wait()
+        fetched.append(point_set_id)
+        if point_set_id == "bad":
+            raise KeyError(point_set_id)
+        return PointSet(points=[(0, 0), (1, 0), (0, 1)])
+
+    triangulator.get_pointset = get_pointset
+    assert warmup.schedule(["first"]) == 1
+    deadline = time.monotonic() + 5
+    while warmup.stats()["running"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    assert warmup.schedule(["first", "low", "high"]) == 2
+    assert warmup.schedule(["high"], priority=5) == 1
+    assert warmup.schedule(["bad", "low", "dropped"], priority=1) == 2
+    stats = warmup.stats()
+    assert (stats["running"], stats["queued"], stats["dropped"]) == (1, 3, 1)
+
+    gate.set()
+    assert warmup.join(timeout=5)
+    assert fetched == ["first", "high", "bad", "low"]
+    assert warmup.schedule(["low"]) == 1 and warmup.join(timeout=5)
+    stats = warmup.stats()
+    assert (stats["warmed"], stats["skipped"], stats["failed"]) == (3, 1, 1)
+
+    warmup.record_request("low")  # prêt : hit
+    warmup.record_request("low")  # seule la première requête compte
+    warmup.record_request("bad")  # échec : plus suivi
+    warmup.record_request("never-announced")
+    triangulator.invalidate("high")
+    warmup.record_request("high")  # plus prêt : miss
+    stats = warmup.stats()
+    assert (stats["requests"], stats["hits"], stats["hit_ratio"]) == (2, 1, 0.5)
+    assert "triangulator_warmup_hit_ratio 0.5" in triangulator.metrics.render()
+
+    warmup.close()
+    with pytest.raises(RuntimeError):
+        warmup.schedule(["late"])
+    with pytest.raises(FeatureDisabled):
+        Triangulator().schedule_warmup(["x"])
+    # sans cache ni store, les résultats préchauffés seraient jetés
+    with pytest.raises(ValueError, match="warm-up"):
+        Triangulator(warmup_workers=1)
+    assert error_info(FeatureDisabled("off"))[:2] == (404, "NOT_FOUND")
+
+
+def test_shared_results_reference_counts():
+    """Vérifie les liens identifiant -> contenu, leurs références et le temps évité."""
+    points = [(0.5, 1.0), (2.0, 3.0)]
+    assert content_key(points) == content_key(PointSet(points=points).compact().points)
+    assert content_key(points) != content_key(points[::-1])
+    assert content_key([]) != content_key([(0.0, 0.0)])
+
+    results = SharedResults(max_ids=3)
+    assert results.link("a", "k") == []
+    assert results.link("b", "k") == []  # partagé avant que le coût soit connu
+    results.computed("k", 2.0)
+    assert results.link("c", "k") == []
+    assert results.link("c", "k") == []  # déjà relié : rien ne change
+    stats = results.stats()
+    assert [stats[k] for k in ("ids", "contents", "links", "shared")] == [3, 1, 3, 2]
+    assert stats["saved_seconds"] == 4.0 and stats["dedup_ratio"] == 2 / 3
+
+    assert results.unlink("a") == [] and results.unlink("a") == []
+    assert results.link("d", "other") == []
+    assert results.link("e", "last") == []  # évince "b" ; "k" garde "c"
+    assert results.key("b") is None
+    assert results.link("d", "last") == ["other"]  # relié à un autre contenu
+    assert results.unlink("c") == ["k"]
+
+
+def test_triangulator_shares_results_of_identical_pointsets(tmp_path):
+    """Des PointSet identiques sous des identifiants différents : un seul calcul."""
+    points = [(0, 0), (1, 0), (1, 1), (0, 1), (0.5, 0.25)]
+    pointsets = {
+        "a": PointSet(points=points),
+        "b": PointSet(points=list(points)),
+        "c": PointSet(points=points[:4]),
+    }
+    store = DiskStore(tmp_path)
+    triangulator = Triangulator(
+        cache_max_bytes=1 << 20, store=store, share_results=True
+    )
+    triangulator.get_pointset = lambda pid: pointsets[pid]
+    computed = []
+    triangulate_pointset = triangulator.triangulate_pointset
+    triangulator.triangulate_pointset = lambda ps, **kwargs: (
+        computed.append(ps) or triangulate_pointset(ps, **kwargs)
+    )
+
+    first = triangulator.triangulate_bytes("a")
+    assert triangulator.triangulate_bytes("b") == first
+    assert b"".join(triangulator.iter_triangulate_bytes("b", 16)) == first
+    assert triangulator.triangulate_bytes("c") != first
+    assert len(computed) == 2 and len(triangulator.cache) == 2
+    assert len(list((tmp_path / "triangles").iterdir())) == 2
+    key = triangulator.result_key("a")
+    assert key == triangulator.result_key("b") == content_key(points)
+    compact = WireFormat(compact=True)
+    shared = triangulator.triangulate_bytes("a", compact)
+    assert triangulator.triangulate_bytes("b", compact) is shared
+    assert triangulator.is_warm("b") and not triangulator.is_warm("unknown")
+
+    stats = triangulator.results.stats()
+    assert (stats["links"], stats["shared"], stats["dedup_ratio"]) == (3, 1, 1 / 3)
+    assert stats["saved_seconds"] > 0
+    assert "triangulator_results_shared_total 1" in triangulator.metrics.render()
+
+    # le résultat partagé survit tant qu'un identifiant y est relié
+    triangulator.invalidate("a")
+    assert key in triangulator.cache and store.get_triangles_bytes(key) is not None
+    assert triangulator.triangulate_bytes("a") == first and len(computed) == 2
+    triangulator.invalidate("a")
+    triangulator.invalidate("b")
+    assert key not in triangulator.cache and store.get_triangles_bytes(key) is None
+    assert compact.cache_key(key) not in triangulator.cache
+    triangulator.invalidate()
+    assert triangulator.results.stats()["ids"] == 0 and len(triangulator.cache) == 0
+
+
+def test_admission_budget_queue_and_lanes():
+    """Vérifie le budget, la file bornée, les refus et la voie des petits calculs."""
+    admission = AdmissionController(
+        100, small_cost=10, small_budget=20, max_queue=1, queue_timeout=5.0
+    )
+    first = admission.acquire(80)
+    waiter = ThreadPoolExecutor(max_workers=1)
+    queued = waiter.submit(admission.acquire, 30)
+    deadline = time.monotonic() + 5
+    while admission.stats()["large_queued"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    with pytest.raises(Overloaded) as excinfo:
+        admission.acquire(15)  # file des gros calculs pleine
+    assert excinfo.value.retry_after >= 1
+    with admission.acquire(5), admission.acquire(10):  # voie des petits calculs
+        assert admission.stats()["small_active"] == 15
+    assert not queued.done()
+
+    first.release()
+    second = queued.result(timeout=5)
+    waiter.shutdown()
+    assert admission.stats()["large_active"] == 30
+    second.release()
+    second.release()  # une seule fois
+    with admission.acquire(1_000):  # plus gros que le budget : voie vide
+        admission.queue_timeout = 0.05
+        with pytest.raises(Overloaded, match="timed out"):
+            admission.acquire(50)
+    stats = admission.stats()
+    assert stats == {
+        "small_active": 0,
+        "small_queued": 0,
+        "large_active": 0,
+        "large_queued": 0,
+        "admitted": 5,
+        "rejected": 2,
+        "timeouts": 1,
+        "background_waiting": 0,
+        "deferred": 0,
+    }
+
+
+def test_admission_background_work_yields_to_requests():
+    """Vérifie que l'arrière-plan n'occupe pas la file et passe après les requêtes."""
+    admission = AdmissionController(100, small_cost=10, max_queue=1, queue_timeout=5.0)
+    first = admission.acquire(80)
+    pool = ThreadPoolExecutor(max_workers=2)
+    background = pool.submit(admission.acquire, 80, background=True)
+    deadline = time.monotonic() + 5
+    while admission.stats()["background_waiting"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    # la place unique de la file reste libre pour une requête
+    queued = pool.submit(admission.acquire, 30)
+    while admission.stats()["large_queued"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    first.release()
+    second = queued.result(timeout=5)
+    assert not background.done()  # 30 + 80 dépasse le budget
+    second.release()
+    background.result(timeout=5).release()
+    pool.shutdown()
+
+    admission.queue_timeout = 0.05
+    with admission.acquire(1_000), pytest.raises(Overloaded, match="background"):
+        admission.acquire(50, background=True)
+    stats = admission.stats()
+    assert (stats["admitted"], stats["rejected"], stats["deferred"]) == (4, 0, 1)
+
+
+def test_warmup_deferred_when_overloaded_is_requeued():
+    """Vérifie qu'un préchauffage refusé faute de capacité est repris, sans échec."""
+    admission = AdmissionController(small_budget=10, queue_timeout=0.05)
+    triangulator = Triangulator(
+        cache_max_bytes=1 << 20, warmup_workers=1, admission=admission
+    )
+    triangulator.get_pointset = lambda pid: PointSet(points=[(0, 0), (1, 0), (0, 1)])
+    warmup = triangulator.warmup
+    with admission.acquire(10):
+        warmup.schedule(["id"])
+        deadline = time.monotonic() + 5
+        while warmup.stats()["deferred"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.001)
+    assert warmup.join(timeout=5)
+    stats = warmup.stats()
+    assert (stats["warmed"], stats["failed"]) == (1, 0)
+    assert stats["deferred"] >= 1 and triangulator.is_warm("id")
+    assert admission.stats()["rejected"] == 0
+    warmup.close()
@@ -0,0 +1,236 @@
+"""Préchauffage en arrière-plan des triangulations de PointSet attendus.
+
+La première requête sur un gros PointSet paie sa récupération et sa
+triangulation. `WarmupScheduler` les fait à l'avance : les identifiants
+annoncés (`WarmupScheduler.schedule`, route ``POST /warmup``, ou PointSet
+reçus par ``POST /pointset``) entrent dans une file à priorités que
+quelques threads vident en appelant `Triangulator.triangulate_bytes` ; le
+résultat arrive dans le cache et le ``store`` du Triangulator, où les
+requêtes interactives le trouvent.
+
+Ces calculs sont d'arrière-plan pour le contrôle d'admission du Triangulator
+(`TP.admission`) : ils passent après les requêtes, sans place dans leur
+file. Un préchauffage refusé faute de capacité (`TP.admission.Overloaded`)
+n'est pas un échec : l'identifiant est remis en file (compteur
+``deferred``).
+
+Le préchauffage n'a donc d'effet que si le Triangulator conserve ses
+résultats (``cache_max_bytes`` > 0 ou ``store``, exigés par le Triangulator
+qui l'active), et il passe par son client synchrone du PointSetManager.
+
+`WarmupScheduler.stats` donne l'état de la file et le taux de requêtes
+« chaudes » : parmi les premières requêtes sur des identifiants annoncés,
+la part dont le résultat était déjà prêt.
+"""
+
+import heapq
+import itertools
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+
+from TP.admission import Overloaded
+
+# nombre maximal d'identifiants en attente de préchauffage
+DEFAULT_MAX_QUEUE = 10_000
+
+# identifiants annoncés suivis jusqu'à leur première requête (taux de hits)
+_MAX_TRACKED = 100_000
+
+
+class WarmupScheduler:
+    """File à priorités de PointSet à trianguler en arrière-plan.
+
+    Au plus ``workers`` triangulations tournent en même temps, dans des
+    threads démarrés à la première annonce. Toutes les méthodes sont
+    thread-safe.
+    """
+
+    def __init__(
+        self, triangulator, *, workers: int = 2, max_queue: int = DEFAULT_MAX_QUEUE
+    ):
+        """Créer un ordonnanceur (inactif tant que rien n'est annoncé)."""
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.triangulator = triangulator
+        self.workers = workers
+        self.max_queue = max_queue
+        self.warmed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.dropped = 0
+        self.deferred = 0
+        self.requests = 0
+        self.hits = 0
+        # (-priorité, ordre d'annonce, identifiant) ; les entrées dont la
+        # priorité ne correspond plus à `_queued` sont périmées
+        self._heap: list[tuple[int, int, str]] = []
+        self._queued: dict[str, int] = {}
+        self._running: set[str] = set()
+        self._tracked: OrderedDict[str, None] = OrderedDict()
+        self._order = itertools.count()
+        self._threads: list[threading.Thread] = []
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def schedule(self, point_set_ids: Iterable[str], priority: int = 0) -> int:
+        """Annoncer des PointSet à préchauffer ; retourne le nombre mis en file.
+
+        Les priorités hautes passent d'abord, puis l'ordre d'annonce. Un
+        identifiant déjà en file n'y est qu'une fois (sa priorité est
+        relevée au besoin) et un identifiant en cours de calcul n'est pas
+        repris. Au-delà de ``max_queue`` identifiants en attente, les
+        nouveaux sont refusés (compteur ``dropped``).
+        """
+        queued = 0
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("warm-up scheduler is closed")
+            for point_set_id in point_set_ids:
+                current = self._queued.get(point_set_id)
+                if point_set_id in self._running or (
+                    current is not None and current >= priority
+                ):
+                    continue
+                if current is None and len(self._queued) >= self.max_queue:
+                    self.dropped += 1
+                    continue
+                self._queued[point_set_id] = priority
+                entry = (-priority, next(self._order), point_set_id)
+                heapq.heappush(self._heap, entry)
+                self._track(point_set_id)
+                queued += 1
+            if queued:
+                self._start()
+                self._cond.notify_all()
+        return queued
+
+    def record_request(self, point_set_id: str) -> None:
+        """Noter une requête interactive (taux de requêtes chaudes).
+
+        Seule la première requête sur un identifiant annoncé compte : elle
+        est chaude si son résultat est déjà prêt (`Triangulator.is_warm`).
+        À appeler avant de servir la requête.
+        """
+        with self._cond:
+            if point_set_id not in self._tracked:
+                return
+            del self._tracked[point_set_id]
+        warm = self.triangulator.is_warm(point_set_id)
+        with self._cond:
+            self.requests += 1
+            self.hits += warm
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Attendre que la file soit vide ; faux si ``timeout`` expire avant."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._queued and not self._running, timeout
+            )
+
+    def close(self) -> None:
+        """Abandonner la file et arrêter les threads (après leur calcul en cours)."""
+        with self._cond:
+            self._closed = True
+            self._heap.clear()
+            self._queued.clear()
+            self._cond.notify_all()
+            threads = list(self._threads)
+        for thread in threads:
+            thread.join()
+
+    def stats(self) -> dict[str, int | float]:
+        """État de la file et compteurs du préchauffage.
+
+        ``queued`` et ``running`` : identifiants en attente et en cours ;
+        ``warmed`` : triangulations calculées d'avance, ``skipped`` :
+        annonces déjà prêtes, ``failed`` : échecs (PointSet inconnu,
+        PointSetManager indisponible…), ``dropped`` : annonces refusées (file
+        pleine), ``deferred`` : calculs remis en file faute de capacité ;
+        ``requests`` et ``hits`` : premières requêtes sur des identifiants
+        annoncés, et celles qui étaient chaudes (``hit_ratio``).
+        """
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "queued": len(self._queued),
+                "running": len(self._running),
+                "warmed": self.warmed,
+                "skipped": self.skipped,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "deferred": self.deferred,
+                "requests": self.requests,
+                "hits": self.hits,
+                "hit_ratio": self.hits / self.requests if self.requests else 0.0,
+            }
+
+    def _track(self, point_set_id: str) -> None:
+        """Suivre un identifiant annoncé jusqu'à sa première requête (verrou pris)."""
+        self._tracked[point_set_id] = None
+        self._tracked.move_to_end(point_set_id)
+        if len(self._tracked) > _MAX_TRACKED:
+            self._tracked.popitem(last=False)
+
+    def _requeue(self, point_set_id: str, priority: int) -> None:
+        """Remettre en file un préchauffage différé (verrou pris).
+
+        Il passe derrière les annonces de même priorité ; s'il a été annoncé
+        de nouveau entre-temps, l'annonce la plus récente prévaut.
+        """
+        if self._closed or point_set_id in self._queued:
+            return
+        self._queued[point_set_id] = priority
+        heapq.heappush(self._heap, (-priority, next(self._order), point_set_id))
+
+    def _start(self) -> None:
+        """Démarrer les threads manquants (verrou pris)."""
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work,
+                name=f"warmup-{len(self._threads)}",
+                daemon=True,
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _work(self) -> None:
+        """Boucle d'un thread : préchauffer les identifiants par priorité."""
+        triangulator = self.triangulator
+        while True:
+            with self._cond:
+                while not self._heap and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                priority, _, point_set_id = heapq.heappop(self._heap)
+                if self._queued.get(point_set_id) != -priority:
+                    continue
+                del self._queued[point_set_id]
+                self._running.add(point_set_id)
+            warmed = failed = False
+            retry_after = None
+            try:
+                if not triangulator.is_warm(point_set_id):
+                    triangulator.triangulate_bytes(point_set_id, background=True)
+                    warmed = True
+            except Overloaded as e:
+                retry_after = e.retry_after
+            except Exception:
+                failed = True
+            with self._cond:
+                self._running.discard(point_set_id)
+                if retry_after is not None:
+                    self.deferred += 1
+                    self._requeue(point_set_id, -priority)
+                elif failed:
+                    self.failed += 1
+                    self._tracked.pop(point_set_id, None)
+                elif warmed:
+                    self.warmed += 1
+                else:
+                    self.skipped += 1
+                self._cond.notify_all()
+                if retry_after is not None:
+                    # le service est saturé : ce thread attend avant de reprendre
+                    self._cond.wait_for(lambda: self._closed, retry_after)
@@ -0,0 +1,374 @@
+"""Formats de réponse compacts et compressés, choisis par négociation HTTP.
+
+Le format par défaut de ``GET /triangulate/<id>`` (`TP.codec.encode_triangles`,
+``application/octet-stream``) coûte 12 octets par triangle et renvoie tous
+les sommets. Un client peut demander mieux :
+
+- ``Accept: application/vnd.triangulator.compact`` : le format compact
+  (`transcode`, `encode_as`), dont les paramètres de type choisissent le codage des
+  indices (``indices=varint``, le défaut, ``u16`` ou ``u32``) et
+  l'omission des sommets (``vertices=omit``) ;
+- ``Accept-Encoding: gzip`` ou ``deflate`` : la réponse (quel que soit son
+  format) est compressée, avec l'en-tête ``Content-Encoding`` correspondant.
+
+Format compact :
+
+- 4 octets ``TRC1`` puis 1 octet de drapeaux : bit 0, sommets présents ;
+  bits 1 et 2, codage des indices (`INDEX_CODINGS`) ;
+- 4 octets little-endian : nombre de sommets, suivis de leurs coordonnées
+  (float32 little-endian) s'ils sont présents ;
+- 4 octets little-endian : nombre de triangles, puis les indices.
+
+Les triangles sont réordonnés (chacun commence par son plus petit indice,
+orientation conservée, et ils sont triés) ; avec les sommets, ceux-ci sont
+en plus renumérotés dans leur ordre d'apparition, de sorte que les indices
+voisins se suivent. En ``varint``, chaque triangle (a, b, c) est codé par
+les écarts ``a - a_précédent``, ``b - a`` et ``c - a`` en entiers à longueur
+variable (zigzag + LEB128) : un peu moins de 5 octets par triangle au lieu
+de 12, et environ 3 une fois compressé. ``u16`` (si le nombre de sommets le
+permet, sinon ``u32``) garde des indices de taille fixe.
+
+Sans les sommets (``vertices=omit``), les indices renvoient aux points du
+PointSet tel que le client l'a envoyé : ce sont ceux qu'il détient déjà. Un
+point en double y est représenté par sa première occurrence.
+"""
+
+import gzip
+import struct
+import sys
+import zlib
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from TP.codec import (
+    INDEX_TYPECODE,
+    encode_triangles,
+    float32_array,
+    float32_view,
+    index_array,
+)
+from TP.models import Triangles
+
+RAW_MEDIA_TYPE = "application/octet-stream"
+COMPACT_MEDIA_TYPE = "application/vnd.triangulator.compact"
+
+# codages des indices du format compact, par valeur du drapeau
+INDEX_CODINGS = ("u32", "u16", "varint")
+
+# compressions acceptées (Accept-Encoding), par ordre de préférence
+COMPRESSIONS = ("gzip", "deflate")
+
+_MAGIC = b"TRC1"
+_HAS_VERTICES = 0x01
+_HEADER = struct.Struct("<I")
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+@dataclass(frozen=True, slots=True)
+class WireFormat:
+    """Format d'une réponse de triangulation.
+
+    ``compact`` choisit le format compact (sinon celui par défaut, dont
+    seule la compression peut varier), ``indices`` son codage des indices,
+    ``vertices`` la présence des sommets et ``compression`` l'éventuel
+    ``Content-Encoding``.
+    """
+
+    compact: bool = False
+    indices: str = "varint"
+    vertices: bool = True
+    compression: str | None = None
+
+    @property
+    def media_type(self) -> str:
+        """Type de contenu de la réponse."""
+        if not self.compact:
+            return RAW_MEDIA_TYPE
+        params = f"; indices={self.indices}"
+        if not self.vertices:
+            params += "; vertices=omit"
+        return COMPACT_MEDIA_TYPE + params
+
+    @property
+    def key(self) -> str:
+        """Nom unique du format."""
+        key = self.media_type
+        if self.compression:
+            key += f"+{self.compression}"
+        return key
+
+    def cache_key(self, point_set_id: str) -> str:
+        """Clé du résultat d'un PointSet dans ce format (cache des résultats)."""
+        if self == DEFAULT_FORMAT:
+            return point_set_id
+        return f"{point_set_id}\n{self.key}"
+
+
+DEFAULT_FORMAT = WireFormat()
+
+# en-têtes de la requête dont dépend le format choisi par `negotiate` : une
+# réponse négociée les nomme dans ``Vary``, même au format par défaut
+NEGOTIATED_HEADERS = ("Accept", "Accept-Encoding")
+
+
+def all_formats() -> list[WireFormat]:
+    """Tous les formats possibles (pour oublier les résultats d'un PointSet)."""
+    formats = []
+    for compression in (None, *COMPRESSIONS):
+        formats.append(WireFormat(compression=compression))
+        for indices in INDEX_CODINGS:
+            for vertices in (True, False):
+                formats.append(WireFormat(True, indices, vertices, compression))
+    return formats
+
+
+def _parse_header(value: str | None) -> list[tuple[str, dict[str, str], float]]:
+    """Éléments d'un en-tête ``Accept`` : (valeur, paramètres, qualité)."""
+    items = []
+    for part in (value or "").split(","):
+        name, *params = (p.strip() for p in part.split(";"))
+        if not name:
+            continue
+        options = {}
+        quality = 1.0
+        for param in params:
+            key, _, val = param.partition("=")
+            key, val = key.strip().lower(), val.strip().strip('"')
+            if key == "q":
+                try:
+                    quality = float(val)
+                except ValueError:
+                    quality = 0.0
+            else:
+                options[key] = val
+        items.append((name.lower(), options, quality))
+    return items
+
+
+def negotiate(accept: str | None, accept_encoding: str | None = None) -> WireFormat:
+    """Choisir le format de la réponse d'après les en-têtes de la requête.
+
+    Le type accepté de plus haute qualité l'emporte (le premier en cas
+    d'égalité) ; faute de type connu, c'est le format par défaut. Lève
+    `ValueError` si le format compact est demandé avec un paramètre invalide.
+    """
+    best = None
+    for name, options, quality in _parse_header(accept):
+        if quality <= 0 or (best is not None and quality <= best[1]):
+            continue
+        if name == COMPACT_MEDIA_TYPE:
+            indices = options.get("indices", "varint")
+            vertices = options.get("vertices", "include")
+            if indices not in INDEX_CODINGS:
+                raise ValueError(f"unsupported indices={indices!r}")
+            if vertices not in ("include", "omit"):
+                raise ValueError(f"unsupported vertices={vertices!r}")
+            best = (WireFormat(True, indices, vertices == "include"), quality)
+        elif name in (RAW_MEDIA_TYPE, "application/*", "*/*"):
+            best = (DEFAULT_FORMAT, quality)
+    fmt = best[0] if best else DEFAULT_FORMAT
+
+    codings = {name: quality for name, _, quality in _parse_header(accept_encoding)}
+    for compression in COMPRESSIONS:
+        if codings.get(compression, 0) > 0:
+            return WireFormat(fmt.compact, fmt.indices, fmt.vertices, compression)
+    return fmt
+
+
+def compress(data: bytes, compression: str | None) -> bytes:
+    """Compresser ``data`` (``gzip``, ``deflate`` ou ``None``)."""
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if compression == "deflate":
+        return zlib.compress(data, 6)
+    return data
+
+
+def decompress(data: bytes, compression: str | None) -> bytes:
+    """Inverse de `compress`."""
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "deflate":
+        return zlib.decompress(data)
+    return data
+
+
+def transcode(data: bytes, fmt: WireFormat) -> bytes:
+    """Convertir une réponse au format par défaut dans le format ``fmt``.
+
+    ``fmt`` doit inclure les sommets (voir `encode_as` sinon).
+    """
+    if not fmt.vertices:
+        raise ValueError("omitting vertices needs the PointSet indices")
+    if fmt.compact:
+        view = memoryview(data)
+        n_vertices = _HEADER.unpack_from(view)[0]
+        end = 4 + 8 * n_vertices
+        coords = float32_view(view[4:end])
+        indices = array(INDEX_TYPECODE)
+        indices.frombytes(view[end + 4 :])
+        if not _LITTLE_ENDIAN:
+            indices.byteswap()
+        data = _compact(coords, n_vertices, indices, fmt.indices)
+    return compress(data, fmt.compression)
+
+
+def encode_as(triangles: Triangles, fmt: WireFormat) -> bytes:
+    """Encoder un résultat `Triangles` dans le format ``fmt``."""
+    if not fmt.compact:
+        data = encode_triangles(triangles.vertices, triangles.triangles)
+        return compress(data, fmt.compression)
+    if fmt.vertices:
+        coords = float32_array(triangles.vertices)
+        indices = index_array(triangles.triangles)
+        data = _compact(coords, len(coords) // 2, indices, fmt.indices)
+        return compress(data, fmt.compression)
+
+    # indices des points d'origine : première occurrence de chaque sommet
+    index_map = triangles.index_map
+    if index_map is None:
+        n_points = len(triangles.vertices)
+        original = range(n_points)
+    else:
+        n_points = len(index_map)
+        original = [-1] * len(triangles.vertices)
+        for i, j in zip(range(n_points - 1, -1, -1), reversed(index_map), strict=True):
+            if j >= 0:
+                original[j] = i
+    flat = array(
+        INDEX_TYPECODE, map(original.__getitem__, index_array(triangles.triangles))
+    )
+    return compress(_compact(None, n_points, flat, fmt.indices), fmt.compression)
+
+
+def _compact(coords, n_vertices: int, indices: Sequence[int], coding: str) -> bytes:
+    """Format compact ; sans ``coords``, les sommets sont omis."""
+    n_triangles = len(indices) // 3
+    flags = INDEX_CODINGS.index(coding) << 1
+
+    if coords is not None:
+        # renumérotation des sommets par ordre d'apparition
+        flags |= _HAS_VERTICES
+        renumber = [-1] * n_vertices
+        order = []
+        for v in indices:
+            if renumber[v] < 0:
+                renumber[v] = len(order)
+                order.append(v)
+        for v in range(n_vertices):
+            if renumber[v] < 0:
+                renumber[v] = len(order)
+                order.append(v)
+        indices = list(map(renumber.__getitem__, indices))
+        vertex_block = array("f")
+        for v in order:
+            vertex_block.append(coords[2 * v])
+            vertex_block.append(coords[2 * v + 1])
+        if not _LITTLE_ENDIAN:
+            vertex_block.byteswap()
+    else:
+        vertex_block = b""
+
+    # chaque triangle commence par son plus petit indice, puis tri
+    triangles = []
+    for t in range(0, 3 * n_triangles, 3):
+        a, b, c = indices[t], indices[t + 1], indices[t + 2]
+        if b < a and b < c:
+            a, b, c = b, c, a
+        elif c < a and c < b:
+            a, b, c = c, a, b
+        triangles.append((a, b, c))
+    triangles.sort()
+
+    if coding == "u16" and n_vertices > 0x10000:
+        coding = "u32"
+        flags = (flags & _HAS_VERTICES) | (INDEX_CODINGS.index(coding) << 1)
+    if coding == "varint":
+        index_block = bytearray()
+        append = index_block.append
+        previous = 0
+        for a, b, c in triangles:
+            for delta in (a - previous, b - a, c - a):
+                z = (delta << 1) ^ (delta >> 63)
+                while z >= 0x80:
+                    append(z & 0x7F | 0x80)
+                    z >>= 7
+                append(z)
+            previous = a
+    else:
+        index_block = array("H" if coding == "u16" else INDEX_TYPECODE)
+        for triangle in triangles:
+            index_block.extend(triangle)
+        if not _LITTLE_ENDIAN:
+            index_block.byteswap()
+
+    return b"".join(
+        (
+            _MAGIC,
+            bytes((flags,)),
+            _HEADER.pack(n_vertices),
+            vertex_block,
+            _HEADER.pack(n_triangles),
+            index_block,
+        )
+    )
+
+
+def decode_compact(data: bytes) -> tuple[list | None, int, list[tuple[int, int, int]]]:
+    """Décoder le format compact : (sommets ou ``None``, nombre, triangles).
+
+    Lève `ValueError` si ``data`` n'est pas au format compact.
+    """
+    view = memoryview(data)
+    if bytes(view[:4]) != _MAGIC or len(view) < 13:
+        raise ValueError("not a compact triangulation payload")
+    flags = view[4]
+    coding = INDEX_CODINGS[(flags >> 1) & 0x03]
+    n_vertices = _HEADER.unpack_from(view, 5)[0]
+    pos = 9
+    vertices = None
+    if flags & _HAS_VERTICES:
+        coords = float32_view(view[pos : pos + 8 * n_vertices]).tolist()
+        vertices = list(zip(coords[0::2], coords[1::2], strict=True))
+        pos += 8 * n_vertices
+    n_triangles = _HEADER.unpack_from(view, pos)[0]
+    pos += 4
+
+    if coding == "varint":
+        deltas = _decode_varints(bytes(view[pos:]), 3 * n_triangles)
+        triangles = []
+        previous = 0
+        for t in range(0, len(deltas), 3):
+            a = previous + deltas[t]
+            triangles.append((a, a + deltas[t + 1], a + deltas[t + 2]))
+            previous = a
+    else:
+        flat = array("H" if coding == "u16" else INDEX_TYPECODE)
+        flat.frombytes(view[pos : pos + flat.itemsize * 3 * n_triangles])
+        if not _LITTLE_ENDIAN:
+            flat.byteswap()
+        triangles = list(zip(flat[0::3], flat[1::3], flat[2::3], strict=True))
+    return vertices, n_vertices, triangles
+
+
+def _decode_varints(payload: bytes, count: int) -> list[int]:
+    """Lire ``count`` entiers zigzag + LEB128 au début de ``payload``."""
+    values = []
+    append = values.append
+    pos = 0
+    try:
+        for _ in range(count):
+            byte = payload[pos]
+            pos += 1
+            z = byte & 0x7F
+            shift = 7
+            while byte & 0x80:
+                byte = payload[pos]
+                pos += 1
+                z |= (byte & 0x7F) << shift
+                shift += 7
+            append((z >> 1) ^ -(z & 1))
+    except IndexError:
+        raise ValueError("truncated compact triangulation payload") from None
+    return values